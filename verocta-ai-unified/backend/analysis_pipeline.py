@@ -0,0 +1,94 @@
+"""
+VeroctaAI Analysis Pipeline
+Runs GPT insights, SpendScore calculation and chart rendering concurrently
+so upload latency approaches max(GPT, render) instead of their sum
+"""
+
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+
+from gpt_utils import generate_financial_insights_with_usage
+from spend_score_engine import get_enhanced_analysis
+from transaction_aggregates import TransactionAggregates
+from rule_insights import generate_rule_based_insights
+from pdf_generator import render_report_charts
+
+PIPELINE_WORKERS = int(os.environ.get('PIPELINE_WORKERS', '4'))
+
+# Shared by all requests in this worker; GPT calls are I/O bound and charts serialize on the pyplot lock
+pipeline_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix='verocta-pipeline')
+
+
+def _timed(func, *args, **kwargs):
+    """Run a stage and return (result, seconds)"""
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def run_analysis_pipeline(transactions: List[Dict[str, Any]],
+                          budgets: Optional[List[Any]] = None,
+                          include_insights: bool = True,
+                          chart_backend: Optional[str] = None,
+                          render_charts: bool = True) -> Dict[str, Any]:
+    """
+    Start the insight request and chart rendering as soon as transactions are parsed,
+    score on the calling thread, and join both only when the report is assembled
+    With include_insights=False only rule-based insights are returned; GPT runs elsewhere (see insight_jobs)
+    chart_backend selects matplotlib or ReportLab charts (see render_report_charts)
+    render_charts=False skips charts when the PDF is rendered in another process (see render_service)
+    """
+    started = time.perf_counter()
+
+    # One pass over the rows feeds both the prompt builder and the scoring engine
+    aggregates, aggregation_seconds = _timed(TransactionAggregates, transactions)
+
+    insights_future = None
+    if include_insights:
+        insights_future = pipeline_executor.submit(
+            _timed, generate_financial_insights_with_usage, transactions, aggregates=aggregates
+        )
+    charts_future = None
+    if render_charts:
+        charts_future = pipeline_executor.submit(_timed, render_report_charts, transactions, None, chart_backend)
+
+    enhanced_analysis, scoring_seconds = _timed(get_enhanced_analysis, transactions, budgets, aggregates)
+
+    if insights_future:
+        (insights, prompt_usage), insights_seconds = insights_future.result()
+        if prompt_usage.get('source') == 'rules' and enhanced_analysis['budget_report']:
+            # The request started before budgets were scored; redo the (instant) rule fallback with overruns
+            insights = generate_rule_based_insights(transactions, aggregates, enhanced_analysis['budget_report'])
+    else:
+        # Instant rule-based insights stand in until the caller's GPT enrichment arrives
+        (insights, prompt_usage), insights_seconds = _timed(
+            lambda: (generate_rule_based_insights(transactions, aggregates, enhanced_analysis['budget_report']),
+                     {'source': 'rules'})
+        )
+
+    try:
+        charts, charts_seconds = charts_future.result() if charts_future else (None, 0.0)
+    except Exception as e:
+        # generate_report_pdf renders inline when charts is None
+        logging.error(f"Chart rendering failed in pipeline: {str(e)}")
+        charts, charts_seconds = None, 0.0
+
+    timings = {
+        'aggregation': round(aggregation_seconds, 3),
+        'scoring': round(scoring_seconds, 3),
+        'insights': round(insights_seconds, 3),
+        'charts': round(charts_seconds, 3),
+        'total': round(time.perf_counter() - started, 3)
+    }
+    logging.info(f"Analysis pipeline timings: {timings}")
+
+    return {
+        'enhanced_analysis': enhanced_analysis,
+        'insights': insights,
+        'prompt_usage': prompt_usage,
+        'charts': charts,
+        'timings': timings
+    }
@@ -2,7 +2,9 @@ import os
 import bcrypt
 from datetime import datetime, timedelta
 from flask import jsonify, request
-from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity
+from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
 from functools import wraps
 
 # Simple in-memory user store (replace with database in production)
@@ -90,4 +92,13 @@ def require_admin(f):
 def get_current_user():
     """Get current authenticated user"""
     current_user_email = get_jwt_identity()
-    return get_user_by_email(current_user_email)
\ No newline at end of file
+    return get_user_by_email(current_user_email)
+
+def get_optional_user():
+    """Get the authenticated user on endpoints that also accept anonymous requests (None without a valid token)"""
+    try:
+        verify_jwt_in_request(optional=True)
+    except (JWTExtendedException, PyJWTError):
+        return None
+    current_user_email = get_jwt_identity()
+    return get_user_by_email(current_user_email) if current_user_email else None
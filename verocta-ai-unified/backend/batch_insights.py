@@ -0,0 +1,281 @@
+"""
+VeroctaAI Batch Insights
+Regenerates insights for many stored reports with bounded concurrency, a shared rate limit,
+prompt de-duplication and a resumable JSONL checkpoint, saving them back to each report
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Any, Tuple
+
+import gpt_utils
+from gpt_utils import build_insight_request, generate_financial_insights_with_usage
+from transaction_aggregates import TransactionAggregates
+from prompt_templates import get_prompt_template
+from report_model import build_report_model
+from report_store import ReportStore, report_store
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+BATCH_CONCURRENCY = int(os.environ.get('BATCH_INSIGHT_CONCURRENCY', '4'))
+BATCH_REQUESTS_PER_MINUTE = float(os.environ.get('BATCH_INSIGHT_RPM', '60'))
+BATCH_CHECKPOINT_PATH = os.environ.get(
+    'BATCH_INSIGHT_CHECKPOINT', os.path.join(basedir, 'outputs', 'batch_insights.jsonl')
+)
+
+
+class RateLimiter:
+    """Token bucket shared by all workers; acquire() blocks until a request may start"""
+
+    def __init__(self, requests_per_minute: float, burst: int = 1, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        while True:
+            with self._lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) / self.interval)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) * self.interval
+            self.sleep(wait)
+
+
+class RateLimitedClient:
+    """Applies the limiter only to real API calls, so cache hits are never throttled"""
+
+    def __init__(self, client, limiter: RateLimiter):
+        self.client = client
+        self.limiter = limiter
+        self.api_calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.limiter.acquire()
+        with self._lock:
+            self.api_calls += 1
+        return self.client.chat.completions.create(**kwargs)
+
+
+def transactions_hash(transactions: List[Dict[str, Any]]) -> str:
+    """Content hash of an item's normalized transactions"""
+    payload = json.dumps(transactions, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def checkpoint_key(item_id: str, prompt_version: Optional[str], input_hash: Optional[str]) -> Tuple:
+    """A result is only reused for the same item, prompt template version and input data"""
+    return (item_id, prompt_version, input_hash)
+
+
+def load_checkpoint(path: str) -> Dict[Tuple, Dict[str, Any]]:
+    """Latest checkpoint record per (item id, prompt version, input hash); a torn final line from a crash is ignored"""
+    records: Dict[Tuple, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                records[checkpoint_key(record['id'], record.get('prompt_version'), record.get('input_hash'))] = record
+            except (ValueError, KeyError):
+                logging.warning(f"Skipping unreadable checkpoint line in {path}")
+    return records
+
+
+def iter_stored_reports(store: ReportStore = report_store) -> Iterable[Tuple[str, Any]]:
+    """(analysis id, loader) pairs for stored reports; transactions load lazily inside workers"""
+    skipped = 0
+    for record in store.iter_records():
+        if not record['artifacts'].get('transactions'):
+            skipped += 1  # stored before transactions were kept with the analysis
+            continue
+        yield record['analysis_id'], (lambda analysis_id=record['analysis_id']: store.load_transactions(analysis_id))
+    if skipped:
+        logging.warning(f"Skipped {skipped} stored reports without stored transactions")
+
+
+def save_report_insights(store: ReportStore, analysis_id: str, transactions: List[Dict[str, Any]],
+                         record: Dict[str, Any]) -> bool:
+    """
+    Write an item's suggestions back to its stored analysis and report model, keyed by prompt version and input hash
+    False when the analysis is gone or already holds these suggestions
+    """
+    stored = store.get_record(analysis_id)
+    analysis_data = stored and store.load_analysis(analysis_id)
+    if not analysis_data:
+        return False
+    insights_key = {'prompt_version': record['prompt_version'], 'input_hash': record['input_hash']}
+    if analysis_data.get('insights_key') == insights_key and analysis_data.get('suggestions') == record['suggestions']:
+        return False
+
+    analysis_data.update({'suggestions': record['suggestions'], 'insights_status': 'completed',
+                          'insights_key': insights_key})
+    company_name, logo_path = stored.get('company_name'), analysis_data.get('logo_path')
+    # The new content hash drops the stale PDF; it is rendered again from the new model when downloaded
+    store.save_report(analysis_id, analysis_data, transactions, company_name, logo_path,
+                      render_options=stored.get('render_options'),
+                      report_model=build_report_model(analysis_data, transactions, company_name, logo_path),
+                      set_latest=False)
+    return True
+
+
+class InsightBatch:
+    """
+    One batch run; finished items are appended to the checkpoint with their suggestions as they finish
+    With a store, item ids are analysis ids and each item's suggestions are saved back to that report
+    Only counts are kept in memory; per-item results live in the checkpoint
+    """
+
+    def __init__(self, checkpoint_path: str = BATCH_CHECKPOINT_PATH, concurrency: int = BATCH_CONCURRENCY,
+                 requests_per_minute: float = BATCH_REQUESTS_PER_MINUTE, client=None, cache=None,
+                 store: Optional[ReportStore] = None):
+        self.checkpoint_path = checkpoint_path
+        self.concurrency = max(concurrency, 1)
+        client = client or gpt_utils.openai_client
+        self.client = RateLimitedClient(client, RateLimiter(requests_per_minute)) if client else None
+        self.cache = cache
+        self.store = store
+        self.stats = {'total': 0, 'completed': 0, 'resumed': 0, 'deduplicated': 0, 'fallback': 0, 'failed': 0,
+                      'saved': 0}
+        self._checkpoint_records: Dict[Tuple, Dict[str, Any]] = {}
+        self._prompts: Dict[str, Future] = {}  # prompt fingerprint -> shared result
+        self._lock = threading.Lock()
+
+    def _checkpoint(self, record: Dict[str, Any]):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.checkpoint_path) or '.', exist_ok=True)
+            with open(self.checkpoint_path, 'a') as f:
+                f.write(json.dumps(record, default=str) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _generate(self, transactions: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+        """Insights for one item; every item with the same prompt in this run shares one request"""
+        aggregates = TransactionAggregates(transactions)
+        _, fingerprint, _ = build_insight_request(aggregates)
+
+        with self._lock:
+            leader = self._prompts.get(fingerprint)
+            if leader is None:
+                future = self._prompts[fingerprint] = Future()
+        if leader is not None:
+            return leader.result(), True
+
+        try:
+            suggestions, usage = generate_financial_insights_with_usage(
+                transactions, self.client, self.cache, aggregates
+            )
+            result = {'suggestions': suggestions, 'usage': usage, 'fingerprint': fingerprint}
+            if usage.get('fallback'):
+                # Do not pin a fallback answer; the next identical item tries GPT again
+                with self._lock:
+                    self._prompts.pop(fingerprint, None)
+            future.set_result(result)
+            return result, False
+        except Exception as e:
+            with self._lock:
+                self._prompts.pop(fingerprint, None)
+            future.set_exception(e)
+            raise
+
+    def _process(self, item_id: str, source: Any) -> Dict[str, Any]:
+        record = {'id': item_id, 'completed_at': None}
+        previous = None
+        try:
+            transactions = source() if callable(source) else source
+            if not transactions:
+                raise ValueError('no transactions')
+            record['prompt_version'] = get_prompt_template().version
+            record['input_hash'] = transactions_hash(transactions)
+            previous = self._checkpoint_records.get(checkpoint_key(item_id, record['prompt_version'], record['input_hash']))
+            if previous and previous.get('status') == 'completed':
+                # Same item, prompt and data: reuse the stored suggestions without calling GPT
+                # (saved again in case an earlier run stopped before saving them to the report)
+                return dict(previous, resumed=True, saved=self._save(item_id, transactions, previous))
+
+            result, deduplicated = self._generate(transactions)
+            record.update(result)
+            record['deduplicated'] = deduplicated
+            # Rule-engine output means GPT was unavailable; retry this item on resume
+            record['status'] = 'fallback' if result['usage'].get('fallback') else 'completed'
+            record['saved'] = self._save(item_id, transactions, record)
+        except Exception as e:
+            logging.error(f"Batch insight item {item_id} failed: {str(e)}")
+            record.update({'status': 'failed', 'error': str(e)[:500]})
+            if previous and previous.get('suggestions'):
+                # Keep the earlier fallback suggestions rather than dropping them
+                record['suggestions'] = previous['suggestions']
+        record['completed_at'] = datetime.now().isoformat()
+        self._checkpoint(record)
+        return record
+
+    def _save(self, item_id: str, transactions: List[Dict[str, Any]], record: Dict[str, Any]) -> bool:
+        return bool(self.store) and save_report_insights(self.store, item_id, transactions, record)
+
+    def run(self, items: Iterable[Tuple[str, Any]]) -> Dict[str, Any]:
+        """
+        Process (item id, transactions or loader) pairs, reusing results already completed in the
+        checkpoint for the same prompt version and input; returns run statistics
+        """
+        started = time.perf_counter()
+        self._checkpoint_records = load_checkpoint(self.checkpoint_path)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='verocta-batch') as executor:
+            pending = set()
+            for item_id, source in items:
+                self.stats['total'] += 1
+                pending.add(executor.submit(self._process, item_id, source))
+                # Bound queued work so huge batches do not hold every item in memory
+                if len(pending) >= self.concurrency * 4:
+                    finished = next(as_completed(pending))
+                    pending.discard(finished)
+                    self._count(finished.result())
+            for finished in as_completed(pending):
+                self._count(finished.result())
+
+        self.stats.update({
+            'api_calls': self.client.api_calls if self.client else 0,
+            'elapsed_seconds': round(time.perf_counter() - started, 3),
+            'checkpoint': self.checkpoint_path
+        })
+        logging.info(f"Batch insights finished: {self.stats}")
+        return dict(self.stats)
+
+    def _count(self, record: Dict[str, Any]):
+        self.stats['resumed' if record.get('resumed') else record['status']] += 1
+        self.stats['saved'] += bool(record.get('saved'))
+        if record.get('deduplicated') and not record.get('resumed'):
+            self.stats['deduplicated'] += 1
+
+
+def run_insight_batch(items: Iterable[Tuple[str, Any]], **options) -> Dict[str, Any]:
+    """Main function to regenerate insights for many items"""
+    return InsightBatch(**options).run(items)
+
+
+if __name__ == "__main__":
+    # CLI: regenerate insights for every stored report, resuming from the checkpoint
+    logging.basicConfig(level=logging.INFO)
+    print(f"Regenerating insights for stored reports in {report_store.root}...")
+    stats = run_insight_batch(iter_stored_reports(report_store), store=report_store)
+    print(f"✅ {stats['completed']} completed, {stats['resumed']} already done, {stats['saved']} reports updated, "
+          f"{stats['deduplicated']} deduplicated, {stats['fallback']} fallback, {stats['failed']} failed "
+          f"({stats['api_calls']} API calls in {stats['elapsed_seconds']}s)")
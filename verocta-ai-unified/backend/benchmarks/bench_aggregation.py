@@ -0,0 +1,166 @@
+"""
+VeroctaAI Aggregation Benchmark
+Compares the legacy multi-pass GPT prompt builder with the shared single-pass aggregates
+
+Usage: python benchmarks/bench_aggregation.py [rows ...]
+"""
+
+import os
+import sys
+import time
+import random
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gpt_utils import format_transactions_for_gpt
+from spend_score_engine import get_enhanced_analysis
+from transaction_aggregates import TransactionAggregates
+
+
+def make_transactions(rows, categories=40, vendors=2000, seed=7):
+    """Synthetic ledger with a long tail of vendors over twelve months"""
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    return [
+        {
+            'date': start + timedelta(days=rng.randrange(365)),
+            'vendor': f"Vendor {int(rng.paretovariate(1.2)) % vendors}",
+            'category': f"Category {rng.randrange(categories)}",
+            'amount': round(rng.lognormvariate(4, 1.2), 2)
+        }
+        for _ in range(rows)
+    ]
+
+
+def legacy_format_transactions_for_gpt(transactions):
+    """Prompt builder before shared aggregates: one pass plus a rescan per top category and for outliers"""
+    if not transactions:
+        return "No transaction data available."
+    
+    # Create comprehensive statistics
+    total_amount = sum(t['amount'] for t in transactions)
+    avg_amount = total_amount / len(transactions)
+    
+    # Enhanced breakdowns
+    categories = {}
+    vendors = {}
+    vendor_frequency = {}
+    monthly_patterns = {}
+    
+    for transaction in transactions:
+        category = transaction.get('category', 'Uncategorized')
+        vendor = transaction.get('vendor', 'Unknown')
+        amount = transaction.get('amount', 0)
+        date = transaction.get('date')
+        
+        # Category and vendor tracking
+        categories[category] = categories.get(category, 0) + amount
+        vendors[vendor] = vendors.get(vendor, 0) + amount
+        vendor_frequency[vendor] = vendor_frequency.get(vendor, 0) + 1
+        
+        # Monthly pattern analysis
+        if date:
+            month_key = date.strftime('%Y-%m') if hasattr(date, 'strftime') else str(date)[:7]
+            monthly_patterns[month_key] = monthly_patterns.get(month_key, 0) + amount
+    
+    # Sort by amount and identify patterns
+    top_categories = sorted(categories.items(), key=lambda x: x[1], reverse=True)[:10]
+    top_vendors = sorted(vendors.items(), key=lambda x: x[1], reverse=True)[:15]
+    frequent_vendors = sorted(vendor_frequency.items(), key=lambda x: x[1], reverse=True)[:10]
+    
+    # Identify recurring subscriptions (vendors with regular amounts)
+    likely_subscriptions = []
+    for vendor, total_spent in top_vendors[:10]:
+        frequency = vendor_frequency.get(vendor, 0)
+        if frequency >= 2:  # Appears multiple times
+            avg_per_transaction = total_spent / frequency
+            likely_subscriptions.append((vendor, total_spent, frequency, avg_per_transaction))
+    
+    # Format enhanced data for GPT
+    formatted_data = f"""
+    ENHANCED FINANCIAL DATA ANALYSIS REQUEST
+    
+    Executive Summary:
+    - Total Transactions: {len(transactions):,}
+    - Total Amount: ${total_amount:,.2f}
+    - Average Transaction: ${avg_amount:,.2f}
+    - Unique Vendors: {len(vendors)}
+    - Unique Categories: {len(categories)}
+    
+    Top Spending Categories (with optimization potential):
+    """
+    
+    for category, amount in top_categories:
+        percentage = (amount / total_amount) * 100
+        transaction_count = sum(1 for t in transactions if t.get('category') == category)
+        avg_per_category = amount / transaction_count if transaction_count > 0 else 0
+        formatted_data += f"- {category}: ${amount:,.2f} ({percentage:.1f}%) | {transaction_count} transactions | Avg: ${avg_per_category:,.2f}\n"
+    
+    formatted_data += "\nTop Vendors by Spend (consolidation opportunities):\n"
+    for vendor, amount in top_vendors:
+        percentage = (amount / total_amount) * 100
+        frequency = vendor_frequency.get(vendor, 0)
+        formatted_data += f"- {vendor}: ${amount:,.2f} ({percentage:.1f}%) | {frequency} transactions\n"
+    
+    # Add subscription analysis
+    if likely_subscriptions:
+        formatted_data += "\nLikely Recurring Subscriptions/Services:\n"
+        for vendor, total, freq, avg in likely_subscriptions:
+            formatted_data += f"- {vendor}: ${avg:,.2f}/transaction × {freq} times = ${total:,.2f} total\n"
+    
+    # Add outlier analysis
+    high_value_threshold = avg_amount * 3  # Transactions 3x above average
+    outliers = [t for t in transactions if t.get('amount', 0) > high_value_threshold]
+    if outliers:
+        formatted_data += f"\nHigh-Value Outliers (>${high_value_threshold:,.2f}+):\n"
+        for transaction in sorted(outliers, key=lambda x: x.get('amount', 0), reverse=True)[:5]:
+            formatted_data += f"- {transaction.get('vendor', 'Unknown')}: ${transaction.get('amount', 0):,.2f} ({transaction.get('category', 'Uncategorized')})\n"
+    
+    # Monthly spending patterns
+    if len(monthly_patterns) > 1:
+        formatted_data += "\nMonthly Spending Patterns:\n"
+        for month, amount in sorted(monthly_patterns.items())[-6:]:  # Last 6 months
+            formatted_data += f"- {month}: ${amount:,.2f}\n"
+    
+    return formatted_data
+
+
+def best_of(func, *args, repeat=3):
+    """Fastest of several runs, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def legacy_upload(transactions):
+    """Prompt and score each doing their own passes"""
+    legacy_format_transactions_for_gpt(transactions)
+    get_enhanced_analysis(transactions)
+
+
+def shared_upload(transactions):
+    """One aggregation pass feeding both consumers"""
+    aggregates = TransactionAggregates(transactions)
+    format_transactions_for_gpt(transactions, aggregates)
+    get_enhanced_analysis(transactions, aggregates=aggregates)
+
+
+def main(sizes):
+    print(f"{'rows':>9} {'legacy prompt':>14} {'prompt (aggs)':>14} {'legacy upload':>14} {'shared upload':>14}")
+    for rows in sizes:
+        transactions = make_transactions(rows)
+        aggregates = TransactionAggregates(transactions)
+
+        print(f"{rows:>9,} "
+              f"{best_of(legacy_format_transactions_for_gpt, transactions) * 1000:>12.1f}ms "
+              f"{best_of(format_transactions_for_gpt, transactions, aggregates) * 1000:>12.2f}ms "
+              f"{best_of(legacy_upload, transactions) * 1000:>12.1f}ms "
+              f"{best_of(shared_upload, transactions) * 1000:>12.1f}ms")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
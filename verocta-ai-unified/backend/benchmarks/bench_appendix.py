@@ -0,0 +1,60 @@
+"""
+VeroctaAI Transaction Appendix Benchmark
+Page count, render time and peak memory for reports with the full transaction ledger appended,
+against a single repeat-header Table holding every row
+
+Usage: python benchmarks/bench_appendix.py [rows ...] [--single-table]
+Run one row count per process for meaningful peak memory
+"""
+
+import os
+import sys
+import time
+import resource
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_generator
+from pdf_generator import generate_report_pdf_with_stats, LEDGER_COLUMNS, _ledger_row
+from report_theme import get_report_theme
+from reportlab.lib.units import inch
+from reportlab.platypus import Table
+from bench_aggregation import make_transactions
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def single_table_appendix(story, transactions, theme=None):
+    """Appendix before chunking: one Table that ReportLab splits page by page"""
+    rows = [[name for name, _ in LEDGER_COLUMNS]] + [_ledger_row(i, t) for i, t in enumerate(transactions)]
+    story.append(Table(rows, colWidths=[width * inch for _, width in LEDGER_COLUMNS], repeatRows=1,
+                       style=(theme or get_report_theme()).table_styles['ledger']))
+
+
+def run(rows, single_table=False):
+    transactions = make_transactions(rows, categories=12)
+    analysis_data = {'spend_score': 72, 'total_transactions': rows, 'suggestions': [], 'filename': 'benchmark.csv'}
+    if single_table:
+        pdf_generator.add_transaction_appendix = single_table_appendix
+
+    baseline = peak_rss_mb()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'report.pdf')
+        started = time.perf_counter()
+        _, stats = generate_report_pdf_with_stats(analysis_data, transactions, 'Benchmark Co', output_path=path,
+                                                  chart_backend='reportlab', include_appendix=True)
+        seconds = time.perf_counter() - started
+        size = os.path.getsize(path)
+
+    label = 'single table' if single_table else 'chunked ledger'
+    print(f"{rows:>8,} rows  {label:<15} {stats['pages']:>6,} pages  {seconds:7.2f}s  "
+          f"{rows / seconds:9,.0f} rows/s  peak +{peak_rss_mb() - baseline:6.1f} MB  {size / 2**20:6.1f} MB pdf")
+
+
+if __name__ == "__main__":
+    single = '--single-table' in sys.argv
+    for count in [int(arg) for arg in sys.argv[1:] if not arg.startswith('--')] or [10000]:
+        run(count, single)
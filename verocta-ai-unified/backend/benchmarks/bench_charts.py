@@ -0,0 +1,76 @@
+"""
+VeroctaAI Chart Benchmark
+Report chart render time and PDF size for 300 dpi PNGs, placed-size PNGs, cached renders, SVG
+and native ReportLab charts
+
+Usage: python benchmarks/bench_charts.py [rows]
+"""
+
+import io
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib.pyplot as plt
+
+import pdf_generator
+from pdf_generator import chart_cache, generate_report_pdf, render_report_charts, summarize_report_totals
+from bench_aggregation import make_transactions
+
+placed_size_save_figure = pdf_generator._save_figure
+
+
+def legacy_save_figure(fig, placed_width):
+    """Chart output before placed-size DPI: 300 dpi regardless of where the chart is placed"""
+    img_buffer = io.BytesIO()
+    fig.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight', facecolor='white')
+    plt.close(fig)
+    img_buffer.seek(0)
+    return img_buffer
+
+
+def build_report(transactions, category_totals, backend='matplotlib'):
+    """Render charts and a full PDF; returns (chart seconds, pdf seconds, pdf bytes)"""
+    started = time.perf_counter()
+    charts = render_report_charts(transactions, category_totals, backend)
+    chart_seconds = time.perf_counter() - started
+
+    analysis_data = {'spend_score': 72, 'total_transactions': len(transactions), 'suggestions': [],
+                     'tier_info': {}, 'filename': 'benchmark.csv'}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'report.pdf')
+        started = time.perf_counter()
+        generate_report_pdf(analysis_data, transactions, 'Benchmark Co', charts=charts, output_path=path)
+        pdf_seconds = time.perf_counter() - started
+        return chart_seconds, pdf_seconds, os.path.getsize(path)
+
+
+def run(rows):
+    transactions = make_transactions(rows, categories=6)
+    category_totals, _ = summarize_report_totals(transactions)
+
+    variants = [('png @ 300 dpi (legacy)', 'png', legacy_save_figure, 'matplotlib'),
+                ('png @ placed size', 'png', placed_size_save_figure, 'matplotlib')]
+    if pdf_generator.svg2rlg is not None:
+        variants.append(('svg (vector)', 'svg', placed_size_save_figure, 'matplotlib'))
+    variants.append(('reportlab (native)', 'png', placed_size_save_figure, 'reportlab'))
+
+    print(f"{rows:,} transactions")
+    for label, chart_format, save_figure, backend in variants:
+        pdf_generator.CHART_FORMAT, pdf_generator._save_figure = chart_format, save_figure
+        for attempt in ('cold', 'cached'):
+            if attempt == 'cold':
+                chart_cache.entries.clear()
+                chart_cache.size = 0
+            chart_seconds, pdf_seconds, size = build_report(transactions, category_totals, backend)
+            print(f"  {label:<24} {attempt:<7} charts {chart_seconds * 1000:8.1f}ms  "
+                  f"pdf {pdf_seconds * 1000:8.1f}ms  {size / 1024:8.0f} KB")
+    print(f"  cache: {chart_cache.get_stats()}")
+
+
+if __name__ == "__main__":
+    for rows in [int(arg) for arg in sys.argv[1:]] or [2000]:
+        run(rows)
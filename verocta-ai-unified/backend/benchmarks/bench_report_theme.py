@@ -0,0 +1,73 @@
+"""
+VeroctaAI Report Theme Benchmark
+Per-report style setup (stylesheet, paragraph and table styles) built fresh for every report versus
+the cached report theme, alone and as part of a small end-to-end PDF render
+
+Usage: python benchmarks/bench_report_theme.py [reports]
+"""
+
+import io
+import os
+import sys
+import time
+from statistics import median
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_generator
+from pdf_generator import generate_report_pdf, render_report_charts
+from report_theme import ReportTheme, report_themes, get_report_theme
+from bench_aggregation import make_transactions
+
+
+def uncached_theme(company_name=None):
+    """Setup before the theme cache: every report builds its stylesheet, styles and table styles"""
+    return ReportTheme(report_themes.settings_for(company_name))
+
+
+def time_setup(get_theme, reports):
+    started = time.perf_counter()
+    for _ in range(reports):
+        get_theme('Benchmark Co')
+    return (time.perf_counter() - started) / reports
+
+
+def time_reports(get_theme, reports, transactions, charts):
+    """Median seconds per small report"""
+    analysis_data = {'spend_score': 72, 'total_transactions': len(transactions), 'suggestions': [],
+                     'filename': 'benchmark.csv'}
+    pdf_generator.get_report_theme = get_theme
+    try:
+        timings = []
+        for _ in range(reports):
+            started = time.perf_counter()
+            generate_report_pdf(analysis_data, transactions, 'Benchmark Co', charts=charts, output_path=io.BytesIO())
+            timings.append(time.perf_counter() - started)
+        return median(timings)
+    finally:
+        pdf_generator.get_report_theme = get_report_theme
+
+
+def run(reports):
+    transactions = make_transactions(200, categories=6)
+    charts = render_report_charts(transactions, backend='reportlab')
+    get_report_theme('Benchmark Co')  # Warm the cache and the ReportLab font tables for both variants
+
+    fresh_setup = time_setup(uncached_theme, reports)
+    cached_setup = time_setup(get_report_theme, reports)
+    print(f"{reports} reports")
+    print(f"  style setup   fresh {fresh_setup * 1e6:8.1f}us  cached {cached_setup * 1e6:8.1f}us  "
+          f"({fresh_setup / max(cached_setup, 1e-9):.0f}x)")
+
+    # Alternate the variants in rounds so drift (GC, CPU frequency) hits both alike
+    rounds = [(time_reports(uncached_theme, 10, transactions, charts),
+               time_reports(get_report_theme, 10, transactions, charts)) for _ in range(max(1, reports // 10))]
+    fresh_report = median(fresh for fresh, _ in rounds)
+    cached_report = median(cached for _, cached in rounds)
+    print(f"  small report  fresh {fresh_report * 1000:8.2f}ms  cached {cached_report * 1000:8.2f}ms  "
+          f"(saves {(fresh_report - cached_report) * 1000:.2f}ms, {(fresh_report - cached_report) / fresh_report:.1%})")
+    print(f"  themes: {report_themes.get_stats()}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
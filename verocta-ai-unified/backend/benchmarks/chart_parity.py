@@ -0,0 +1,181 @@
+"""
+VeroctaAI Chart Parity Check
+Compares what the matplotlib and ReportLab chart backends draw (slice shares, order and colors,
+bar lengths, trend points) and times both; writes both renders for side-by-side review
+
+Usage: python benchmarks/chart_parity.py [output_dir]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_generator
+from pdf_generator import chart_cache, render_report_charts
+from reportlab.lib import colors
+from reportlab.graphics import renderPDF
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.charts.barcharts import HorizontalBarChart
+from reportlab.graphics.charts.linecharts import HorizontalLineChart
+from bench_aggregation import make_transactions
+
+# Viridis is interpolated between 17 stops on the ReportLab side
+COLOR_TOLERANCE = 0.03
+SHARE_TOLERANCE = 1e-6
+
+DATASETS = {
+    'few_categories': make_transactions(1500, categories=5, seed=11),
+    'many_categories': make_transactions(1500, categories=12, seed=12),
+}
+
+matplotlib_figures = {}
+original_save_figure = pdf_generator._save_figure
+
+
+def capturing_save_figure(fig, placed_width):
+    """Record what each matplotlib chart drew before it is saved and closed"""
+    from matplotlib.patches import Wedge, Rectangle
+    from matplotlib.colors import to_hex
+
+    ax = fig.axes[0]
+    title = ax.get_title()
+    wedges = [p for p in ax.patches if isinstance(p, Wedge)]
+    if wedges:
+        matplotlib_figures[title] = {
+            'kind': 'pie',
+            'shares': [(w.theta2 - w.theta1) / 360.0 for w in wedges],
+            'colors': [to_hex(w.get_facecolor()) for w in wedges],
+            'counterclockwise': wedges[-1].theta1 >= wedges[0].theta1
+        }
+    elif ax.lines:
+        matplotlib_figures[title] = {
+            'kind': 'line',
+            'labels': [label.get_text() for label in ax.get_xticklabels()],
+            'values': [float(v) for v in ax.lines[0].get_ydata()]
+        }
+    else:
+        bars = sorted((p for p in ax.patches if isinstance(p, Rectangle)), key=lambda p: p.get_y())
+        matplotlib_figures[title] = {
+            'kind': 'bar',
+            'labels': [label.get_text() for label in ax.get_yticklabels()],
+            'values': [bar.get_width() for bar in bars],
+            'colors': [to_hex(bar.get_facecolor()) for bar in bars]
+        }
+    return original_save_figure(fig, placed_width)
+
+
+def reportlab_chart(drawing, chart_type):
+    for item in drawing.getContents():
+        if isinstance(item, chart_type):
+            return item
+    return None
+
+
+def close_colors(left, right):
+    a, b = colors.HexColor(left).rgb(), colors.HexColor(right).rgb()
+    return max(abs(x - y) for x, y in zip(a, b)) <= COLOR_TOLERANCE
+
+
+def compare_pie(expected, drawing):
+    pie = reportlab_chart(drawing, Pie)
+    if pie is None:
+        return ['ReportLab drawing has no pie']
+    total = float(sum(pie.data))
+    shares = [value / total for value in pie.data]
+    fills = [pie.slices[i].fillColor.hexval().replace('0x', '#') for i in range(len(pie.data))]
+    problems = []
+    if len(shares) != len(expected['shares']) or any(
+            abs(a - b) > SHARE_TOLERANCE for a, b in zip(shares, expected['shares'])):
+        problems.append('slice shares differ')
+    if not all(close_colors(a, b) for a, b in zip(fills, expected['colors'])):
+        problems.append(f"slice colors differ: {fills} vs {expected['colors']}")
+    if (pie.direction == 'anticlockwise') != expected['counterclockwise'] or pie.startAngle != 90:
+        problems.append('slice direction or start angle differs')
+    return problems
+
+
+def compare_bar(expected, drawing):
+    chart = reportlab_chart(drawing, HorizontalBarChart)
+    if chart is None:
+        return ['ReportLab drawing has no bar chart']
+    values = list(chart.data[0])
+    fills = [chart.bars[(0, i)].fillColor.hexval().replace('0x', '#') for i in range(len(values))]
+    problems = []
+    if chart.categoryAxis.categoryNames != expected['labels']:
+        problems.append('bar order differs')
+    if any(abs(a - b) > 1e-6 for a, b in zip(values, expected['values'])) or len(values) != len(expected['values']):
+        problems.append('bar lengths differ')
+    if not all(close_colors(a, b) for a, b in zip(fills, expected['colors'])):
+        problems.append('bar colors differ')
+    return problems
+
+
+def compare_line(expected, drawing):
+    chart = reportlab_chart(drawing, HorizontalLineChart)
+    if chart is None:
+        return ['ReportLab drawing has no line chart']
+    problems = []
+    if list(chart.categoryAxis.categoryNames) != expected['labels']:
+        problems.append('trend months differ')
+    if any(abs(a - b) > 1e-6 for a, b in zip(chart.data[0], expected['values'])):
+        problems.append('trend values differ')
+    return problems
+
+
+def timed_render(transactions, backend):
+    chart_cache.entries.clear()
+    chart_cache.size = 0
+    started = time.perf_counter()
+    charts = render_report_charts(transactions, backend=backend)
+    return charts, time.perf_counter() - started
+
+
+def run(output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"matplotlib loaded by importing pdf_generator: {'matplotlib' in sys.modules}")
+    pdf_generator._save_figure = capturing_save_figure
+    failures = 0
+
+    for name, transactions in DATASETS.items():
+        matplotlib_figures.clear()
+        started = time.perf_counter()
+        import_was_lazy = pdf_generator.plt is None
+        mpl_charts, _ = timed_render(transactions, 'matplotlib')
+        first_render = time.perf_counter() - started
+        rl_charts, rl_seconds = timed_render(transactions, 'reportlab')
+        note = ' (includes matplotlib import)' if import_was_lazy else ''
+        print(f"{name}: matplotlib {first_render * 1000:.0f}ms{note}, reportlab {rl_seconds * 1000:.0f}ms")
+
+        checks = {
+            'clean_pie': ('Clean Spending Breakdown', compare_pie),
+            'breakdown': ('Comprehensive Spending Breakdown', None),
+            'trend': ('Monthly Spending Patterns', compare_line),
+        }
+        for chart_name, (title, compare) in checks.items():
+            expected = matplotlib_figures.get(title)
+            drawing = rl_charts.get(chart_name)
+            if expected is None or drawing is None:
+                problems = [] if (expected is None) == (drawing is None) else ['only one backend drew this chart']
+            else:
+                compare = compare or {'pie': compare_pie, 'bar': compare_bar}[expected['kind']]
+                problems = compare(expected, drawing)
+            failures += bool(problems)
+            print(f"  {'✅' if not problems else '❌'} {chart_name}: {'; '.join(problems) or 'matches'}")
+
+            if drawing is not None:
+                renderPDF.drawToFile(drawing, os.path.join(output_dir, f'{name}_{chart_name}_reportlab.pdf'))
+            if mpl_charts.get(chart_name) is not None:
+                with open(os.path.join(output_dir, f'{name}_{chart_name}_matplotlib.png'), 'wb') as f:
+                    f.write(mpl_charts[chart_name].getvalue())
+
+    pdf_generator._save_figure = original_save_figure
+    print(f"Renders written to {output_dir}")
+    return failures
+
+
+if __name__ == "__main__":
+    output = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'outputs', 'chart_parity')
+    sys.exit(1 if run(output) else 0)
@@ -0,0 +1,228 @@
+"""
+VeroctaAI Budget Definitions
+Per-company, per-category monthly budgets and period-by-category adherence scoring
+"""
+
+import os
+import json
+import math
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Any
+
+import pandas as pd
+
+from table_store import table_lock, table_mtime, write_table
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+BUDGETS_PATH = os.environ.get('BUDGETS_PATH', os.path.join(basedir, 'data', 'budgets.json'))
+
+
+def _company_key(company: Optional[str]) -> str:
+    return (company or '').strip().lower()
+
+
+def _category_key(category: Optional[str]) -> str:
+    return (category or 'Uncategorized').strip().lower()
+
+
+class Budget:
+    def __init__(self, company: str, category: str, monthly_limit: float):
+        self.company = company
+        self.category = category
+        self.monthly_limit = float(monthly_limit)
+        self.created_at = datetime.now()
+        self.updated_at = datetime.now()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'company': self.company,
+            'category': self.category,
+            'monthly_limit': self.monthly_limit,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Budget':
+        budget = cls(data['company'], data['category'], data['monthly_limit'])
+        budget.created_at = datetime.fromisoformat(data['created_at'])
+        budget.updated_at = datetime.fromisoformat(data['updated_at'])
+        return budget
+
+
+class BudgetStore:
+    """
+    Company -> category budgets in a JSON table on disk, so every worker sees the same budgets
+    Reloaded when the file changes; writes are serialized across processes with a file lock
+    """
+
+    def __init__(self, path: str = BUDGETS_PATH):
+        self.path = path
+        self.table: Dict[str, Dict[str, Budget]] = {}
+        self.mtime: Optional[float] = None
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def _refresh(self, force: bool = False):
+        mtime = table_mtime(self.path)
+        if force or not self.loaded or mtime != self.mtime:
+            self.table = self._load()
+            self.mtime, self.loaded = mtime, True
+
+    def _load(self) -> Dict[str, Dict[str, Budget]]:
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            return {company: {_category_key(item['category']): Budget.from_dict(item) for item in items}
+                    for company, items in data.items()}
+        except FileNotFoundError:
+            return {}
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            logging.error(f"Invalid budget table {self.path}: {str(e)}")
+            return {}
+
+    def _save(self):
+        write_table(self.path, {company: [budget.to_dict() for budget in budgets.values()]
+                                for company, budgets in self.table.items() if budgets})
+        self.mtime = table_mtime(self.path)
+
+    def get(self, company: Optional[str]) -> List[Budget]:
+        with self._lock:
+            self._refresh()
+            return list(self.table.get(_company_key(company), {}).values())
+
+    def modify(self, company: str, change: Callable[[Dict[str, Budget]], Any]) -> Any:
+        """Apply change(company_budgets) to the latest table on disk and save it"""
+        with self._lock, table_lock(self.path):
+            self._refresh(force=True)
+            company_budgets = self.table.setdefault(_company_key(company), {})
+            result = change(company_budgets)
+            self._save()
+            return result
+
+
+budget_store = BudgetStore()
+
+
+def _set(company_budgets: Dict[str, Budget], company: str, category: str, monthly_limit: float) -> Budget:
+    existing = company_budgets.get(_category_key(category))
+    if existing:
+        existing.monthly_limit = float(monthly_limit)
+        existing.category = category
+        existing.updated_at = datetime.now()
+        return existing
+
+    budget = Budget(company, category, monthly_limit)
+    company_budgets[_category_key(category)] = budget
+    return budget
+
+
+def _check_limit(category: str, monthly_limit: Any) -> float:
+    """A monthly limit as a positive, finite number (JSON bodies may carry NaN or Infinity)"""
+    limit = float(monthly_limit)
+    if not math.isfinite(limit) or limit <= 0:
+        raise ValueError(f"Budget for {category} must be a positive number")
+    return limit
+
+
+def set_budget(company: str, category: str, monthly_limit: float) -> Budget:
+    """Create or update a category budget for a company"""
+    monthly_limit = _check_limit(category, monthly_limit)
+    return budget_store.modify(company, lambda budgets: _set(budgets, company, category, monthly_limit))
+
+
+def replace_budgets(company: str, limits: Dict[str, float]) -> List[Budget]:
+    """Replace all budgets for a company"""
+    limits = {category: _check_limit(category, limit) for category, limit in limits.items()}
+
+    def replace(company_budgets):
+        company_budgets.clear()
+        return [_set(company_budgets, company, category, limit) for category, limit in limits.items()]
+    return budget_store.modify(company, replace)
+
+
+def get_budgets_for_company(company: Optional[str]) -> List[Budget]:
+    """Get all budgets for a company; callers pass the authenticated user's company"""
+    return budget_store.get(company)
+
+
+def delete_budget(company: str, category: str) -> bool:
+    """Delete a single category budget"""
+    return budget_store.modify(company, lambda budgets: budgets.pop(_category_key(category), None) is not None)
+
+
+def aggregate_period_spend(transactions: List[Dict[str, Any]], freq: str = 'M') -> pd.Series:
+    """Pre-aggregate spend into a (period, category) series in one grouped pass"""
+    frame = pd.DataFrame({
+        'date': pd.to_datetime([t.get('date') for t in transactions], errors='coerce'),
+        'category': [_category_key(t.get('category')) for t in transactions],
+        'amount': [float(t.get('amount', 0)) for t in transactions]
+    }).dropna(subset=['date'])
+
+    if frame.empty:
+        return pd.Series(dtype=float)
+
+    frame['period'] = frame['date'].dt.to_period(freq)
+    return frame.groupby(['period', 'category'])['amount'].sum()
+
+
+def calculate_budget_adherence(transactions: List[Dict[str, Any]],
+                               budgets: List[Budget],
+                               period_spend: Optional[pd.Series] = None) -> Optional[Dict[str, Any]]:
+    """
+    Score actual spend against budgets for every (month, budgeted category) cell
+    Returns None when there is nothing dated or budgeted to compare
+    """
+    if not budgets:
+        return None
+
+    if period_spend is None:
+        period_spend = aggregate_period_spend(transactions)
+    if period_spend.empty:
+        return None
+
+    limits = pd.Series(
+        {_category_key(b.category): b.monthly_limit for b in budgets}, name='limit'
+    )
+    display_names = {_category_key(b.category): b.category for b in budgets}
+
+    # Full period x budgeted-category grid so months with no spend count as on-budget
+    periods = period_spend.index.get_level_values('period').unique().sort_values()
+    grid = pd.MultiIndex.from_product([periods, limits.index], names=['period', 'category'])
+    cells = period_spend.reindex(grid, fill_value=0.0).to_frame('spent')
+    cells['limit'] = limits.reindex(cells.index.get_level_values('category')).values
+    cells['ratio'] = cells['spent'] / cells['limit']
+
+    # Full marks up to the limit, linearly down to zero at double the limit
+    cells['score'] = (100 * (2 - cells['ratio'])).clip(lower=0, upper=100)
+
+    over = cells[cells['ratio'] > 1].reset_index()
+    over_budget = [
+        {
+            'period': str(row.period),
+            'category': display_names.get(row.category, row.category),
+            'spent': round(row.spent, 2),
+            'limit': round(row.limit, 2),
+            'overspend': round(row.spent - row.limit, 2)
+        }
+        for row in over.sort_values('ratio', ascending=False).itertuples(index=False)
+    ]
+
+    by_category = cells.groupby(level='category')[['spent', 'limit']].sum()
+    return {
+        'score': float(cells['score'].mean()),
+        'periods': len(periods),
+        'budgeted_categories': len(limits),
+        'cells_checked': len(cells),
+        'cells_over_budget': len(over_budget),
+        'over_budget': over_budget[:20],
+        'category_totals': {
+            display_names.get(category, category): {
+                'spent': round(row.spent, 2),
+                'budget': round(row.limit, 2)
+            }
+            for category, row in by_category.iterrows()
+        }
+    }
@@ -0,0 +1,199 @@
+"""
+VeroctaAI Auto-Categorization Engine
+Labels uncategorized transactions from vendor/description text with one compiled regex
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+CATEGORY_RULES_PATH = os.environ.get(
+    'CATEGORY_RULES_PATH', os.path.join(basedir, 'data', 'category_rules.json')
+)
+
+# Category labels treated as "no category" by the parser
+UNCATEGORIZED_LABELS = {'', 'uncategorized', 'unknown', 'nan', 'none'}
+
+
+def load_category_rules(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Load ordered categorization rules"""
+    path = path or CATEGORY_RULES_PATH
+    try:
+        with open(path, 'r') as f:
+            rules = json.load(f)
+        return [rule for rule in rules if isinstance(rule, dict) and rule.get('category')]
+    except FileNotFoundError:
+        logging.warning(f"Category rules not found at {path}, auto-categorization disabled")
+        return []
+    except ValueError as e:
+        logging.error(f"Invalid category rules file {path}: {str(e)}")
+        return []
+
+
+def _trie_pattern(words) -> str:
+    """Fold keywords into a character trie regex so each position tries one branch per letter"""
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [
+            (r'\s+' if char == ' ' else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ''
+        if len(branches) == 1 and '' not in node:
+            return branches[0]
+        body = '(?:' + '|'.join(branches) + ')'
+        # Greedy optional: prefer the longer keyword, fall back to the shorter one
+        return body + '?' if '' in node else body
+
+    return build(trie)
+
+
+class CategoryRuleEngine:
+    """Compiles keyword and regex rules into a single regex and labels rows in bulk"""
+
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None):
+        self.rules = rules or []
+        self._group_rules: Dict[str, Tuple[str, str]] = {}
+        self._keyword_rules: Dict[str, Tuple[str, str]] = {}
+        # Each keyword trie and rule pattern on its own, to compare them all at every position the combined regex matches
+        self._alternatives: List[Tuple[re.Pattern, str]] = []
+        self.pattern = self._compile()
+
+    def _compile(self) -> Optional[re.Pattern]:
+        """Build one regex: a keyword trie alternation followed by named regex rules"""
+        alternatives = []
+        self._alternatives = []
+        for index, rule in enumerate(self.rules):
+            rule_name = rule.get('name', rule['category'])
+            for keyword in rule.get('keywords', []):
+                # First rule listing a keyword owns it
+                self._keyword_rules.setdefault(' '.join(keyword.lower().split()), (rule['category'], rule_name))
+
+            patterns = []
+            for regex in rule.get('patterns', []):
+                try:
+                    re.compile(regex)
+                except re.error as e:
+                    logging.warning(f"Skipping invalid category pattern {regex!r}: {str(e)}")
+                    continue
+                patterns.append(f'(?:{regex})')
+
+            if patterns:
+                group_name = f'r{index}'
+                self._group_rules[group_name] = (rule['category'], rule_name)
+                self._alternatives.extend((re.compile(regex, re.IGNORECASE), group_name) for regex in patterns)
+                # Longer patterns first, so the combined regex tends to stop at the longer match
+                patterns.sort(key=len, reverse=True)
+                alternatives.append(f"(?P<{group_name}>{'|'.join(patterns)})")
+
+        if self._keyword_rules:
+            keywords = rf"(?P<kw>\b{_trie_pattern(self._keyword_rules)}\b)"
+            alternatives.insert(0, keywords)
+            self._alternatives.insert(0, (re.compile(keywords, re.IGNORECASE), 'kw'))
+
+        if not alternatives:
+            return None
+        return re.compile('|'.join(alternatives), re.IGNORECASE)
+
+    def match(self, text: str) -> Optional[Tuple[str, str]]:
+        """
+        Return (category, rule name) for the longest match in text, the earliest on ties
+        The combined regex finds where rules match; every keyword and pattern is then tried at each of those
+        positions, since alternation alone would stop at the first branch (keywords before patterns)
+        The scan resumes one character after each match start rather than at its end, so a longer match
+        starting inside a shorter one (e.g. 'depot parking garage' inside 'home depot ...') is not skipped
+        """
+        if not self.pattern or not text:
+            return None
+        best = None
+        found = self.pattern.search(text)
+        while found:
+            for alternative, group_name in self._alternatives:
+                candidate = alternative.match(text, found.start())
+                if candidate and (best is None or len(candidate.group()) > len(best[0])):
+                    best = (candidate.group(), group_name)
+            found = self.pattern.search(text, found.start() + 1)
+        if best is None:
+            return None
+        matched, group_name = best
+        if group_name == 'kw':
+            return self._keyword_rules.get(' '.join(matched.lower().split()))
+        return self._group_rules.get(group_name)
+
+    def categorize_transactions(self, transactions: List[Dict[str, Any]],
+                                overwrite: bool = False) -> Dict[str, Any]:
+        """Label uncategorized transactions in place and return rule hit statistics"""
+        rule_hits = Counter()
+        memo: Dict[str, Optional[Tuple[str, str]]] = {}
+        labeled = 0
+        unmatched = 0
+
+        for transaction in transactions:
+            category = str(transaction.get('category') or '').strip()
+            if not overwrite and category.lower() not in UNCATEGORIZED_LABELS:
+                continue
+
+            text = ' '.join(filter(None, (
+                str(transaction.get('vendor') or ''),
+                str(transaction.get('raw_vendor') or ''),
+                str(transaction.get('description') or '')
+            )))
+
+            if text in memo:
+                result = memo[text]
+            else:
+                result = memo[text] = self.match(text)
+
+            if result is None:
+                unmatched += 1
+                continue
+
+            transaction['category'] = result[0]
+            transaction['category_source'] = 'rule'
+            rule_hits[result[1]] += 1
+            labeled += 1
+
+        stats = {
+            'labeled': labeled,
+            'unmatched': unmatched,
+            'rule_hits': dict(rule_hits.most_common())
+        }
+        logging.info(f"Auto-categorization: {labeled} labeled, {unmatched} unmatched")
+        return stats
+
+
+_engine: Optional[CategoryRuleEngine] = None
+_engine_mtime: Optional[float] = None
+_engine_lock = threading.Lock()
+
+
+def get_category_engine() -> CategoryRuleEngine:
+    """Get the process-wide rule engine, recompiled when the rules file changes"""
+    global _engine, _engine_mtime
+    try:
+        mtime = os.path.getmtime(CATEGORY_RULES_PATH)
+    except OSError:
+        mtime = None
+
+    with _engine_lock:
+        if _engine is None or mtime != _engine_mtime:
+            _engine = CategoryRuleEngine(load_category_rules())
+            _engine_mtime = mtime
+        return _engine
+
+
+def categorize_transactions(transactions: List[Dict[str, Any]], overwrite: bool = False) -> Dict[str, Any]:
+    """Main function to auto-categorize parsed transactions before scoring"""
+    return get_category_engine().categorize_transactions(transactions, overwrite)
@@ -2,6 +2,7 @@ import pandas as pd
 import logging
 from datetime import datetime
 import re
+from currency import detect_currency_from_header, detect_currency_from_value, normalize_currency_code
 
 # Enhanced header mapping for different CSV formats from various platforms
 HEADER_MAPPINGS = {
@@ -28,6 +29,9 @@ HEADER_MAPPINGS = {
     'description': [
         'details', 'memo', 'notes', 'comment', 'reference', 'memo description',
         'transaction details', 'payment details', 'additional info', 'remarks'
+    ],
+    'currency': [
+        'ccy', 'currency code', 'transaction currency', 'original currency', 'iso currency'
     ]
 }
 
@@ -88,8 +92,9 @@ def clean_amount_value(value):
     # Convert to string and clean
     str_value = str(value).strip()
     
-    # Remove currency symbols and whitespace
-    str_value = re.sub(r'[£$€¥₹,\s]', '', str_value)
+    # Remove currency symbols (including prefixed ones like C$), ISO codes and whitespace
+    str_value = re.sub(r'[A-Za-z]*[£$€¥₹]|[,\s]', '', str_value)
+    str_value = re.sub(r'^[A-Za-z]{3}|[A-Za-z]{3}$', '', str_value)
     
     # Handle parentheses (negative values)
     if str_value.startswith('(') and str_value.endswith(')'):
@@ -162,12 +167,16 @@ def parse_csv_file(filepath):
         date_col = find_matching_column(df.columns, 'date')
         category_col = find_matching_column(df.columns, 'category')
         description_col = find_matching_column(df.columns, 'description')
+        currency_col = find_matching_column(df.columns, 'currency')
         
-        logging.info(f"Column mapping - Vendor: {vendor_col}, Amount: {amount_col}, Date: {date_col}, Category: {category_col}")
+        logging.info(f"Column mapping - Vendor: {vendor_col}, Amount: {amount_col}, Date: {date_col}, Category: {category_col}, Currency: {currency_col}")
         
         if not amount_col:
             raise ValueError("Could not find amount column in CSV file")
         
+        # Column-level currency, e.g. 'Amount (USD)' or 'Paid Out (GBP)'
+        header_currency = detect_currency_from_header(amount_col)
+        
         transactions = []
         
         for index, row in df.iterrows():
@@ -179,12 +188,17 @@ def parse_csv_file(filepath):
                 if abs(amount) < 0.01:
                     continue
                 
+                # Row-level currency: explicit column, then amount symbol, then header
+                currency = normalize_currency_code(row[currency_col]) if currency_col is not None else None
+                currency = currency or detect_currency_from_value(row[amount_col]) or header_currency
+                
                 transaction = {
                     'amount': abs(amount),  # Use absolute value for spend analysis
                     'vendor': str(row[vendor_col]).strip() if vendor_col is not None and pd.notna(row[vendor_col]) else 'Unknown Vendor',
                     'date': parse_date_value(row[date_col]) if date_col is not None else None,
                     'category': str(row[category_col]).strip() if category_col is not None and pd.notna(row[category_col]) else 'Uncategorized',
-                    'description': str(row[description_col]).strip() if description_col is not None and pd.notna(row[description_col]) else ''
+                    'description': str(row[description_col]).strip() if description_col is not None and pd.notna(row[description_col]) else '',
+                    'currency': currency
                 }
                 
                 transactions.append(transaction)
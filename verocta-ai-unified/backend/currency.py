@@ -0,0 +1,240 @@
+"""
+VeroctaAI Currency Normalization
+Detects transaction currencies and converts amounts to a reporting currency
+using a locally loaded daily FX rate table
+"""
+
+import os
+import re
+import logging
+import threading
+from typing import List, Dict, Any, Optional
+
+import pandas as pd
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+# Rate table: CSV with columns date,currency,rate where rate is the value of
+# one unit of `currency` expressed in FX_BASE_CURRENCY on that date
+FX_RATES_PATH = os.environ.get('FX_RATES_PATH', os.path.join(basedir, 'data', 'fx_rates.csv'))
+FX_BASE_CURRENCY = os.environ.get('FX_BASE_CURRENCY', 'USD').upper()
+DEFAULT_REPORTING_CURRENCY = os.environ.get('REPORTING_CURRENCY', 'USD').upper()
+# Rows with no rate within this many days of their date stay unconverted (0 accepts any distance)
+# The default covers one missed update of a monthly rate table
+FX_MAX_STALENESS_DAYS = float(os.environ.get('FX_MAX_STALENESS_DAYS', '35'))
+
+ISO_CURRENCIES = {
+    'USD', 'GBP', 'EUR', 'JPY', 'INR', 'CAD', 'AUD', 'CHF', 'CNY', 'SEK',
+    'NOK', 'DKK', 'NZD', 'SGD', 'HKD', 'ZAR', 'MXN', 'BRL', 'PLN', 'AED'
+}
+
+HEADER_CURRENCY_WORDS = {
+    'DOLLAR': 'USD', 'DOLLARS': 'USD', 'POUND': 'GBP', 'POUNDS': 'GBP',
+    'STERLING': 'GBP', 'EURO': 'EUR', 'EUROS': 'EUR', 'YEN': 'JPY', 'RUPEE': 'INR'
+}
+
+# Multi-character symbols are checked before the bare '$'
+CURRENCY_SYMBOLS = [
+    ('US$', 'USD'), ('C$', 'CAD'), ('A$', 'AUD'), ('NZ$', 'NZD'), ('HK$', 'HKD'),
+    ('S$', 'SGD'), ('£', 'GBP'), ('€', 'EUR'), ('¥', 'JPY'), ('₹', 'INR'), ('$', 'USD')
+]
+
+HEADER_TOKEN_PATTERN = re.compile(r'[A-Z]+')
+
+
+def detect_currency_from_header(header: Optional[str]) -> Optional[str]:
+    """Detect an ISO currency code from a column header like 'Amount (GBP)'"""
+    if not header:
+        return None
+    for token in HEADER_TOKEN_PATTERN.findall(str(header).upper()):
+        if token in ISO_CURRENCIES:
+            return token
+        if token in HEADER_CURRENCY_WORDS:
+            return HEADER_CURRENCY_WORDS[token]
+    return None
+
+
+def detect_currency_from_value(value: Any) -> Optional[str]:
+    """Detect a currency from a raw amount string (symbol or ISO code)"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    str_value = str(value).strip()
+    if not str_value or str_value[-1:].isdigit() and str_value[:1].isdigit():
+        return None
+
+    for symbol, code in CURRENCY_SYMBOLS:
+        if symbol in str_value:
+            return code
+
+    for token in HEADER_TOKEN_PATTERN.findall(str_value.upper()):
+        if token in ISO_CURRENCIES:
+            return token
+    return None
+
+
+def normalize_currency_code(value: Any) -> Optional[str]:
+    """Normalize a currency column cell to an ISO code"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    str_value = str(value).strip().upper()
+    if str_value in ISO_CURRENCIES:
+        return str_value
+    return detect_currency_from_value(str_value) or detect_currency_from_header(str_value)
+
+
+_rates_cache: Dict[str, Any] = {'path': None, 'mtime': None, 'table': None}
+_rates_lock = threading.Lock()
+
+
+def load_fx_rates(path: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """Load the FX rate table, cached between requests and reloaded when the file changes"""
+    path = path or FX_RATES_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    with _rates_lock:
+        if _rates_cache['path'] == path and _rates_cache['mtime'] == mtime:
+            return _rates_cache['table']
+
+        try:
+            table = pd.read_csv(path)
+            table.columns = [str(col).strip().lower() for col in table.columns]
+            table = table[['date', 'currency', 'rate']].dropna()
+            table['date'] = pd.to_datetime(table['date'])
+            table['currency'] = table['currency'].astype(str).str.strip().str.upper()
+            table['rate'] = table['rate'].astype(float)
+
+            # The base currency is always worth exactly one base unit
+            if FX_BASE_CURRENCY not in set(table['currency']):
+                base_rows = pd.DataFrame({
+                    'date': table['date'].drop_duplicates(),
+                    'currency': FX_BASE_CURRENCY,
+                    'rate': 1.0
+                })
+                table = pd.concat([table, base_rows], ignore_index=True)
+
+            table = table.sort_values('date').reset_index(drop=True)
+            logging.info(f"Loaded {len(table)} FX rates from {path}")
+        except Exception as e:
+            logging.error(f"Could not load FX rate table {path}: {str(e)}")
+            table = None
+
+        _rates_cache.update({'path': path, 'mtime': mtime, 'table': table})
+        return table
+
+
+def check_fx_rates(path: Optional[str] = None) -> bool:
+    """Log once at startup when the rate table is missing or unreadable; foreign rows would stay unconverted"""
+    path = path or FX_RATES_PATH
+    if load_fx_rates(path) is None:
+        logging.error(f"FX rate table {path} is missing or invalid; non-{FX_BASE_CURRENCY} amounts will not be converted")
+        return False
+    return True
+
+
+def _join_rates(frame: pd.DataFrame, rates: pd.DataFrame, currency_column: str, rate_column: str,
+                max_staleness_days: float = FX_MAX_STALENESS_DAYS) -> pd.DataFrame:
+    """
+    As-of join each row to the latest rate on or before its date, falling back to the next one;
+    rates further than max_staleness_days from the row's date are not used
+    Adds '<rate_column>_forward', True where the row got the next (later) rate
+    """
+    lookup = rates.rename(columns={'currency': currency_column, 'rate': rate_column})
+    tolerance = pd.Timedelta(days=max_staleness_days) if max_staleness_days > 0 else None
+    frame = frame.sort_values('lookup_date')
+    joined = pd.merge_asof(frame, lookup, left_on='lookup_date', right_on='date',
+                           by=currency_column, direction='backward', tolerance=tolerance).drop(columns='date')
+
+    missing = joined[rate_column].isna()
+    joined[f'{rate_column}_forward'] = False
+    if missing.any():
+        forward = pd.merge_asof(frame[missing.values], lookup, left_on='lookup_date', right_on='date',
+                                by=currency_column, direction='forward', tolerance=tolerance)
+        joined.loc[missing.values, rate_column] = forward[rate_column].values
+        joined.loc[missing.values, f'{rate_column}_forward'] = forward[rate_column].notna().values
+    return joined
+
+
+def normalize_currency(transactions: List[Dict[str, Any]],
+                       reporting_currency: Optional[str] = None,
+                       rates: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """Convert transaction amounts in place to the reporting currency"""
+    if not reporting_currency:
+        # Default to the file's dominant currency so single-currency files are never converted
+        detected = pd.Series([t.get('currency') for t in transactions], dtype=object).dropna()
+        reporting_currency = detected.mode().iloc[0] if not detected.empty else DEFAULT_REPORTING_CURRENCY
+    reporting_currency = reporting_currency.upper()
+    stats = {
+        'reporting_currency': reporting_currency,
+        'currencies': {},
+        'converted': 0,
+        'forward_rate': 0,  # converted with the next later rate (none on or before the row's date)
+        'unconverted': 0,
+        'stale': 0          # unconverted because the nearest rate is more than FX_MAX_STALENESS_DAYS away
+    }
+    if not transactions:
+        return stats
+
+    frame = pd.DataFrame({
+        'row': range(len(transactions)),
+        'amount': [float(t.get('amount', 0)) for t in transactions],
+        'currency': [t.get('currency') or reporting_currency for t in transactions],
+        'lookup_date': pd.to_datetime([t.get('date') for t in transactions], errors='coerce')
+    })
+    stats['currencies'] = frame['currency'].value_counts().to_dict()
+
+    foreign = frame['currency'] != reporting_currency
+    if not foreign.any():
+        for transaction in transactions:
+            transaction['currency'] = reporting_currency
+        return stats
+
+    if rates is None:
+        rates = load_fx_rates()
+    if rates is None or rates.empty:
+        logging.warning(f"No FX rate table available; {int(foreign.sum())} foreign-currency rows left unconverted")
+        stats['unconverted'] = int(foreign.sum())
+        return stats
+
+    # Undated rows use the most recent rate in the table
+    frame['lookup_date'] = frame['lookup_date'].fillna(rates['date'].max())
+    frame['target'] = reporting_currency
+
+    joined = _join_rates(frame, rates, 'currency', 'source_rate')
+    joined = _join_rates(joined, rates, 'target', 'target_rate')
+    joined = joined.sort_values('row').reset_index(drop=True)
+
+    joined['converted'] = joined['amount'] * joined['source_rate'] / joined['target_rate']
+    convertible = joined['converted'].notna() & (joined['currency'] != reporting_currency)
+    unconvertible = joined['converted'].isna() & (joined['currency'] != reporting_currency)
+
+    for row in joined.loc[convertible, ['row', 'converted', 'currency', 'amount']].itertuples(index=False):
+        transaction = transactions[row.row]
+        transaction['original_amount'] = row.amount
+        transaction['original_currency'] = row.currency
+        transaction['amount'] = round(row.converted, 2)
+        transaction['currency'] = reporting_currency
+
+    for row_index in joined.loc[~convertible & ~unconvertible, 'row']:
+        transactions[row_index]['currency'] = reporting_currency
+
+    known = set(rates['currency'])
+    forward = convertible & (joined['source_rate_forward'] | joined['target_rate_forward'])
+    stale = unconvertible & joined['currency'].isin(known) & (reporting_currency in known)
+
+    stats['converted'] = int(convertible.sum())
+    stats['forward_rate'] = int(forward.sum())
+    stats['unconverted'] = int(unconvertible.sum())
+    stats['stale'] = int(stale.sum())
+    if stats['forward_rate']:
+        logging.warning(f"{stats['forward_rate']} rows predate the FX rate table and used the next available rate")
+    if stats['stale']:
+        logging.warning(f"No FX rate within {FX_MAX_STALENESS_DAYS:g} days for {stats['stale']} rows; left unconverted")
+    if stats['unconverted'] > stats['stale']:
+        missing = sorted(set(joined.loc[unconvertible & ~stale, 'currency']))
+        logging.warning(f"No FX rates for {missing}; {stats['unconverted'] - stats['stale']} rows left unconverted")
+
+    logging.info(f"Currency normalization to {reporting_currency}: {stats['converted']} rows converted")
+    return stats
@@ -1,174 +1,123 @@
 import json
 import os
 import logging
-from openai import OpenAI
+from insight_cache import insight_cache, prompt_fingerprint
+from prompt_templates import get_prompt_template
+from transaction_aggregates import TransactionAggregates
+from prompt_builder import build_insight_messages, build_transaction_summary, PROMPT_TOKEN_BUDGET
+from resilient_client import build_openai_client, CircuitOpenError
+from rule_insights import generate_rule_based_insights
 
 # Initialize OpenAI client
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     logging.error("OPENAI_API_KEY environment variable not set")
 
-openai_client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+# Deadlines, retries and circuit breaking are handled by the wrapper
+openai_client = build_openai_client(OPENAI_API_KEY)
+
+# the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+# do not change this unless explicitly requested by the user
+INSIGHT_MODEL = "gpt-4o"
+INSIGHT_SYSTEM_PROMPT = "You are an expert financial advisor specializing in business expense optimization. Provide specific, actionable insights based on real transaction data."
+INSIGHT_MAX_TOKENS = 1000
+INSIGHT_TEMPERATURE = 0.7
+
+# 'rules' (the default) answers from the local rule engine without calling the API;
+# 'gpt' enriches with GPT and falls back to rules
+INSIGHT_MODE = os.environ.get('INSIGHT_MODE', 'rules').strip().lower()
 
 def load_prompt_template():
-    """Load the GPT prompt template"""
-    try:
-        with open('prompts/insight_prompt_v2.txt', 'r') as f:
-            return f.read()
-    except FileNotFoundError:
-        # Fallback prompt if file doesn't exist
-        return """
-        You are a financial advisor analyzing business expense data. 
-        Based on the transaction data provided, generate exactly 3 actionable suggestions 
-        to reduce unnecessary expenses or optimize spending.
-        
-        Each suggestion should have:
-        - A priority level: "High", "Medium", or "Low"
-        - Specific, actionable text (not vague summaries)
-        - Business-aware language appropriate for a financial platform
-        
-        Return your response as JSON in this exact format:
-        {
-            "suggestions": [
-                {"priority": "High", "text": "Specific actionable suggestion"},
-                {"priority": "Medium", "text": "Specific actionable suggestion"},
-                {"priority": "Low", "text": "Specific actionable suggestion"}
-            ]
-        }
-        
-        Focus on identifying patterns, unusual expenses, potential savings opportunities, 
-        and vendor optimization based on the actual data provided.
-        """
+    """Load the GPT prompt template (cached, reloaded when the file changes)"""
+    return get_prompt_template().text
 
-def format_transactions_for_gpt(transactions):
-    """Enhanced format transaction data for GPT analysis with detailed insights"""
+def format_transactions_for_gpt(transactions, aggregates=None, token_budget=None):
+    """Enhanced format transaction data for GPT analysis, optionally fitted to a token budget"""
     if not transactions:
         return "No transaction data available."
     
-    # Create comprehensive statistics
-    total_amount = sum(t['amount'] for t in transactions)
-    avg_amount = total_amount / len(transactions)
-    
-    # Enhanced breakdowns
-    categories = {}
-    vendors = {}
-    vendor_frequency = {}
-    monthly_patterns = {}
-    
-    for transaction in transactions:
-        category = transaction.get('category', 'Uncategorized')
-        vendor = transaction.get('vendor', 'Unknown')
-        amount = transaction.get('amount', 0)
-        date = transaction.get('date')
-        
-        # Category and vendor tracking
-        categories[category] = categories.get(category, 0) + amount
-        vendors[vendor] = vendors.get(vendor, 0) + amount
-        vendor_frequency[vendor] = vendor_frequency.get(vendor, 0) + 1
-        
-        # Monthly pattern analysis
-        if date:
-            month_key = date.strftime('%Y-%m') if hasattr(date, 'strftime') else str(date)[:7]
-            monthly_patterns[month_key] = monthly_patterns.get(month_key, 0) + amount
-    
-    # Sort by amount and identify patterns
-    top_categories = sorted(categories.items(), key=lambda x: x[1], reverse=True)[:10]
-    top_vendors = sorted(vendors.items(), key=lambda x: x[1], reverse=True)[:15]
-    frequent_vendors = sorted(vendor_frequency.items(), key=lambda x: x[1], reverse=True)[:10]
-    
-    # Identify recurring subscriptions (vendors with regular amounts)
-    likely_subscriptions = []
-    for vendor, total_spent in top_vendors[:10]:
-        frequency = vendor_frequency.get(vendor, 0)
-        if frequency >= 2:  # Appears multiple times
-            avg_per_transaction = total_spent / frequency
-            likely_subscriptions.append((vendor, total_spent, frequency, avg_per_transaction))
-    
-    # Format enhanced data for GPT
-    formatted_data = f"""
-    ENHANCED FINANCIAL DATA ANALYSIS REQUEST
-    
-    Executive Summary:
-    - Total Transactions: {len(transactions):,}
-    - Total Amount: ${total_amount:,.2f}
-    - Average Transaction: ${avg_amount:,.2f}
-    - Unique Vendors: {len(vendors)}
-    - Unique Categories: {len(categories)}
-    
-    Top Spending Categories (with optimization potential):
+    # Reuse the upload's precomputed totals so prompt building never rescans rows
+    aggregates = aggregates or TransactionAggregates(transactions)
+    formatted_data, _ = build_transaction_summary(aggregates, INSIGHT_MODEL, token_budget)
+    return formatted_data
+
+def generate_financial_insights(transactions, client=None, cache=None, aggregates=None, budget_report=None):
+    """Generate AI-powered financial insights using GPT-4o, served from the insight cache when possible"""
+    suggestions, _ = generate_financial_insights_with_usage(transactions, client, cache, aggregates,
+                                                            budget_report=budget_report)
+    return suggestions
+
+def build_insight_request(aggregates, token_budget=PROMPT_TOKEN_BUDGET):
+    """Budgeted chat messages, prompt fingerprint and token report for one insight request"""
+    template = get_prompt_template()
+    
+    # Fit the transaction summary to the input token budget
+    messages, transaction_data, token_report = build_insight_messages(
+        aggregates, INSIGHT_MODEL, INSIGHT_SYSTEM_PROMPT, template.text, token_budget
+    )
+    cache_key = prompt_fingerprint(
+        INSIGHT_MODEL, INSIGHT_SYSTEM_PROMPT, template.text, transaction_data,
+        max_tokens=INSIGHT_MAX_TOKENS, temperature=INSIGHT_TEMPERATURE, prompt_version=template.version
+    )
+    token_report['prompt_version'] = template.version
+    return messages, cache_key, token_report
+
+def _rule_fallback(transactions, aggregates, budget_report, usage, reason):
+    """Computed rule-based insights in place of GPT output"""
+    usage.update({'source': 'rules', 'fallback': reason})
+    return generate_rule_based_insights(transactions, aggregates, budget_report), usage
+
+def generate_financial_insights_with_usage(transactions, client=None, cache=None, aggregates=None,
+                                           token_budget=PROMPT_TOKEN_BUDGET, mode=None, budget_report=None):
     """
+    Generate insights and report prompt token counts for the request
+    In 'rules' mode (or whenever GPT is unavailable) the local rule engine answers instantly;
+    budget_report (the scored budgets, when known) lets rule insights call out overruns
+    """
+    client = client or openai_client
+    cache = insight_cache if cache is None else cache
+    mode = mode or INSIGHT_MODE
+    usage = {'cached': False, 'source': 'gpt'}
+    aggregates = aggregates or (TransactionAggregates(transactions) if transactions else None)
     
-    for category, amount in top_categories:
-        percentage = (amount / total_amount) * 100
-        transaction_count = sum(1 for t in transactions if t.get('category') == category)
-        avg_per_category = amount / transaction_count if transaction_count > 0 else 0
-        formatted_data += f"- {category}: ${amount:,.2f} ({percentage:.1f}%) | {transaction_count} transactions | Avg: ${avg_per_category:,.2f}\n"
-    
-    formatted_data += "\nTop Vendors by Spend (consolidation opportunities):\n"
-    for vendor, amount in top_vendors:
-        percentage = (amount / total_amount) * 100
-        frequency = vendor_frequency.get(vendor, 0)
-        formatted_data += f"- {vendor}: ${amount:,.2f} ({percentage:.1f}%) | {frequency} transactions\n"
-    
-    # Add subscription analysis
-    if likely_subscriptions:
-        formatted_data += "\nLikely Recurring Subscriptions/Services:\n"
-        for vendor, total, freq, avg in likely_subscriptions:
-            formatted_data += f"- {vendor}: ${avg:,.2f}/transaction × {freq} times = ${total:,.2f} total\n"
-    
-    # Add outlier analysis
-    high_value_threshold = avg_amount * 3  # Transactions 3x above average
-    outliers = [t for t in transactions if t.get('amount', 0) > high_value_threshold]
-    if outliers:
-        formatted_data += f"\nHigh-Value Outliers (>${high_value_threshold:,.2f}+):\n"
-        for transaction in sorted(outliers, key=lambda x: x.get('amount', 0), reverse=True)[:5]:
-            formatted_data += f"- {transaction.get('vendor', 'Unknown')}: ${transaction.get('amount', 0):,.2f} ({transaction.get('category', 'Uncategorized')})\n"
-    
-    # Monthly spending patterns
-    if len(monthly_patterns) > 1:
-        formatted_data += "\nMonthly Spending Patterns:\n"
-        for month, amount in sorted(monthly_patterns.items())[-6:]:  # Last 6 months
-            formatted_data += f"- {month}: ${amount:,.2f}\n"
+    if mode == 'rules':
+        usage['source'] = 'rules'
+        return generate_rule_based_insights(transactions, aggregates, budget_report), usage
     
-    return formatted_data
-
-def generate_financial_insights(transactions):
-    """Generate AI-powered financial insights using GPT-4o"""
-    if not openai_client:
+    if not client:
         logging.error("OpenAI client not initialized - API key missing")
-        return [
-            {"priority": "High", "text": "OpenAI API key not configured. Please set OPENAI_API_KEY environment variable."},
-            {"priority": "Medium", "text": "Unable to generate AI insights without API access."},
-            {"priority": "Low", "text": "Please check your API configuration and try again."}
-        ]
+        return _rule_fallback(transactions, aggregates, budget_report, usage, 'not_configured')
     
     try:
-        prompt_template = load_prompt_template()
-        transaction_data = format_transactions_for_gpt(transactions)
-        
-        full_prompt = f"{prompt_template}\n\nTRANSACTION DATA:\n{transaction_data}"
+        messages, cache_key, token_report = build_insight_request(aggregates, token_budget)
+        usage.update(token_report)
+        logging.info(f"Insight prompt: {token_report['input_tokens']} input tokens "
+                     f"(budget {token_budget}, level {token_report['summary_level']}, {token_report['token_counter']})")
+        
+        # Identical prompts have already been answered; skip the API call
+        if cache:
+            cached_suggestions = cache.get(cache_key)
+            if cached_suggestions is not None:
+                logging.info("Serving financial insights from cache")
+                usage['cached'] = True
+                return cached_suggestions, usage
         
         logging.info("Sending request to OpenAI GPT-4o...")
         
-        # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-        # do not change this unless explicitly requested by the user
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "You are an expert financial advisor specializing in business expense optimization. Provide specific, actionable insights based on real transaction data."
-                },
-                {
-                    "role": "user", 
-                    "content": full_prompt
-                }
-            ],
+        response = client.chat.completions.create(
+            model=INSIGHT_MODEL,
+            messages=messages,
             response_format={"type": "json_object"},
-            max_tokens=1000,
-            temperature=0.7
+            max_tokens=INSIGHT_MAX_TOKENS,
+            temperature=INSIGHT_TEMPERATURE
         )
         
+        # Billed counts from the API when it reports them
+        api_usage = getattr(response, 'usage', None)
+        if api_usage is not None:
+            usage['prompt_tokens'] = getattr(api_usage, 'prompt_tokens', None)
+            usage['completion_tokens'] = getattr(api_usage, 'completion_tokens', None)
+        
         content = response.choices[0].message.content
         if content is None:
             raise ValueError("Empty response from OpenAI")
@@ -186,34 +135,37 @@ def generate_financial_insights(transactions):
                     suggestion['priority'] = priorities[i % 3]
                 validated_suggestions.append(suggestion)
         
-        # Ensure we have exactly 3 suggestions
-        while len(validated_suggestions) < 3:
-            priority = priorities[len(validated_suggestions)]
-            validated_suggestions.append({
-                "priority": priority,
-                "text": f"Review spending patterns in your transaction data for optimization opportunities."
-            })
+        # Ensure we have exactly 3 suggestions, topping up with computed rule insights
+        if len(validated_suggestions) < 3:
+            for rule_suggestion in generate_rule_based_insights(transactions, aggregates, budget_report):
+                if len(validated_suggestions) >= 3:
+                    break
+                validated_suggestions.append({
+                    "priority": priorities[len(validated_suggestions)],
+                    "text": rule_suggestion['text']
+                })
         
         validated_suggestions = validated_suggestions[:3]  # Limit to 3
         
+        if cache:
+            cache.set(cache_key, validated_suggestions, {'model': INSIGHT_MODEL},
+                      prompt_version=usage.get('prompt_version'))
+        
         logging.info(f"Generated {len(validated_suggestions)} financial insights")
-        return validated_suggestions
+        return validated_suggestions, usage
+        
+    except CircuitOpenError:
+        # Fail fast while the API is unhealthy instead of waiting on every upload
+        logging.warning("OpenAI circuit open - returning rule-based insights")
+        return _rule_fallback(transactions, aggregates, budget_report, usage, 'circuit_open')
         
     except json.JSONDecodeError as e:
         logging.error(f"Failed to parse GPT response as JSON: {str(e)}")
-        return [
-            {"priority": "High", "text": "AI analysis temporarily unavailable due to response format issue."},
-            {"priority": "Medium", "text": "Please try uploading your CSV file again."},
-            {"priority": "Low", "text": "Contact support if the issue persists."}
-        ]
+        return _rule_fallback(transactions, aggregates, budget_report, usage, 'invalid_response')
         
     except Exception as e:
         logging.error(f"Error generating financial insights: {str(e)}")
-        return [
-            {"priority": "High", "text": f"AI analysis error: {str(e)[:100]}..."},
-            {"priority": "Medium", "text": "Please verify your data format and try again."},
-            {"priority": "Low", "text": "Consider checking your internet connection and API limits."}
-        ]
+        return _rule_fallback(transactions, aggregates, budget_report, usage, 'error')
 
 def test_openai_connection():
     """Test OpenAI API connection"""
@@ -0,0 +1,191 @@
+"""
+VeroctaAI Insight Cache
+Persistent, disk-backed cache of GPT insight responses keyed by prompt fingerprint
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Any
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+INSIGHT_CACHE_PATH = os.environ.get('INSIGHT_CACHE_PATH', os.path.join(basedir, 'outputs', 'insight_cache.db'))
+INSIGHT_CACHE_TTL = int(os.environ.get('INSIGHT_CACHE_TTL', str(7 * 24 * 3600)))  # seconds
+INSIGHT_CACHE_MAX_ENTRIES = int(os.environ.get('INSIGHT_CACHE_MAX_ENTRIES', '5000'))
+
+
+def prompt_fingerprint(model: str, system_prompt: str, template: str, formatted_data: str,
+                       **params: Any) -> str:
+    """Stable hash of everything that determines the model's answer"""
+    payload = json.dumps({
+        'model': model,
+        'system_prompt': system_prompt,
+        'template': template,
+        'data': formatted_data,
+        'params': params
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class InsightCache:
+    """SQLite-backed insight store with TTL expiry, LRU eviction and hit/miss counters"""
+
+    def __init__(self, path: str = INSIGHT_CACHE_PATH, ttl: int = INSIGHT_CACHE_TTL,
+                 max_entries: int = INSIGHT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'writes': 0}
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS insights (
+                    key TEXT PRIMARY KEY,
+                    suggestions TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL,
+                    metadata TEXT,
+                    prompt_version TEXT
+                )
+            ''')
+            # Caches created before prompt versioning lack the column
+            columns = {row[1] for row in connection.execute('PRAGMA table_info(insights)')}
+            if 'prompt_version' not in columns:
+                connection.execute('ALTER TABLE insights ADD COLUMN prompt_version TEXT')
+            connection.execute('CREATE INDEX IF NOT EXISTS idx_insights_lru ON insights (last_accessed)')
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return cached suggestions or None; expired entries are dropped on read"""
+        now = time.time()
+        with self._lock:
+            try:
+                connection = self._connect()
+                try:
+                    row = connection.execute(
+                        'SELECT suggestions, created_at FROM insights WHERE key = ?', (key,)
+                    ).fetchone()
+                    if row is None:
+                        self.stats['misses'] += 1
+                        return None
+
+                    if self.ttl and now - row[1] > self.ttl:
+                        connection.execute('DELETE FROM insights WHERE key = ?', (key,))
+                        connection.commit()
+                        self.stats['expired'] += 1
+                        self.stats['misses'] += 1
+                        return None
+
+                    connection.execute('UPDATE insights SET last_accessed = ? WHERE key = ?', (now, key))
+                    connection.commit()
+                    self.stats['hits'] += 1
+                    return json.loads(row[0])
+                finally:
+                    connection.close()
+            except (sqlite3.Error, ValueError) as e:
+                logging.warning(f"Insight cache read failed: {str(e)}")
+                self.stats['misses'] += 1
+                return None
+
+    def set(self, key: str, suggestions: List[Dict[str, Any]], metadata: Optional[Dict[str, Any]] = None,
+            prompt_version: Optional[str] = None):
+        """Store suggestions with the prompt version that produced them and evict LRU entries beyond the limit"""
+        now = time.time()
+        with self._lock:
+            try:
+                connection = self._connect()
+                try:
+                    connection.execute(
+                        'INSERT OR REPLACE INTO insights '
+                        '(key, suggestions, created_at, last_accessed, metadata, prompt_version) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        (key, json.dumps(suggestions), now, now, json.dumps(metadata or {}), prompt_version)
+                    )
+                    self.stats['writes'] += 1
+
+                    if self.max_entries:
+                        count = connection.execute('SELECT COUNT(*) FROM insights').fetchone()[0]
+                        overflow = count - self.max_entries
+                        if overflow > 0:
+                            connection.execute(
+                                'DELETE FROM insights WHERE key IN '
+                                '(SELECT key FROM insights ORDER BY last_accessed ASC LIMIT ?)',
+                                (overflow,)
+                            )
+                            self.stats['evictions'] += overflow
+                    connection.commit()
+                finally:
+                    connection.close()
+            except sqlite3.Error as e:
+                logging.warning(f"Insight cache write failed: {str(e)}")
+
+    def purge_expired(self) -> int:
+        """Delete every entry older than the TTL"""
+        if not self.ttl:
+            return 0
+        with self._lock:
+            connection = self._connect()
+            try:
+                deleted = connection.execute(
+                    'DELETE FROM insights WHERE created_at < ?', (time.time() - self.ttl,)
+                ).rowcount
+                connection.commit()
+            finally:
+                connection.close()
+        self.stats['expired'] += deleted
+        return deleted
+
+    def purge_versions(self, keep_version: str) -> int:
+        """Delete entries produced by any other prompt version (they can no longer be hit)"""
+        with self._lock:
+            connection = self._connect()
+            try:
+                deleted = connection.execute(
+                    'DELETE FROM insights WHERE prompt_version IS NULL OR prompt_version != ?', (keep_version,)
+                ).rowcount
+                connection.commit()
+            finally:
+                connection.close()
+        return deleted
+
+    def clear(self):
+        with self._lock:
+            connection = self._connect()
+            try:
+                connection.execute('DELETE FROM insights')
+                connection.commit()
+            finally:
+                connection.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for this process plus the current entry count"""
+        try:
+            with self._lock:
+                connection = self._connect()
+                try:
+                    entries = connection.execute('SELECT COUNT(*) FROM insights').fetchone()[0]
+                    versions = dict(connection.execute(
+                        'SELECT COALESCE(prompt_version, \'unversioned\'), COUNT(*) FROM insights GROUP BY 1'
+                    ).fetchall())
+                finally:
+                    connection.close()
+        except sqlite3.Error:
+            entries, versions = None, {}
+
+        lookups = self.stats['hits'] + self.stats['misses']
+        return dict(self.stats, entries=entries, prompt_versions=versions,
+                    hit_rate=round(self.stats['hits'] / lookups, 3) if lookups else 0.0)
+
+
+insight_cache = InsightCache()
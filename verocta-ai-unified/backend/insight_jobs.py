@@ -0,0 +1,241 @@
+"""
+VeroctaAI Insight Jobs
+Background insight generation with pollable job status and optional completion callbacks
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import socket
+import logging
+import ipaddress
+import threading
+import urllib.request
+from functools import partial
+from datetime import datetime
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Any
+
+from gpt_utils import generate_financial_insights
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+INSIGHT_JOBS_DIR = os.environ.get('INSIGHT_JOBS_DIR', os.path.join(basedir, 'outputs', 'insight_jobs'))
+INSIGHT_JOB_WORKERS = int(os.environ.get('INSIGHT_JOB_WORKERS', '2'))
+CALLBACK_TIMEOUT = float(os.environ.get('INSIGHT_CALLBACK_TIMEOUT', '10'))
+# Finished jobs are dropped from memory and disk after this many seconds
+INSIGHT_JOB_TTL = float(os.environ.get('INSIGHT_JOB_TTL', '3600'))
+
+# Comma-separated host allowlist for callbacks; callbacks are refused while it is empty
+CALLBACK_ALLOWED_HOSTS = {
+    host.strip().lower() for host in os.environ.get('INSIGHT_CALLBACK_ALLOWED_HOSTS', '').split(',') if host.strip()
+}
+
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+job_executor = ThreadPoolExecutor(max_workers=INSIGHT_JOB_WORKERS, thread_name_prefix='verocta-insights')
+jobs_db: Dict[str, Dict[str, Any]] = {}
+_jobs_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+def _public_address(hostname: str) -> Optional[str]:
+    """Error message unless every address the host resolves to is a public one"""
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(hostname, None, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError):
+        return f'callback host {hostname} does not resolve'
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split('%')[0])
+        if not ip.is_global or ip.is_multicast:
+            return f'callback host {hostname} resolves to a non-public address'
+    return None
+
+
+def validate_callback_url(callback_url: Optional[str]) -> Optional[str]:
+    """Return an error message if the callback URL is not allowed"""
+    if not callback_url:
+        return None
+    parsed = urlparse(callback_url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        return 'callback_url must be an http(s) URL'
+    if not CALLBACK_ALLOWED_HOSTS:
+        return 'callbacks are disabled on this server (INSIGHT_CALLBACK_ALLOWED_HOSTS is not set)'
+    if parsed.hostname.lower() not in CALLBACK_ALLOWED_HOSTS:
+        return f'callback host {parsed.hostname} is not allowed'
+    # Allowlisted names must still not point at internal, loopback or link-local addresses
+    return _public_address(parsed.hostname)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """A redirect could send the job body to a host that was never validated"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_callback_opener = urllib.request.build_opener(_NoRedirect)
+
+
+def _job_path(job_id: str) -> str:
+    return os.path.join(INSIGHT_JOBS_DIR, f'{job_id}.json')
+
+
+def _owner_alive(pid: Optional[int]) -> bool:
+    """True while the process that queued a job (and runs it in its thread pool) is still running"""
+    if pid is None or pid == os.getpid():
+        return pid is not None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _expire_jobs():
+    """
+    At most once a minute: drop finished jobs past INSIGHT_JOB_TTL from memory and disk, and fail
+    queued or running jobs whose worker process is gone (its in-process queue went with it)
+    """
+    global _last_sweep
+    now = time.time()
+    with _jobs_lock:
+        if now - _last_sweep < 60:
+            return
+        _last_sweep = now
+        cutoff = datetime.fromtimestamp(now - INSIGHT_JOB_TTL).isoformat()
+        for job_id in [job_id for job_id, job in jobs_db.items()
+                       if job.get('completed_at') and job['completed_at'] < cutoff]:
+            del jobs_db[job_id]
+    try:
+        names = os.listdir(INSIGHT_JOBS_DIR)
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(INSIGHT_JOBS_DIR, name)
+        try:
+            stale = now - os.path.getmtime(path) > INSIGHT_JOB_TTL
+            if not name.endswith('.json'):
+                if stale:
+                    os.remove(path)  # temp file left by a crashed writer
+                continue
+            with open(path, 'r') as f:
+                job = json.load(f)
+            if job.get('status') in ('completed', 'failed'):
+                if stale:
+                    os.remove(path)
+            elif not _owner_alive(job.get('pid')) and (job.get('pid') or stale):
+                job.update({'status': 'failed', 'error': 'The worker running this job stopped before it finished',
+                            'completed_at': datetime.now().isoformat()})
+                _save_job(job)
+                logging.warning(f"Insight job {job['id']} orphaned by worker {job.get('pid')}; marked failed")
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Could not prune insight job {name}: {str(e)}")
+
+
+def _save_job(job: Dict[str, Any]):
+    """Persist job state atomically so any worker process can answer status polls"""
+    with _jobs_lock:
+        jobs_db[job['id']] = job
+        try:
+            os.makedirs(INSIGHT_JOBS_DIR, exist_ok=True)
+            tmp_path = f"{_job_path(job['id'])}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(job, f, default=str)
+            os.replace(tmp_path, _job_path(job['id']))
+        except OSError as e:
+            logging.warning(f"Could not persist insight job {job['id']}: {str(e)}")
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Get job state from memory, falling back to the persisted copy"""
+    if not JOB_ID_PATTERN.match(job_id or ''):
+        return None
+    _expire_jobs()
+    with _jobs_lock:
+        job = jobs_db.get(job_id)
+    if job is not None:
+        return dict(job)
+    try:
+        with open(_job_path(job_id), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _send_callback(job: Dict[str, Any]) -> Dict[str, Any]:
+    """POST the finished job to its callback URL, re-checked now in case its DNS changed; redirects are not followed"""
+    error = validate_callback_url(job['callback_url'])
+    if error:
+        logging.warning(f"Insight job {job['id']} callback refused: {error}")
+        return {'delivered': False, 'error': error}
+    body = json.dumps({key: job.get(key) for key in ('id', 'status', 'suggestions', 'error', 'result', 'completed_at')},
+                      default=str).encode('utf-8')
+    request = urllib.request.Request(
+        job['callback_url'], data=body, method='POST',
+        headers={'Content-Type': 'application/json', 'X-Verocta-Job-Id': job['id']}
+    )
+    try:
+        with _callback_opener.open(request, timeout=CALLBACK_TIMEOUT) as response:
+            return {'delivered': True, 'status_code': response.status}
+    except Exception as e:
+        logging.warning(f"Insight job {job['id']} callback failed: {str(e)}")
+        return {'delivered': False, 'error': str(e)[:200]}
+
+
+def _run_job(job_id: str, transactions: List[Dict[str, Any]],
+             on_complete: Optional[Callable[[List[Dict[str, Any]]], Dict[str, Any]]],
+             generator: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]):
+    job = get_job(job_id)
+    job.update({'status': 'running', 'started_at': datetime.now().isoformat()})
+    _save_job(job)
+
+    try:
+        suggestions = generator(transactions)
+        job['suggestions'] = suggestions
+        if on_complete:
+            job['result'] = on_complete(suggestions)
+        job['status'] = 'completed'
+    except Exception as e:
+        logging.error(f"Insight job {job_id} failed: {str(e)}")
+        job['status'] = 'failed'
+        job['error'] = str(e)[:500]
+
+    job['completed_at'] = datetime.now().isoformat()
+    if job.get('callback_url'):
+        job['callback'] = _send_callback(job)
+    _save_job(job)
+
+
+def submit_insight_job(transactions: List[Dict[str, Any]],
+                       callback_url: Optional[str] = None,
+                       on_complete: Optional[Callable[[List[Dict[str, Any]]], Dict[str, Any]]] = None,
+                       metadata: Optional[Dict[str, Any]] = None,
+                       generator: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]] = None,
+                       budget_report: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Queue insight generation in the background and return the job record
+    on_complete receives the suggestions and returns extra result fields (e.g. report paths)
+    budget_report is passed to the default generator for its rule-based fallback
+    """
+    job = {
+        'id': uuid.uuid4().hex,
+        'status': 'queued',
+        'pid': os.getpid(),
+        'created_at': datetime.now().isoformat(),
+        'callback_url': callback_url,
+        'metadata': metadata or {},
+        'suggestions': None,
+        'result': None,
+        'error': None
+    }
+    _expire_jobs()
+    _save_job(job)
+    generator = generator or partial(generate_financial_insights, budget_report=budget_report)
+    job_executor.submit(_run_job, job['id'], transactions, on_complete, generator)
+    logging.info(f"Queued insight job {job['id']}")
+    return dict(job)
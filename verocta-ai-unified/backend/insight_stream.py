@@ -0,0 +1,182 @@
+"""
+VeroctaAI Insight Streaming
+Streams GPT insights and emits each suggestion as soon as its JSON object is complete
+"""
+
+import re
+import json
+import time
+import logging
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+import gpt_utils
+from gpt_utils import (
+    build_insight_request, INSIGHT_MODEL, INSIGHT_MAX_TOKENS, INSIGHT_TEMPERATURE, INSIGHT_MODE
+)
+from insight_cache import insight_cache
+from rule_insights import generate_rule_based_insights
+from transaction_aggregates import TransactionAggregates
+
+PRIORITIES = ['High', 'Medium', 'Low']
+SUGGESTIONS_ARRAY = re.compile(r'"suggestions"\s*:\s*\[')
+
+
+class SuggestionStreamParser:
+    """
+    Incremental parser for {"suggestions": [{...}, {...}]} arriving in arbitrary chunks
+    feed() returns the suggestion objects completed by that chunk
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.position = 0          # next unscanned index in buffer
+        self.in_array = False
+        self.finished = False
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.object_start = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        completed = []
+        if self.finished or not chunk:
+            return completed
+        self.buffer += chunk
+
+        if not self.in_array:
+            match = SUGGESTIONS_ARRAY.search(self.buffer)
+            if not match:
+                return completed
+            self.in_array = True
+            self.position = match.end()
+
+        buffer = self.buffer
+        for index in range(self.position, len(buffer)):
+            char = buffer[index]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+
+            if char == '"':
+                self.in_string = True
+            elif char == '{':
+                if self.depth == 0:
+                    self.object_start = index
+                self.depth += 1
+            elif char == '}':
+                self.depth -= 1
+                if self.depth == 0 and self.object_start is not None:
+                    try:
+                        completed.append(json.loads(buffer[self.object_start:index + 1]))
+                    except ValueError:
+                        logging.warning("Skipping malformed streamed suggestion")
+                    self.object_start = None
+            elif char == ']' and self.depth == 0:
+                self.finished = True
+                self.position = index + 1
+                return completed
+        self.position = len(buffer)
+
+        # Drop consumed text, keeping any partially received object
+        keep_from = self.object_start if self.object_start is not None else self.position
+        self.buffer = self.buffer[keep_from:]
+        self.position -= keep_from
+        if self.object_start is not None:
+            self.object_start = 0
+        return completed
+
+
+def _normalize(suggestion: Any, index: int) -> Optional[Dict[str, Any]]:
+    if not isinstance(suggestion, dict) or 'priority' not in suggestion or 'text' not in suggestion:
+        return None
+    if suggestion['priority'] not in PRIORITIES:
+        suggestion['priority'] = PRIORITIES[index % 3]
+    return suggestion
+
+
+def stream_financial_insights(transactions: List[Dict[str, Any]], client=None, cache=None,
+                              aggregates: Optional[TransactionAggregates] = None,
+                              budget_report: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield ('suggestion', suggestion) events as soon as each one is parsed, then
+    ('done', {suggestions, usage}); rule-based insights (with budget overruns from budget_report) fill in on any failure
+    """
+    client = client or gpt_utils.openai_client
+    cache = insight_cache if cache is None else cache
+    started = time.perf_counter()
+    usage: Dict[str, Any] = {'cached': False, 'source': 'gpt', 'streamed': True}
+    suggestions: List[Dict[str, Any]] = []
+    aggregates = aggregates or (TransactionAggregates(transactions) if transactions else None)
+
+    def emit(suggestion):
+        suggestions.append(suggestion)
+        if 'first_suggestion_seconds' not in usage:
+            usage['first_suggestion_seconds'] = round(time.perf_counter() - started, 3)
+        return 'suggestion', suggestion
+
+    def top_up(reason):
+        usage.update({'source': 'rules' if not suggestions else 'gpt', 'fallback': reason})
+        for rule_suggestion in generate_rule_based_insights(transactions, aggregates, budget_report):
+            if len(suggestions) >= 3:
+                break
+            yield emit({'priority': PRIORITIES[len(suggestions)], 'text': rule_suggestion['text']})
+
+    if INSIGHT_MODE == 'rules' or not client or not transactions:
+        yield from top_up('rules_mode' if INSIGHT_MODE == 'rules' else 'not_configured')
+    else:
+        try:
+            messages, cache_key, token_report = build_insight_request(aggregates)
+            usage.update(token_report)
+
+            cached = cache.get(cache_key) if cache else None
+            if cached is not None:
+                usage['cached'] = True
+                for suggestion in cached:
+                    yield emit(suggestion)
+            else:
+                stream = client.chat.completions.create(
+                    model=INSIGHT_MODEL,
+                    messages=messages,
+                    response_format={"type": "json_object"},
+                    max_tokens=INSIGHT_MAX_TOKENS,
+                    temperature=INSIGHT_TEMPERATURE,
+                    stream=True
+                )
+                parser = SuggestionStreamParser()
+                try:
+                    for chunk in stream:
+                        if not getattr(chunk, 'choices', None):
+                            continue
+                        content = getattr(chunk.choices[0].delta, 'content', None)
+                        for suggestion in parser.feed(content or ''):
+                            suggestion = _normalize(suggestion, len(suggestions))
+                            if suggestion and len(suggestions) < 3:
+                                yield emit(suggestion)
+                finally:
+                    # Also runs when the browser disconnects mid-stream: release the upstream connection
+                    close = getattr(stream, 'close', None)
+                    if close:
+                        close()
+
+                if len(suggestions) < 3:
+                    yield from top_up('incomplete_response')
+                elif cache:
+                    cache.set(cache_key, suggestions, {'model': INSIGHT_MODEL, 'streamed': True},
+                              prompt_version=usage.get('prompt_version'))
+
+        except Exception as e:
+            logging.error(f"Error streaming financial insights: {str(e)}")
+            yield from top_up('error')
+
+    usage['total_seconds'] = round(time.perf_counter() - started, 3)
+    yield 'done', {'suggestions': suggestions, 'usage': usage}
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Serialize one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
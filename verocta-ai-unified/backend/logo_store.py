@@ -0,0 +1,153 @@
+"""
+VeroctaAI Logo Store
+Company logos stored once per content hash, normalized to print resolution, with cached dimensions
+"""
+
+import io
+import os
+import json
+import hashlib
+import logging
+import warnings
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image as PILImage, UnidentifiedImageError
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+LOGO_STORE_DIR = os.environ.get('LOGO_STORE_DIR', os.path.join(basedir, 'uploads', 'logos'))
+# Logos are placed at most 3in wide or 1.5in tall (see pdf_generator.logo_placement)
+LOGO_DPI = int(os.environ.get('LOGO_DPI', '300'))
+LOGO_MAX_INCHES = (3.0, 1.5)
+LOGO_JPEG_QUALITY = 90
+# Bump when normalization changes so existing logos are processed again
+LOGO_FORMAT_VERSION = 1
+
+
+class LogoStore:
+    """Content-addressed logo files plus a sidecar JSON with their pixel dimensions"""
+
+    def __init__(self, root: str = LOGO_STORE_DIR, dpi: int = LOGO_DPI):
+        self.root = root
+        self.dpi = dpi
+        self.dimensions: Dict[Tuple[str, int], Tuple[int, int]] = {}
+        self.stats = {'stored': 0, 'deduplicated': 0, 'measured': 0}
+        self._lock = threading.Lock()
+
+    def _meta_path(self, logo_hash: str) -> str:
+        return os.path.join(self.root, f'{logo_hash}.json')
+
+    def _open(self, data: bytes) -> PILImage.Image:
+        """Decoded image, refusing anything over Pillow's pixel limit before it is decompressed"""
+        with warnings.catch_warnings():
+            # Pillow only warns between MAX_IMAGE_PIXELS and twice that; treat both as a decompression bomb
+            warnings.simplefilter('error', PILImage.DecompressionBombWarning)
+            try:
+                image = PILImage.open(io.BytesIO(data))
+                image.load()
+            except (PILImage.DecompressionBombError, PILImage.DecompressionBombWarning) as e:
+                raise ValueError(f'Logo image is too large: {str(e)}')
+        return image
+
+    def _normalize(self, data: bytes) -> Tuple[bytes, str, Tuple[int, int]]:
+        """Downscale to the largest placed size at print DPI; JPEG when opaque so ReportLab embeds it undecoded"""
+        with self._open(data) as image:
+            max_size = (int(LOGO_MAX_INCHES[0] * self.dpi), int(LOGO_MAX_INCHES[1] * self.dpi))
+            # Fit a wide logo to the width limit and anything else to the height limit
+            if image.width / image.height > LOGO_MAX_INCHES[0] / LOGO_MAX_INCHES[1]:
+                scale = min(1.0, max_size[0] / image.width)
+            else:
+                scale = min(1.0, max_size[1] / image.height)
+            if scale < 1.0:
+                image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                                     PILImage.LANCZOS)
+
+            transparent = image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+            output = io.BytesIO()
+            if transparent:
+                image.convert('RGBA').save(output, format='PNG', optimize=True)
+                extension = 'png'
+            else:
+                image.convert('RGB').save(output, format='JPEG', quality=LOGO_JPEG_QUALITY, optimize=True)
+                extension = 'jpg'
+            return output.getvalue(), extension, image.size
+
+    def save(self, data: bytes, filename: str = '') -> str:
+        """Store an uploaded logo and return the path of its normalized copy; raises ValueError for non-images"""
+        if filename.lower().endswith('.svg'):
+            # ReportLab cannot place SVG logos, and SVG can carry scripts and external references
+            raise ValueError('SVG logos are not supported; upload a PNG or JPEG')
+        # Identical uploads (and normalization versions) land on the same file
+        logo_hash = hashlib.sha256(data + f':v{LOGO_FORMAT_VERSION}:{self.dpi}'.encode('utf-8')).hexdigest()[:32]
+        meta = self._read_meta(logo_hash)
+        if meta and os.path.exists(os.path.join(self.root, meta['filename'])):
+            with self._lock:
+                self.stats['deduplicated'] += 1
+            return os.path.join(self.root, meta['filename'])
+
+        os.makedirs(self.root, exist_ok=True)
+        try:
+            normalized, extension, size = self._normalize(data)
+        except (UnidentifiedImageError, OSError) as e:
+            raise ValueError(f'Invalid logo image: {str(e)}')
+
+        path = os.path.join(self.root, f'{logo_hash}.{extension}')
+        meta = {'filename': os.path.basename(path), 'width': size[0], 'height': size[1], 'dpi': self.dpi,
+                'source_bytes': len(data), 'stored_bytes': len(normalized)}
+        for target, content in ((path, normalized), (self._meta_path(logo_hash), json.dumps(meta).encode('utf-8'))):
+            tmp_path = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, target)
+
+        with self._lock:
+            self.stats['stored'] += 1
+        logging.info(f"Logo stored: {os.path.basename(path)} ({len(data)} -> {len(normalized)} bytes)")
+        return path
+
+    def _read_meta(self, logo_hash: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._meta_path(logo_hash), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get_dimensions(self, logo_path: str) -> Optional[Tuple[int, int]]:
+        """Pixel size of a logo: memory, then the sidecar JSON, then (for logos outside the store) PIL"""
+        try:
+            key = (logo_path, os.stat(logo_path).st_mtime_ns)
+        except OSError:
+            return None
+        with self._lock:
+            size = self.dimensions.get(key)
+        if size:
+            return size
+
+        name, _ = os.path.splitext(os.path.basename(logo_path))
+        meta = self._read_meta(name)
+        if meta and meta.get('filename') == os.path.basename(logo_path) and meta.get('width'):
+            size = (meta['width'], meta['height'])
+        else:
+            try:
+                with PILImage.open(logo_path) as image:
+                    size = image.size
+            except (UnidentifiedImageError, OSError, PILImage.DecompressionBombError):
+                return None
+            with self._lock:
+                self.stats['measured'] += 1
+
+        with self._lock:
+            self.dimensions[key] = size
+        return size
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats, cached_dimensions=len(self.dimensions))
+
+
+logo_store = LogoStore()
+
+
+def save_logo(data: bytes, filename: str = '') -> str:
+    """Main function to store an uploaded company logo"""
+    return logo_store.save(data, filename)
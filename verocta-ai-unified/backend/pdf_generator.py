@@ -1,23 +1,193 @@
 import os
+import json
+import hashlib
+import time
 import logging
+import functools
+import copy
 from datetime import datetime
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, KeepTogether
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, PageBreak, KeepTogether
+from reportlab.platypus.tableofcontents import TableOfContents
 from reportlab.lib.units import inch
-from reportlab.platypus.flowables import HRFlowable
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
+from reportlab.platypus.flowables import HRFlowable, Flowable
 import numpy as np
 import io
 import base64
 from reportlab.platypus import Image as ReportLabImage
 from statistics import median
-from collections import defaultdict
+from collections import OrderedDict
+import threading
+from reportlab.graphics.shapes import Drawing
+from logo_store import logo_store
+from report_theme import get_report_theme, LEDGER_FONT_SIZE, SCORE_GREEN, SCORE_AMBER, SCORE_RED
+from report_model import build_report_model, summarize_report_totals, monthly_spending_totals, score_band
+from report_store import report_store
+from report_charts import (
+    PROFESSIONAL_COLORS, CLEAN_COLORS, palette, clean_pie_drawing, breakdown_drawing, trend_drawing
+)
 
-def create_enhanced_pie_chart(category_data, title="Spending by Category"):
+try:
+    from svglib.svglib import svg2rlg
+except ImportError:
+    svg2rlg = None
+
+# matplotlib is imported on the first matplotlib chart render (see _load_pyplot)
+plt = None
+
+# pyplot keeps global figure state, so only one thread may render at a time
+# (re-entrant: the breakdown chart renders the bar chart while holding it)
+_pyplot_lock = threading.RLock()
+
+# 'matplotlib' raster/SVG charts or 'reportlab' native vector charts; selectable per report
+CHART_BACKENDS = ('matplotlib', 'reportlab')
+CHART_BACKEND = os.environ.get('CHART_BACKEND', 'matplotlib').strip().lower()
+
+# Effective resolution of raster charts at the size they are placed in the PDF
+CHART_DPI = int(os.environ.get('CHART_DPI', '150'))
+# 'png' or 'svg'; SVG charts are embedded as vector drawings and need svglib
+CHART_FORMAT = os.environ.get('CHART_FORMAT', 'png').strip().lower()
+CHART_CACHE_MAX_BYTES = int(os.environ.get('CHART_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+# Bump when chart styling changes so cached renders are not reused
+CHART_STYLE_VERSION = 1
+
+# Width x height in inches each chart is placed at in the report
+CHART_PLACEMENT = {
+    'clean_pie': (6, 6),
+    'breakdown': (7, 5.25),
+    'trend': (6.5, 4)
+}
+
+if CHART_FORMAT == 'svg' and svg2rlg is None:
+    logging.warning("CHART_FORMAT=svg requires svglib; rendering PNG charts instead")
+    CHART_FORMAT = 'png'
+
+if CHART_BACKEND not in CHART_BACKENDS:
+    logging.warning(f"Unknown CHART_BACKEND {CHART_BACKEND}; using matplotlib")
+    CHART_BACKEND = 'matplotlib'
+
+
+def resolve_chart_backend(backend=None):
+    """Validated chart backend name, defaulting to CHART_BACKEND"""
+    backend = (backend or CHART_BACKEND).strip().lower()
+    if backend not in CHART_BACKENDS:
+        raise ValueError(f"Unknown chart backend '{backend}'; expected one of {', '.join(CHART_BACKENDS)}")
+    return backend
+
+
+def _load_pyplot():
+    """Import matplotlib on first use so workers on the ReportLab backend never load it"""
+    global plt
+    if plt is None:
+        import matplotlib
+        matplotlib.use('Agg')  # Use non-interactive backend
+        import matplotlib.pyplot as pyplot
+        plt = pyplot
+    return plt
+
+
+class ChartCache:
+    """Rendered chart bytes keyed by chart inputs and style, evicted LRU beyond a byte budget"""
+    
+    def __init__(self, max_bytes=CHART_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+    
+    def get(self, key, record=True):
+        with self._lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+            if record:
+                self.stats['hits' if data is not None else 'misses'] += 1
+            return data
+    
+    def set(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            self.entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.stats['evictions'] += 1
+    
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self.entries), bytes=self.size)
+
+
+chart_cache = ChartCache()
+
+
+def _freeze(value):
+    """JSON-friendly, order-independent form of chart inputs for cache keys"""
+    if isinstance(value, dict):
+        return sorted(([str(k), _freeze(v)] for k, v in value.items()), key=lambda item: item[0])
+    if isinstance(value, (list, tuple)):
+        return [_freeze(v) for v in value]
+    return value
+
+
+def cached_chart(render):
+    """Serve repeat renders of the same chart data, title, size and style from chart_cache"""
+    @functools.wraps(render)
+    def wrapper(*args, **kwargs):
+        key = hashlib.sha256(json.dumps(
+            [render.__name__, _freeze(args), _freeze(kwargs), CHART_FORMAT, CHART_DPI, CHART_STYLE_VERSION],
+            default=str
+        ).encode('utf-8')).hexdigest()
+        data = chart_cache.get(key)
+        if data is None:
+            with _pyplot_lock:
+                # Another thread may have rendered it while we waited
+                data = chart_cache.get(key, record=False)
+                if data is None:
+                    _load_pyplot()
+                    buffer = render(*args, **kwargs)
+                    if buffer is None:
+                        return None
+                    data = buffer.getvalue()
+                    chart_cache.set(key, data)
+        return io.BytesIO(data)
+    return wrapper
+
+
+def _save_figure(fig, placed_width):
+    """Save the figure as SVG, or as PNG at CHART_DPI for the width it is placed at"""
+    img_buffer = io.BytesIO()
+    if CHART_FORMAT == 'svg':
+        fig.savefig(img_buffer, format='svg', bbox_inches='tight', facecolor='white')
+    else:
+        dpi = max(CHART_DPI * placed_width / fig.get_figwidth(), 50)
+        fig.savefig(img_buffer, format='png', dpi=dpi, bbox_inches='tight', facecolor='white')
+    plt.close(fig)
+    img_buffer.seek(0)
+    return img_buffer
+
+
+def chart_flowable(chart_buffer, width, height):
+    """Flowable for a rendered chart; ReportLab and SVG charts stay vector drawings"""
+    if isinstance(chart_buffer, Drawing):
+        # Cached drawings are shared between documents; layout marks (e.g. _postponed) must not carry over
+        return copy.copy(chart_buffer)
+    data = chart_buffer.getvalue()
+    if svg2rlg is not None and data.lstrip()[:5] in (b'<?xml', b'<svg '):
+        drawing = svg2rlg(io.BytesIO(data))
+        drawing.scale(width / drawing.width, height / drawing.height)
+        drawing.width, drawing.height = width, height
+        return drawing
+    return ReportLabImage(io.BytesIO(data), width=width, height=height)
+
+@cached_chart
+def create_enhanced_pie_chart(category_data, title="Spending by Category", placed_width=CHART_PLACEMENT['breakdown'][0]):
     """Create enhanced pie chart with superior design and fallback to bar chart for many categories"""
     try:
         if not category_data:
@@ -30,17 +200,13 @@ def create_enhanced_pie_chart(category_data, title="Spending by Category"):
         
         # If more than 6 categories, create horizontal bar chart instead
         if len(categories) > 6:
-            return create_horizontal_bar_chart(category_data, title)
+            return create_horizontal_bar_chart(category_data, title, placed_width)
         
         # Create pie chart for <= 6 categories with superior design
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 7))
         
         # Enhanced color scheme with professional colors
-        professional_colors = [
-            '#2E86AB', '#A23B72', '#F18F01', '#C73E1D', 
-            '#6A994E', '#577590', '#F2CC8F', '#81B29A'
-        ]
-        colors_list = professional_colors[:len(categories)]
+        colors_list = palette(PROFESSIONAL_COLORS, len(categories))
         
         # Create pie chart with enhanced styling
         wedges, texts, autotexts = ax1.pie(
@@ -119,19 +285,14 @@ def create_enhanced_pie_chart(category_data, title="Spending by Category"):
         
         plt.tight_layout()
         
-        # Save to bytes with high quality
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight', facecolor='white')
-        img_buffer.seek(0)
-        plt.close()
-        
-        return img_buffer
+        return _save_figure(fig, placed_width)
         
     except Exception as e:
         logging.error(f"Error creating enhanced pie chart: {str(e)}")
         return None
 
-def create_clean_pie_chart(category_data, title="Spending by Category"):
+@cached_chart
+def create_clean_pie_chart(category_data, title="Spending by Category", placed_width=CHART_PLACEMENT['clean_pie'][0]):
     """Create clean, simple pie chart with minimal design"""
     try:
         if not category_data:
@@ -146,11 +307,7 @@ def create_clean_pie_chart(category_data, title="Spending by Category"):
         fig, ax = plt.subplots(figsize=(10, 10))
         
         # Clean color scheme
-        clean_colors = [
-            '#3498db', '#e74c3c', '#2ecc71', '#f39c12', 
-            '#9b59b6', '#1abc9c', '#34495e', '#e67e22'
-        ]
-        colors_list = clean_colors[:len(categories)]
+        colors_list = palette(CLEAN_COLORS, len(categories))
         
         # Create clean pie chart
         wedges, texts, autotexts = ax.pie(
@@ -181,51 +338,37 @@ def create_clean_pie_chart(category_data, title="Spending by Category"):
         
         plt.tight_layout()
         
-        # Save to bytes with high quality
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight', facecolor='white')
-        img_buffer.seek(0)
-        plt.close()
-        
-        return img_buffer
+        return _save_figure(fig, placed_width)
         
     except Exception as e:
         logging.error(f"Error creating clean pie chart: {str(e)}")
         return None
 
-def create_spending_trend_chart(transactions, title="Monthly Spending Trend"):
-    """Create a spending trend chart over time"""
+def create_spending_trend_chart(transactions, title="Monthly Spending Trend", placed_width=CHART_PLACEMENT['trend'][0],
+                                monthly_data=None):
+    """Create a spending trend chart over time (from monthly_data totals when given)"""
     try:
-        if not transactions:
-            return None
-        
-        # Group transactions by month
-        monthly_data = defaultdict(float)
-        for transaction in transactions:
-            date_str = transaction.get('date', '')
-            amount = abs(float(transaction.get('amount', 0)))
-            
-            # Try to parse date
-            try:
-                if '/' in date_str:
-                    date_obj = datetime.strptime(date_str.split()[0], '%m/%d/%Y')
-                elif '-' in date_str:
-                    date_obj = datetime.strptime(date_str.split()[0], '%Y-%m-%d')
-                else:
-                    continue
-                    
-                month_key = date_obj.strftime('%Y-%m')
-                monthly_data[month_key] += amount
-            except:
-                continue
-        
+        if monthly_data is None:
+            if not transactions:
+                return None
+            # Group transactions by month
+            monthly_data = monthly_spending_totals(transactions)
         if len(monthly_data) < 2:
             return None
         
-        # Sort by month
-        sorted_months = sorted(monthly_data.items())
-        months = [item[0] for item in sorted_months]
-        amounts = [item[1] for item in sorted_months]
+        # Render from the monthly totals so the cache key stays small
+        return _render_trend_chart(monthly_data, title, placed_width)
+        
+    except Exception as e:
+        logging.error(f"Error creating trend chart: {str(e)}")
+        return None
+
+@cached_chart
+def _render_trend_chart(monthly_data, title, placed_width):
+    """Line chart of monthly totals"""
+    try:
+        months = list(monthly_data.keys())
+        amounts = list(monthly_data.values())
         
         fig, ax = plt.subplots(figsize=(12, 6))
         
@@ -245,19 +388,14 @@ def create_spending_trend_chart(transactions, title="Monthly Spending Trend"):
         plt.grid(True, alpha=0.3)
         plt.tight_layout()
         
-        # Save to bytes
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight', facecolor='white')
-        img_buffer.seek(0)
-        plt.close()
-        
-        return img_buffer
+        return _save_figure(fig, placed_width)
         
     except Exception as e:
         logging.error(f"Error creating trend chart: {str(e)}")
         return None
 
-def create_horizontal_bar_chart(category_data, title="Spending by Category"):
+@cached_chart
+def create_horizontal_bar_chart(category_data, title="Spending by Category", placed_width=CHART_PLACEMENT['breakdown'][0]):
     """Create horizontal bar chart for categories > 6"""
     try:
         if not category_data:
@@ -317,42 +455,136 @@ def create_horizontal_bar_chart(category_data, title="Spending by Category"):
         
         plt.tight_layout()
         
-        # Save to bytes with high quality
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight', facecolor='white')
-        img_buffer.seek(0)
-        plt.close()
-        
-        return img_buffer
+        return _save_figure(fig, placed_width)
         
     except Exception as e:
         logging.error(f"Error creating horizontal bar chart: {str(e)}")
         return None
 
+def render_report_charts(transactions, category_totals=None, backend=None, monthly_totals=None):
+    """Render all report charts up front so they can be produced in parallel with other work
+    
+    backend: 'matplotlib' (default CHART_BACKEND) or 'reportlab' for native vector drawings
+    category_totals / monthly_totals: precomputed totals (e.g. from a report model) instead of transactions
+    """
+    backend = resolve_chart_backend(backend)
+    if category_totals is None:
+        category_totals, _ = summarize_report_totals(transactions)
+    if monthly_totals is None:
+        monthly_totals = monthly_spending_totals(transactions or [])
+    
+    if not category_totals:
+        return {}
+    
+    if backend == 'reportlab':
+        # Drawings are built at their placed size in points; no pyplot state involved
+        def placed(name):
+            width, height = CHART_PLACEMENT[name]
+            return width * inch, height * inch
+        
+        return {
+            'clean_pie': clean_pie_drawing(category_totals, "Clean Spending Breakdown", *placed('clean_pie')),
+            'breakdown': breakdown_drawing(category_totals, "Comprehensive Spending Breakdown", *placed('breakdown')),
+            'trend': trend_drawing(monthly_totals, "Monthly Spending Patterns", *placed('trend'))
+        }
+    
+    # Each chart takes the pyplot lock only on a cache miss
+    return {
+        'clean_pie': create_clean_pie_chart(category_totals, "Clean Spending Breakdown"),
+        'breakdown': create_enhanced_pie_chart(category_totals, "Comprehensive Spending Breakdown"),
+        'trend': create_spending_trend_chart(transactions, "Monthly Spending Patterns", monthly_data=monthly_totals)
+    }
+
+# Transaction appendix: fixed-height rows, so each page's chunk is sized without measuring cells
+LEDGER_ROW_HEIGHT = 11
+LEDGER_COLUMNS = (('#', 0.6), ('Date', 0.9), ('Vendor', 2.2), ('Category', 2.0), ('Amount', 1.1))
+PDF_APPENDIX_MAX_ROWS = int(os.environ.get('PDF_APPENDIX_MAX_ROWS', '250000'))
+
+def _ledger_row(index, transaction):
+    """One appendix row as plain strings, truncated so rows never wrap"""
+    transaction_date = transaction.get('date')
+    return [
+        f"{index + 1:,}",
+        transaction_date.isoformat() if hasattr(transaction_date, 'isoformat') else str(transaction_date or ''),
+        str(transaction.get('vendor') or '')[:40],
+        str(transaction.get('category') or '')[:36],
+        f"${transaction.get('amount', 0):,.2f}"
+    ]
+
+class TransactionLedger(Flowable):
+    """Transactions laid out as page-sized Table chunks; a chunk's Table is only built when it is drawn"""
+    
+    def __init__(self, transactions, start=0, end=None, style=None):
+        Flowable.__init__(self)
+        self.transactions = transactions
+        self.style = style or get_report_theme().table_styles['ledger']
+        self.start = start
+        self.end = len(transactions) if end is None else end
+        self.hAlign = 'CENTER'
+    
+    def wrap(self, availWidth, availHeight):
+        # The header row repeats on every chunk
+        self.width = sum(width for _, width in LEDGER_COLUMNS) * inch
+        self.height = (self.end - self.start + 1) * LEDGER_ROW_HEIGHT
+        return self.width, self.height
+    
+    def split(self, availWidth, availHeight):
+        fitting = int(availHeight // LEDGER_ROW_HEIGHT) - 1
+        if fitting < 1:
+            return []
+        stop = min(self.start + fitting, self.end)
+        chunk = TransactionLedger(self.transactions, self.start, stop, self.style)
+        if stop >= self.end:
+            return [chunk]
+        return [chunk, TransactionLedger(self.transactions, stop, self.end, self.style)]
+    
+    def draw(self):
+        rows = [[name for name, _ in LEDGER_COLUMNS]]
+        rows.extend(_ledger_row(index, self.transactions[index]) for index in range(self.start, self.end))
+        table = Table(rows, colWidths=[width * inch for _, width in LEDGER_COLUMNS],
+                      rowHeights=[LEDGER_ROW_HEIGHT] * len(rows), style=self.style)
+        table.wrapOn(self.canv, self.width, self.height)
+        table.drawOn(self.canv, 0, 0)
+
+def add_transaction_appendix(story, transactions, theme=None):
+    """Append the full transaction ledger on new pages (up to PDF_APPENDIX_MAX_ROWS rows)"""
+    theme = theme or get_report_theme()
+    shared_styles = theme.styles
+    rows = transactions[:PDF_APPENDIX_MAX_ROWS]
+    
+    story.append(PageBreak())
+    story.append(Paragraph("Appendix: Transaction Ledger", shared_styles['heading']))
+    summary = f"{len(transactions):,} transactions in upload order, totalling ${sum(t.get('amount', 0) for t in transactions):,.2f}."
+    if len(rows) < len(transactions):
+        summary += f" The first {len(rows):,} are listed."
+    story.append(Paragraph(summary, shared_styles['body']))
+    story.append(TransactionLedger(rows, style=theme.table_styles['ledger']))
+
 def get_score_color_rgb(score):
     """Get RGB color values for score with enhanced traffic light system"""
-    if score >= 90:
-        return colors.HexColor('#28a745')  # Green
-    elif score >= 70:
-        return colors.HexColor('#ffc107')  # Amber
-    else:
-        return colors.HexColor('#dc3545')  # Red
+    return {'green': SCORE_GREEN, 'amber': SCORE_AMBER, 'red': SCORE_RED}[score_band(score)]
 
-def add_company_branding(story, company_name=None, logo_path=None):
+def report_styles(company_name=None):
+    """Paragraph styles for a company's reports (see report_theme), built once per process and shared"""
+    return get_report_theme(company_name).styles
+
+def logo_placement(logo_path):
+    """Placed logo size in points from its cached pixel dimensions (see logo_store)"""
+    size = logo_store.get_dimensions(logo_path)
+    if not size:
+        return None
+    aspect_ratio = size[0] / size[1]
+    
+    # Calculate optimal dimensions (max 3 inches wide, 2 inches tall)
+    if aspect_ratio > 1.5:  # Wide logo
+        return 3*inch, 3*inch / aspect_ratio
+    return 1.5*inch * aspect_ratio, 1.5*inch  # Square or tall logo
+
+def add_company_branding(story, company_name=None, logo_path=None, theme=None):
     """Add enhanced company branding to PDF header with improved logo handling"""
+    theme = theme or get_report_theme(company_name)
     try:
-        styles = getSampleStyleSheet()
-        
-        # Enhanced company header style
-        header_style = ParagraphStyle(
-            'CompanyHeader',
-            parent=styles['Normal'],
-            fontSize=16,
-            spaceAfter=25,
-            spaceBefore=10,
-            textColor=colors.HexColor('#2E86AB'),
-            alignment=1  # Center alignment
-        )
+        header_style = theme.styles['company_header']
         
         # Create header section with logo and company info
         header_elements = []
@@ -360,23 +592,8 @@ def add_company_branding(story, company_name=None, logo_path=None):
         if logo_path and os.path.exists(logo_path):
             # Enhanced logo handling with better sizing and positioning
             try:
-                # Determine optimal logo size based on file
-                from PIL import Image as PILImage
-                try:
-                    pil_img = PILImage.open(logo_path)
-                    aspect_ratio = pil_img.width / pil_img.height
-                    
-                    # Calculate optimal dimensions (max 3 inches wide, 2 inches tall)
-                    if aspect_ratio > 1.5:  # Wide logo
-                        logo_width = 3*inch
-                        logo_height = 3*inch / aspect_ratio
-                    else:  # Square or tall logo
-                        logo_height = 1.5*inch
-                        logo_width = 1.5*inch * aspect_ratio
-                        
-                except:
-                    # Fallback dimensions
-                    logo_width, logo_height = 2*inch, 1*inch
+                # Determine optimal logo size without decoding the image again
+                logo_width, logo_height = logo_placement(logo_path) or (2*inch, 1*inch)  # Fallback dimensions
                 
                 logo = ReportLabImage(logo_path, width=logo_width, height=logo_height)
                 story.append(logo)
@@ -395,42 +612,21 @@ def add_company_branding(story, company_name=None, logo_path=None):
         story.append(Spacer(1, 25))
         
         # Add a professional separator line
-        story.append(HRFlowable(width="100%", thickness=1.5, lineCap='round', color=colors.HexColor('#2E86AB')))
+        story.append(HRFlowable(width="100%", thickness=1.5, lineCap='round', color=theme.primary))
         story.append(Spacer(1, 20))
         
     except Exception as e:
         logging.error(f"Error adding company branding: {str(e)}")
         # Add fallback header
-        fallback_style = ParagraphStyle(
-            'FallbackHeader',
-            parent=getSampleStyleSheet()['Normal'],
-            fontSize=16,
-            alignment=1,
-            textColor=colors.HexColor('#2E86AB')
-        )
-        story.append(Paragraph("<b>VeroctaAI Financial Intelligence Report</b>", fallback_style))
+        story.append(Paragraph("<b>VeroctaAI Financial Intelligence Report</b>", theme.styles['fallback_header']))
         story.append(Spacer(1, 20))
 
-def create_score_badge_section(story, styles, score, tier_info):
+def create_score_badge_section(story, styles, score, tier_info, theme=None):
     """Create enhanced score badge section with reward information"""
+    theme = theme or get_report_theme()
     try:
         # Score badge with enhanced styling
-        score_color = get_score_color_rgb(score)
-        
-        score_style = ParagraphStyle(
-            'ScoreBadge',
-            parent=styles['Normal'],
-            fontSize=24,
-            spaceAfter=10,
-            spaceBefore=10,
-            textColor=colors.white,
-            backColor=score_color,
-            borderColor=score_color,
-            borderWidth=2,
-            borderPadding=10,
-            alignment=1,  # Center alignment
-            borderRadius=15
-        )
+        score_style = theme.score_badges[get_score_color_rgb(score).hexval()]
         
         # Enhanced score display
         score_text = f"<b>SpendScore: {score}/100</b><br/>{tier_info['tier']} ({tier_info['color']})"
@@ -445,19 +641,7 @@ def create_score_badge_section(story, styles, score, tier_info):
         
         # Add reward eligibility if Green tier
         if tier_info.get('green_reward_eligible', False):
-            reward_style = ParagraphStyle(
-                'RewardStyle',
-                parent=styles['Normal'],
-                fontSize=12,
-                spaceAfter=10,
-                spaceBefore=10,
-                textColor=colors.HexColor('#28a745'),
-                backColor=colors.HexColor('#d4edda'),
-                borderColor=colors.HexColor('#28a745'),
-                borderWidth=1,
-                borderPadding=8,
-                alignment=1
-            )
+            reward_style = theme.styles['reward']
             
             reward_text = "🎉 <b>Green Tier Reward Eligible!</b><br/>You've qualified for 15% off next month's premium features!"
             score_section.append(Spacer(1, 10))
@@ -470,351 +654,369 @@ def create_score_badge_section(story, styles, score, tier_info):
     except Exception as e:
         logging.error(f"Error creating score badge: {str(e)}")
 
-def generate_report_pdf(analysis_data, transactions, company_name=None, logo_path=None):
-    """Generate comprehensive PDF report with enhanced features"""
-    try:
-        # Ensure output directory exists
-        os.makedirs('outputs', exist_ok=True)
-        pdf_path = os.path.join('outputs', 'verocta_report.pdf')
-        
-        # Create PDF document with enhanced margins
-        doc = SimpleDocTemplate(
-            pdf_path, 
-            pagesize=A4, 
-            rightMargin=50, 
-            leftMargin=50,
-            topMargin=50, 
-            bottomMargin=50
-        )
-        
-        # Get styles
-        styles = getSampleStyleSheet()
-        
-        # Enhanced custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=26,
-            spaceAfter=30,
-            spaceBefore=20,
-            textColor=colors.HexColor('#2E86AB'),
-            alignment=1  # Center alignment
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=18,
-            spaceAfter=15,
-            spaceBefore=25,
-            textColor=colors.HexColor('#2E86AB')
-        )
-        
-        body_style = ParagraphStyle(
-            'CustomBody',
-            parent=styles['Normal'],
-            fontSize=11,
-            spaceAfter=12,
-            leading=14
-        )
-        
-        # Build PDF content
-        story = []
-        
-        # Add enhanced company branding at the top
-        add_company_branding(story, company_name, logo_path)
-        
-        # Report metadata with enhanced styling
-        report_date = datetime.now().strftime("%B %d, %Y at %I:%M %p")
-        
-        metadata_style = ParagraphStyle(
-            'MetadataStyle',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor=colors.HexColor('#666666'),
-            alignment=1  # Center alignment
-        )
-        
-        story.append(Paragraph(f"Generated: {report_date}", metadata_style))
-        story.append(Paragraph(f"Data Source: {analysis_data.get('filename', 'Financial Data')}", metadata_style))
-        if company_name:
-            story.append(Paragraph(f"Prepared for: {company_name}", metadata_style))
-        story.append(Spacer(1, 25))
-        
-        # Executive Summary
-        story.append(Paragraph("Executive Summary", heading_style))
-        
-        spend_score = analysis_data.get('spend_score', 0)
-        score_color = get_score_color_rgb(spend_score)
-        
-        # Enhanced SpendScore with visual badge and explanation
-        score_emoji = "🟩" if spend_score >= 80 else "🟧" if spend_score >= 60 else "🟥"
-        score_text = f"<font color='{score_color}' size='20'><b>{score_emoji} SpendScore: {spend_score:.1f}/100</b></font>"
-        story.append(Paragraph(score_text, body_style))
-        
-        score_label = analysis_data.get('score_label', 'Unknown')
-        color_name = analysis_data.get('score_color', 'Gray')
-        
-        badge_text = f"<font color='{score_color}' size='14'><b>Financial Health: {score_label} ({color_name} Zone)</b></font>"
-        story.append(Paragraph(badge_text, body_style))
-        
-        # Add score interpretation
-        if spend_score >= 80:
-            interpretation = "Excellent financial discipline with optimized spending patterns."
-        elif spend_score >= 60:
-            interpretation = "Good financial management with opportunities for improvement."
+def report_model_story(model, charts=None, chart_backend=None, appendix_transactions=None):
+    """Flowables for one report model (see report_model); the PDF renderer
+    
+    charts: optional output of render_report_charts, rendered from the model's chart data when omitted
+    chart_backend: backend for inline chart rendering (see render_report_charts)
+    appendix_transactions: append these transactions as a paginated ledger
+    """
+    company_name = model['company_name']
+    theme = get_report_theme(company_name)
+    shared_styles = theme.styles
+    heading_style = shared_styles['heading']
+    body_style = shared_styles['body']
+    metadata_style = shared_styles['metadata']
+    
+    # Build PDF content
+    story = []
+    
+    # Add enhanced company branding at the top
+    add_company_branding(story, company_name, model['logo_path'], theme)
+    
+    # Report metadata with enhanced styling
+    report_date = datetime.fromisoformat(model['generated_at']).strftime("%B %d, %Y at %I:%M %p")
+    
+    story.append(Paragraph(f"Generated: {report_date}", metadata_style))
+    story.append(Paragraph(f"Data Source: {model['source']}", metadata_style))
+    if company_name:
+        story.append(Paragraph(f"Prepared for: {company_name}", metadata_style))
+    story.append(Spacer(1, 25))
+    
+    # Executive Summary
+    story.append(Paragraph("Executive Summary", heading_style))
+    
+    score = model['score']
+    spend_score = score['value']
+    score_color = get_score_color_rgb(spend_score)
+    
+    # Enhanced SpendScore with visual badge and explanation
+    score_emoji = "🟩" if spend_score >= 80 else "🟧" if spend_score >= 60 else "🟥"
+    score_text = f"<font color='{score_color}' size='20'><b>{score_emoji} SpendScore: {spend_score:.1f}/100</b></font>"
+    story.append(Paragraph(score_text, body_style))
+    
+    score_label = score['label']
+    color_name = score['color_name']
+    
+    badge_text = f"<font color='{score_color}' size='14'><b>Financial Health: {score_label} ({color_name} Zone)</b></font>"
+    story.append(Paragraph(badge_text, body_style))
+    
+    # Add score interpretation
+    story.append(Paragraph(f"<i>{score['interpretation']}</i>", body_style))
+    story.append(Spacer(1, 15))
+    
+    # Key metrics table
+    metrics = model['metrics']
+    metrics_data = [
+        ['Metric', 'Value'],
+        ['Total Transactions', f"{metrics['total_transactions']:,}"],
+        ['Total Amount', f"${metrics['total_amount']:,.2f}"],
+        ['Average Transaction', f"${metrics['average_transaction']:,.2f}"],
+        ['Financial Health', f"{score_label} ({color_name})"]
+    ]
+    
+    metrics_table = Table(metrics_data, colWidths=[2.5*inch, 2.5*inch])
+    metrics_table.setStyle(theme.table_styles['metrics'])
+    
+    story.append(metrics_table)
+    story.append(Spacer(1, 20))
+    
+    # Enhanced AI Recommendations with action items
+    story.append(Paragraph("🤖 AI-Powered Financial Recommendations", heading_style))
+    
+    # Add summary of recommendations
+    counts = model['recommendations']['counts']
+    summary_text = f"Analysis identified {counts['High']} high-priority, {counts['Medium']} medium-priority, and {counts['Low']} low-priority optimization opportunities."
+    story.append(Paragraph(summary_text, body_style))
+    story.append(Spacer(1, 10))
+    
+    for i, suggestion in enumerate(model['recommendations']['items'], 1):
+        priority = suggestion['priority']
+        
+        # Enhanced color coding and symbols
+        if priority == 'High':
+            priority_color = colors.red
+            symbol = "🔴"
+        elif priority == 'Medium':
+            priority_color = colors.orange
+            symbol = "🟡"
         else:
-            interpretation = "Significant optimization potential - immediate action recommended."
-        
-        story.append(Paragraph(f"<i>{interpretation}</i>", body_style))
-        story.append(Spacer(1, 15))
-        
-        # Key metrics table
-        metrics_data = [
-            ['Metric', 'Value'],
-            ['Total Transactions', f"{analysis_data.get('total_transactions', 0):,}"],
-            ['Total Amount', f"${analysis_data.get('total_amount', 0):,.2f}"],
-            ['Average Transaction', f"${analysis_data.get('total_amount', 0) / max(analysis_data.get('total_transactions', 1), 1):,.2f}"],
-            ['Financial Health', f"{score_label} ({color_name})"]
-        ]
-        
-        metrics_table = Table(metrics_data, colWidths=[2.5*inch, 2.5*inch])
-        metrics_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2E86AB')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(metrics_table)
+            priority_color = colors.green
+            symbol = "🟢"
+        
+        priority_text = f"<font color='{priority_color}'><b>{symbol} {priority} Priority:</b></font> {suggestion['text']}"
+        story.append(Paragraph(f"{i}. {priority_text}", body_style))
+        story.append(Spacer(1, 12))
+    
+    # Category Analysis
+    tables = model['tables']
+    if model['transaction_count']:
         story.append(Spacer(1, 20))
+        story.append(Paragraph("Spending Analysis", heading_style))
         
-        # Enhanced AI Recommendations with action items
-        story.append(Paragraph("🤖 AI-Powered Financial Recommendations", heading_style))
-        
-        # Add summary of recommendations
-        suggestions = analysis_data.get('suggestions', [])
-        high_priority = len([s for s in suggestions if s.get('priority') == 'High'])
-        medium_priority = len([s for s in suggestions if s.get('priority') == 'Medium'])
-        low_priority = len([s for s in suggestions if s.get('priority') == 'Low'])
-        
-        summary_text = f"Analysis identified {high_priority} high-priority, {medium_priority} medium-priority, and {low_priority} low-priority optimization opportunities."
-        story.append(Paragraph(summary_text, body_style))
-        story.append(Spacer(1, 10))
-        
-        for i, suggestion in enumerate(suggestions, 1):
-            priority = suggestion.get('priority', 'Medium')
-            text = suggestion.get('text', 'No recommendation available')
+        # Top categories table
+        if tables['categories']:
+            story.append(Paragraph("Top Spending Categories", shared_styles['subheading']))
             
-            # Enhanced color coding and symbols
-            if priority == 'High':
-                priority_color = colors.red
-                symbol = "🔴"
-            elif priority == 'Medium':
-                priority_color = colors.orange
-                symbol = "🟡"
-            else:
-                priority_color = colors.green
-                symbol = "🟢"
+            category_data = [['Category', 'Amount', 'Percentage']]
+            for row in tables['categories']:
+                category_data.append([row['name'], f"${row['amount']:,.2f}", f"{row['share']:.1f}%"])
             
-            priority_text = f"<font color='{priority_color}'><b>{symbol} {priority} Priority:</b></font> {text}"
-            story.append(Paragraph(f"{i}. {priority_text}", body_style))
-            story.append(Spacer(1, 12))
-        
-        # Category Analysis
-        if transactions:
-            story.append(Spacer(1, 20))
-            story.append(Paragraph("Spending Analysis", heading_style))
+            category_table = Table(category_data, colWidths=[2*inch, 1.5*inch, 1*inch])
+            category_table.setStyle(theme.table_styles['ranking'])
             
-            # Calculate category breakdown
-            category_totals = {}
-            vendor_totals = {}
+            story.append(category_table)
+            story.append(Spacer(1, 15))
+        
+        # Top vendors table
+        if tables['vendors']:
+            story.append(Paragraph("Top Vendors", shared_styles['subheading']))
             
-            for transaction in transactions:
-                category = transaction.get('category', 'Uncategorized')
-                vendor = transaction.get('vendor', 'Unknown')
-                amount = transaction.get('amount', 0)
-                
-                category_totals[category] = category_totals.get(category, 0) + amount
-                vendor_totals[vendor] = vendor_totals.get(vendor, 0) + amount
+            vendor_data = [['Vendor', 'Amount', 'Percentage']]
+            for row in tables['vendors']:
+                vendor_data.append([row['name'][:30], f"${row['amount']:,.2f}", f"{row['share']:.1f}%"])  # Truncate long vendor names
             
-            # Top categories table
-            if category_totals:
-                story.append(Paragraph("Top Spending Categories", styles['Heading3']))
-                
-                sorted_categories = sorted(category_totals.items(), key=lambda x: x[1], reverse=True)[:10]
-                total_amount = sum(category_totals.values())
-                
-                category_data = [['Category', 'Amount', 'Percentage']]
-                for category, amount in sorted_categories:
-                    percentage = (amount / total_amount) * 100
-                    category_data.append([category, f"${amount:,.2f}", f"{percentage:.1f}%"])
-                
-                category_table = Table(category_data, colWidths=[2*inch, 1.5*inch, 1*inch])
-                category_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2E86AB')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 11),
-                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 9),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey)
-                ]))
-                
-                story.append(category_table)
-                story.append(Spacer(1, 15))
+            vendor_table = Table(vendor_data, colWidths=[2*inch, 1.5*inch, 1*inch])
+            vendor_table.setStyle(theme.table_styles['ranking'])
             
-            # Top vendors table
-            if vendor_totals:
-                story.append(Paragraph("Top Vendors", styles['Heading3']))
-                
-                sorted_vendors = sorted(vendor_totals.items(), key=lambda x: x[1], reverse=True)[:10]
-                total_amount = sum(vendor_totals.values())
-                
-                vendor_data = [['Vendor', 'Amount', 'Percentage']]
-                for vendor, amount in sorted_vendors:
-                    percentage = (amount / total_amount) * 100
-                    vendor_data.append([vendor[:30], f"${amount:,.2f}", f"{percentage:.1f}%"])  # Truncate long vendor names
-                
-                vendor_table = Table(vendor_data, colWidths=[2*inch, 1.5*inch, 1*inch])
-                vendor_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2E86AB')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 11),
-                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 9),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey)
-                ]))
-                
-                story.append(vendor_table)
-        
-        # Enhanced Visual Analytics Section
-        story.append(Spacer(1, 30))
-        story.append(HRFlowable(width="100%", thickness=2, lineCap='round', color=colors.HexColor('#2E86AB')))
-        story.append(Spacer(1, 20))
-        story.append(Paragraph("📊 Comprehensive Visual Analytics", heading_style))
+            story.append(vendor_table)
+    
+    # Enhanced Visual Analytics Section
+    story.append(Spacer(1, 30))
+    story.append(HRFlowable(width="100%", thickness=2, lineCap='round', color=theme.primary))
+    story.append(Spacer(1, 20))
+    story.append(Paragraph("📊 Comprehensive Visual Analytics", heading_style))
+    
+    # Multiple chart section with enhanced pie charts and additional visualizations
+    highlights = model['highlights']
+    if highlights:
+        if charts is None:
+            charts = render_report_charts(None, {c['label']: c['value'] for c in model['charts']['categories']},
+                                          chart_backend, {m['label']: m['value'] for m in model['charts']['monthly']})
+        # Chart 1: Clean Simple Pie Chart
+        story.append(Paragraph("💰 Clean Spending Distribution", shared_styles['subheading']))
+        clean_chart_buffer = charts.get('clean_pie')
+        if clean_chart_buffer:
+            story.append(Spacer(1, 10))
+            width, height = CHART_PLACEMENT['clean_pie']
+            clean_chart_image = chart_flowable(clean_chart_buffer, width*inch, height*inch)
+            story.append(clean_chart_image)
+            story.append(Spacer(1, 15))
+        
+        # Chart 2: Enhanced Dual-Panel Pie Chart (existing)
+        story.append(Paragraph("📈 Detailed Spending Analysis", shared_styles['subheading']))
+        chart_description = """
+        <b>Enhanced Spending Distribution:</b><br/>
+        This comprehensive visualization combines visual charts with detailed breakdowns, 
+        automatically adapting based on the number of categories for optimal clarity.
+        """
+        story.append(Paragraph(chart_description, body_style))
+        story.append(Spacer(1, 10))
         
-        # Multiple chart section with enhanced pie charts and additional visualizations
-        category_totals = locals().get('category_totals', {})
-        if category_totals:
-            
-            # Chart 1: Clean Simple Pie Chart
-            story.append(Paragraph("💰 Clean Spending Distribution", styles['Heading3']))
-            clean_chart_buffer = create_clean_pie_chart(category_totals, "Clean Spending Breakdown")
-            if clean_chart_buffer:
-                story.append(Spacer(1, 10))
-                clean_chart_image = ReportLabImage(clean_chart_buffer, width=6*inch, height=6*inch)
-                story.append(clean_chart_image)
-                story.append(Spacer(1, 15))
-            
-            # Chart 2: Enhanced Dual-Panel Pie Chart (existing)
-            story.append(Paragraph("📈 Detailed Spending Analysis", styles['Heading3']))
-            chart_description = """
-            <b>Enhanced Spending Distribution:</b><br/>
-            This comprehensive visualization combines visual charts with detailed breakdowns, 
-            automatically adapting based on the number of categories for optimal clarity.
-            """
-            story.append(Paragraph(chart_description, body_style))
+        chart_buffer = charts.get('breakdown')
+        if chart_buffer:
+            # Add enhanced chart with larger size for better visibility
+            width, height = CHART_PLACEMENT['breakdown']
+            chart_image = chart_flowable(chart_buffer, width*inch, height*inch)
+            story.append(chart_image)
+            story.append(Spacer(1, 15))
+        
+        # Chart 3: Spending Trend Over Time
+        story.append(Paragraph("📅 Spending Trends Over Time", shared_styles['subheading']))
+        trend_chart_buffer = charts.get('trend')
+        if trend_chart_buffer:
             story.append(Spacer(1, 10))
-            
-            chart_buffer = create_enhanced_pie_chart(category_totals, "Comprehensive Spending Breakdown")
-            if chart_buffer:
-                # Add enhanced chart with larger size for better visibility
-                chart_image = ReportLabImage(chart_buffer, width=7*inch, height=5.25*inch)
-                story.append(chart_image)
-                story.append(Spacer(1, 15))
-            
-            # Chart 3: Spending Trend Over Time
-            story.append(Paragraph("📅 Spending Trends Over Time", styles['Heading3']))
-            trend_chart_buffer = create_spending_trend_chart(transactions, "Monthly Spending Patterns")
-            if trend_chart_buffer:
-                story.append(Spacer(1, 10))
-                trend_description = """
-                <b>Temporal Analysis:</b> Track your spending patterns over time to identify seasonal trends, 
-                spending spikes, and overall financial behavior patterns.
-                """
-                story.append(Paragraph(trend_description, body_style))
-                story.append(Spacer(1, 10))
-                
-                trend_chart_image = ReportLabImage(trend_chart_buffer, width=6.5*inch, height=4*inch)
-                story.append(trend_chart_image)
-                story.append(Spacer(1, 15))
-            
-            # Add comprehensive insights about all visualizations
-            total_spending = sum(category_totals.values())
-            top_category = max(category_totals.items(), key=lambda x: x[1])
-            top_percentage = (top_category[1] / total_spending) * 100
-            
-            insight_text = f"""
-            <b>📊 Visual Analytics Summary:</b><br/>
-            • <b>Primary Focus:</b> {top_category[0]} represents {top_percentage:.1f}% of total spending<br/>
-            • <b>Diversification:</b> Spending distributed across {len(category_totals)} categories<br/>
-            • <b>Total Volume:</b> ${total_spending:,.2f} analyzed across all transactions<br/>
-            • <b>Chart Types:</b> Clean pie chart, detailed breakdown, and trend analysis included<br/>
-            • <b>Insights:</b> Multiple visualization perspectives for comprehensive understanding
+            trend_description = """
+            <b>Temporal Analysis:</b> Track your spending patterns over time to identify seasonal trends, 
+            spending spikes, and overall financial behavior patterns.
             """
+            story.append(Paragraph(trend_description, body_style))
+            story.append(Spacer(1, 10))
             
-            insight_style = ParagraphStyle(
-                'ComprehensiveInsightStyle',
-                parent=styles['Normal'],
-                fontSize=11,
-                spaceAfter=15,
-                leftIndent=20,
-                rightIndent=20,
-                backColor=colors.HexColor('#f0f8ff'),
-                borderColor=colors.HexColor('#2E86AB'),
-                borderWidth=2,
-                borderPadding=15
-            )
-            
-            story.append(Paragraph(insight_text, insight_style))
-            
-        else:
-            # Fallback if no category data
-            story.append(Paragraph("📊 Chart visualizations unavailable - insufficient category data for meaningful analysis", body_style))
-        
-        # Enhanced Footer with action summary
-        story.append(Spacer(1, 30))
-        story.append(HRFlowable(width="100%", thickness=2, lineCap='round', color=colors.HexColor('#2E86AB')))
-        story.append(Spacer(1, 15))
-        
-        # Action summary
-        story.append(Paragraph("📋 Next Steps Summary", styles['Heading3']))
-        action_summary = f"""1. Implement high-priority recommendations for immediate impact
-2. Schedule monthly reviews to track progress
-3. Reassess SpendScore quarterly to measure improvement
-4. Consider professional consultation for complex optimizations"""
-        story.append(Paragraph(action_summary, body_style))
-        story.append(Spacer(1, 15))
-        
-        footer_text = """This comprehensive financial analysis was generated by the Verocta AI Financial Insight Platform. 
+            width, height = CHART_PLACEMENT['trend']
+            trend_chart_image = chart_flowable(trend_chart_buffer, width*inch, height*inch)
+            story.append(trend_chart_image)
+            story.append(Spacer(1, 15))
+        
+        # Add comprehensive insights about all visualizations
+        insight_text = f"""
+        <b>📊 Visual Analytics Summary:</b><br/>
+        • <b>Primary Focus:</b> {highlights['top_category']} represents {highlights['top_share']:.1f}% of total spending<br/>
+        • <b>Diversification:</b> Spending distributed across {highlights['category_count']} categories<br/>
+        • <b>Total Volume:</b> ${highlights['total_spending']:,.2f} analyzed across all transactions<br/>
+        • <b>Chart Types:</b> Clean pie chart, detailed breakdown, and trend analysis included<br/>
+        • <b>Insights:</b> Multiple visualization perspectives for comprehensive understanding
+        """
+        
+        story.append(Paragraph(insight_text, shared_styles['insight']))
+        
+    else:
+        # Fallback if no category data
+        story.append(Paragraph("📊 Chart visualizations unavailable - insufficient category data for meaningful analysis", body_style))
+    
+    # Enhanced Footer with action summary
+    story.append(Spacer(1, 30))
+    story.append(HRFlowable(width="100%", thickness=2, lineCap='round', color=theme.primary))
+    story.append(Spacer(1, 15))
+    
+    # Action summary
+    story.append(Paragraph("📋 Next Steps Summary", shared_styles['subheading']))
+    action_summary = "\n".join(f"{i}. {step}" for i, step in enumerate(model['next_steps'], 1))
+    story.append(Paragraph(action_summary, body_style))
+    story.append(Spacer(1, 15))
+    
+    footer_text = """This comprehensive financial analysis was generated by the Verocta AI Financial Insight Platform. 
 Report generated with OpenAI GPT-4o analysis engine. For questions or professional financial advice, 
 consult with your certified financial advisor."""
-        story.append(Paragraph(footer_text, styles['Normal']))
+    story.append(Paragraph(footer_text, shared_styles['normal']))
+    
+    if appendix_transactions:
+        add_transaction_appendix(story, appendix_transactions, theme)
+    
+    return story
+
+def build_report_story(analysis_data, transactions, company_name=None, logo_path=None, charts=None,
+                       chart_backend=None, include_appendix=False):
+    """Flowables for one report; generate_report_pdf and generate_combined_report_pdf lay them out
+    
+    charts: optional output of render_report_charts, rendered inline when omitted
+    chart_backend: backend for inline chart rendering (see render_report_charts)
+    include_appendix: append every transaction as a paginated ledger
+    """
+    model = build_report_model(analysis_data, transactions, company_name, logo_path)
+    return report_model_story(model, charts, chart_backend, transactions if include_appendix else None)
+
+def generate_report_pdf_with_stats(analysis_data, transactions, company_name=None, logo_path=None, charts=None,
+                                   output_path=None, chart_backend=None, include_appendix=False):
+    """Generate comprehensive PDF report with enhanced features; returns (pdf_path, stats)
+    
+    charts: optional output of render_report_charts, rendered inline when omitted
+    chart_backend: backend for inline chart rendering (see render_report_charts)
+    output_path: file path or writable binary buffer; defaults to a file in the report store (see generate_model_pdf_with_stats)
+    include_appendix: append every transaction as a paginated ledger
+    stats: page count, render seconds and appendix rows
+    """
+    model = build_report_model(analysis_data, transactions, company_name, logo_path)
+    return generate_model_pdf_with_stats(model, charts, output_path, chart_backend,
+                                         transactions if include_appendix else None)
+
+def model_pdf_hash(model, chart_backend=None, appendix_transactions=None):
+    """Content hash of a report model's PDF, naming it in the report store"""
+    payload = json.dumps({'model': model, 'chart_backend': chart_backend, 'appendix': appendix_transactions},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def generate_model_pdf_with_stats(model, charts=None, output_path=None, chart_backend=None, appendix_transactions=None):
+    """
+    Render a report model (see report_model) as a PDF; returns (pdf_path, stats)
+    Without output_path the PDF is written once per model to the report store, so concurrent renders never
+    share a file; nothing references it there, so it is pruned after the store's orphan grace period
+    """
+    if not output_path:
+        stats = {'reused': True}
+        
+        def write(path):
+            stats.update(generate_model_pdf_with_stats(model, charts, path, chart_backend, appendix_transactions)[1],
+                         reused=False)
+        
+        pdf_path = report_store.ensure_artifact(model_pdf_hash(model, chart_backend, appendix_transactions), 'pdf', write)
+        return pdf_path, stats
+    
+    try:
+        started = time.perf_counter()
+        pdf_path = output_path
+        
+        # Create PDF document with enhanced margins
+        doc = SimpleDocTemplate(
+            pdf_path, 
+            pagesize=A4, 
+            rightMargin=50, 
+            leftMargin=50,
+            topMargin=50, 
+            bottomMargin=50
+        )
         
         # Build PDF
-        doc.build(story)
+        doc.build(report_model_story(model, charts, chart_backend, appendix_transactions))
         
-        logging.info(f"PDF report generated successfully: {pdf_path}")
-        return pdf_path
+        stats = {
+            'pages': doc.page,
+            'render_seconds': round(time.perf_counter() - started, 3),
+            'appendix_rows': min(len(appendix_transactions), PDF_APPENDIX_MAX_ROWS) if appendix_transactions else 0
+        }
+        logging.info(f"PDF report generated successfully: {pdf_path} ({stats['pages']} pages in {stats['render_seconds']}s)")
+        return pdf_path, stats
         
     except Exception as e:
         logging.error(f"Error generating PDF report: {str(e)}")
         raise Exception(f"Failed to generate PDF report: {str(e)}")
 
+def generate_report_pdf(analysis_data, transactions, company_name=None, logo_path=None, charts=None,
+                        output_path=None, chart_backend=None, include_appendix=False):
+    """Generate comprehensive PDF report with enhanced features (see generate_report_pdf_with_stats)"""
+    pdf_path, _ = generate_report_pdf_with_stats(analysis_data, transactions, company_name, logo_path, charts,
+                                                 output_path, chart_backend, include_appendix)
+    return pdf_path
+
+class ReportBundleTemplate(SimpleDocTemplate):
+    """Document template that feeds report section titles to the table of contents and PDF outline"""
+    
+    def afterFlowable(self, flowable):
+        entry = getattr(flowable, 'toc_entry', None)
+        if entry:
+            key = f'report-{entry[0]}'
+            self.canv.bookmarkPage(key)
+            self.canv.addOutlineEntry(entry[1], key, level=0)
+            self.notify('TOCEntry', (0, entry[1], self.page, key))
+
+def generate_combined_report_pdf(reports, output_path, title="VeroctaAI Report Bundle", chart_backend=None):
+    """Generate one PDF holding several reports behind a table of contents
+    
+    reports: dicts with analysis_data, transactions and optional company_name, logo_path and title
+    """
+    try:
+        shared_styles = get_report_theme().styles
+        doc = ReportBundleTemplate(
+            output_path,
+            pagesize=A4,
+            rightMargin=50,
+            leftMargin=50,
+            topMargin=50,
+            bottomMargin=50,
+            title=title
+        )
+        
+        toc = TableOfContents()
+        toc.levelStyles = [shared_styles['toc_entry']]
+        story = [
+            Paragraph(title, shared_styles['title']),
+            Paragraph(f"{len(reports)} reports · Generated {datetime.now().strftime('%B %d, %Y at %I:%M %p')}",
+                      shared_styles['metadata']),
+            Spacer(1, 25),
+            Paragraph("Contents", shared_styles['heading']),
+            toc
+        ]
+        
+        for index, report in enumerate(reports, 1):
+            section_title = report.get('title') or report['analysis_data'].get('filename', f'Report {index}')
+            story.append(PageBreak())
+            section = Paragraph(f"{index}. {section_title}", shared_styles['heading'])
+            section.toc_entry = (index, f"{index}. {section_title}")
+            story.append(section)
+            story.extend(build_report_story(report['analysis_data'], report.get('transactions') or [],
+                                            report.get('company_name'), report.get('logo_path'),
+                                            chart_backend=chart_backend))
+        
+        # Two passes: the first finds the page numbers the table of contents points at
+        doc.multiBuild(story)
+        
+        logging.info(f"Combined PDF with {len(reports)} reports generated: {output_path}")
+        return output_path
+        
+    except Exception as e:
+        logging.error(f"Error generating combined PDF report: {str(e)}")
+        raise Exception(f"Failed to generate combined PDF report: {str(e)}")
+
 
 # Backward compatibility function
 def create_pie_chart(category_data, title="Spending by Category"):
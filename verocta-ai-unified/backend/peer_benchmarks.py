@@ -0,0 +1,271 @@
+"""
+VeroctaAI Peer Benchmarks
+Anonymized per-company metric store with sorted per-industry indexes
+for binary-search percentile ranking
+"""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Iterable
+
+from table_store import table_lock
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+# Append-only log of anonymized rows shared by every worker and kept across restarts (latest row per company wins)
+PEER_BENCHMARKS_PATH = os.environ.get(
+    'PEER_BENCHMARKS_PATH', os.path.join(basedir, 'outputs', 'peer_benchmarks.jsonl')
+)
+# The log is rewritten with one row per company once it holds this many times more rows than companies
+PEER_LOG_COMPACT_RATIO = 4
+
+ALL_INDUSTRIES = 'all'
+
+# Fall back to the all-industry index below this many peers (also limits re-identification)
+MIN_PEERS = int(os.environ.get('BENCHMARK_MIN_PEERS', '5'))
+# Secret salt for company ids; without one, analyses are ranked but never recorded
+BENCHMARK_SALT = os.environ.get('BENCHMARK_SALT') or os.environ.get('SESSION_SECRET')
+if not BENCHMARK_SALT:
+    logging.error("BENCHMARK_SALT (or SESSION_SECRET) is not set; peer benchmark rows will not be recorded")
+
+BENCHMARK_METRICS = (
+    'spend_score', 'frequency_score', 'category_diversity', 'budget_adherence',
+    'redundancy_detection', 'spike_detection', 'waste_ratio'
+)
+
+
+def anonymize_company(company: str) -> str:
+    """Salted hash so the store never holds company names; raises ValueError without a configured salt"""
+    if not BENCHMARK_SALT:
+        raise ValueError('BENCHMARK_SALT is not configured')
+    return hashlib.sha256(f"{BENCHMARK_SALT}:{company.strip().lower()}".encode('utf-8')).hexdigest()[:32]
+
+
+def normalize_industry(industry: Optional[str]) -> str:
+    return (industry or '').strip().lower() or 'unspecified'
+
+
+def extract_benchmark_metrics(enhanced_analysis: Dict[str, Any]) -> Dict[str, float]:
+    """Pull the benchmarked metric values out of get_enhanced_analysis output"""
+    individual = enhanced_analysis.get('score_breakdown', {}).get('individual_scores', {})
+    metrics = {'spend_score': enhanced_analysis.get('final_score')}
+    metrics.update({metric: individual.get(metric) for metric in BENCHMARK_METRICS[1:]})
+    return {metric: float(value) for metric, value in metrics.items() if value is not None}
+
+
+def _clean_record(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'industry': normalize_industry(item.get('industry')),
+        'metrics': {m: float(v) for m, v in item.get('metrics', {}).items() if m in BENCHMARK_METRICS},
+        'updated_at': item.get('updated_at', datetime.now().isoformat())
+    }
+
+
+class PeerBenchmarkStore:
+    """
+    Keeps one sorted value list per (metric, industry) so ranking is O(log n)
+    With a path, each recorded row is appended to a shared log; every worker reads only the lines added
+    since its last read and insorts them, so a new row never re-sorts or rewrites the whole table
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.log_id: Optional[int] = None  # inode of the log file read so far (changes on compaction)
+        self.offset = 0
+        self.log_rows = 0
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._sorted: Dict[tuple, List[float]] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def _read_rows(self, handle) -> List[Dict[str, Any]]:
+        """Complete lines from the handle's position; a line still being appended is left for the next read"""
+        rows = []
+        for line in handle:
+            if not line.endswith(b'\n'):
+                break
+            self.offset += len(line)
+            self.log_rows += 1
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                logging.error(f"Skipping invalid peer benchmark row in {self.path}")
+        return rows
+
+    def refresh(self) -> None:
+        """Apply rows other workers appended since this process last read the log (all of them after a compaction)"""
+        if not self.path:
+            return
+        with self._refresh_lock:
+            try:
+                handle = open(self.path, 'rb')
+            except FileNotFoundError:
+                return
+            with handle:
+                stat = os.fstat(handle.fileno())
+                if stat.st_ino != self.log_id or stat.st_size < self.offset:
+                    # First read, or the log was compacted: load it whole and sort each index once
+                    self.log_id, self.offset, self.log_rows = stat.st_ino, 0, 0
+                    self.bulk_load(self._read_rows(handle), replace=True)
+                elif stat.st_size > self.offset:
+                    handle.seek(self.offset)
+                    for row in self._read_rows(handle):
+                        self._replace(row['company_id'], _clean_record(row))
+
+    def _index_keys(self, metric: str, industry: str):
+        return ((metric, industry), (metric, ALL_INDUSTRIES))
+
+    def _remove(self, record: Dict[str, Any]):
+        for metric, value in record['metrics'].items():
+            for key in self._index_keys(metric, record['industry']):
+                values = self._sorted.get(key)
+                if values:
+                    position = bisect_left(values, value)
+                    if position < len(values) and values[position] == value:
+                        del values[position]
+
+    def _insert(self, record: Dict[str, Any]):
+        for metric, value in record['metrics'].items():
+            for key in self._index_keys(metric, record['industry']):
+                insort(self._sorted.setdefault(key, []), value)
+
+    def record(self, company: str, industry: Optional[str], metrics: Dict[str, float]) -> str:
+        """Add or replace a company's latest metric values (one row per company)"""
+        company_id = anonymize_company(company)
+        record = _clean_record({'industry': industry, 'metrics': metrics})
+        if not self.path:
+            self._replace(company_id, record)
+            return company_id
+
+        # The lock only orders appends against compaction; each append is one short write
+        with table_lock(self.path):
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(dict(record, company_id=company_id)) + '\n')
+            self.refresh()
+            if self.log_rows > PEER_LOG_COMPACT_RATIO * max(len(self._records), 256):
+                self._compact()
+        return company_id
+
+    def _compact(self):
+        """Rewrite the log with one row per company (called under the table lock, after a refresh)"""
+        directory = os.path.dirname(self.path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                with self._lock:
+                    for company_id, record in self._records.items():
+                        f.write(json.dumps(dict(record, company_id=company_id)) + '\n')
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        logging.info(f"Compacted peer benchmark log to {len(self._records)} rows")
+        self.refresh()
+
+    def _replace(self, company_id: str, record: Dict[str, Any]):
+        with self._lock:
+            previous = self._records.get(company_id)
+            if previous:
+                self._remove(previous)
+            self._records[company_id] = record
+            self._insert(record)
+
+    def bulk_load(self, records: Iterable[Dict[str, Any]], replace: bool = False) -> int:
+        """Load many anonymized records and sort each index once; replace drops the current rows first"""
+        count = 0
+        with self._lock:
+            if replace:
+                self._records = {}
+            for item in records:
+                company_id = item.get('company_id') or anonymize_company(item['company'])
+                self._records[company_id] = _clean_record(item)
+                count += 1
+
+            self._sorted = {}
+            for record in self._records.values():
+                for metric, value in record['metrics'].items():
+                    for key in self._index_keys(metric, record['industry']):
+                        self._sorted.setdefault(key, []).append(value)
+            for values in self._sorted.values():
+                values.sort()
+
+        logging.info(f"Loaded {count} peer benchmark records")
+        return count
+
+    def percentile(self, metric: str, value: float, industry: Optional[str] = None,
+                   exclude_company: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Percentile rank of a value among peers (mid-rank for ties)"""
+        industry = normalize_industry(industry)
+        with self._lock:
+            values = self._sorted.get((metric, industry), [])
+            scope = industry
+            if len(values) < MIN_PEERS:
+                values = self._sorted.get((metric, ALL_INDUSTRIES), [])
+                scope = ALL_INDUSTRIES
+
+            below = bisect_left(values, value)
+            equal = bisect_right(values, value) - below
+            peers = len(values)
+
+            # Do not rank a company against its own stored value
+            if exclude_company:
+                own = self._records.get(anonymize_company(exclude_company))
+                own_value = own['metrics'].get(metric) if own else None
+                if own_value is not None and (scope == ALL_INDUSTRIES or own['industry'] == scope):
+                    peers -= 1
+                    if own_value < value:
+                        below -= 1
+                    elif own_value == value:
+                        equal -= 1
+
+        if peers < MIN_PEERS:
+            return None
+
+        return {
+            'percentile': round(100.0 * (below + 0.5 * equal) / peers, 1),
+            'peers': peers,
+            'industry': scope
+        }
+
+    def percentiles(self, metrics: Dict[str, float], industry: Optional[str] = None,
+                    exclude_company: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Percentile ranks for every benchmarked metric that has enough peers"""
+        self.refresh()
+        results = {}
+        for metric, value in metrics.items():
+            ranked = self.percentile(metric, value, industry, exclude_company)
+            if ranked is not None:
+                results[metric] = ranked
+        return results
+
+    def summary(self) -> Dict[str, int]:
+        """Peer counts per industry"""
+        self.refresh()
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for record in self._records.values():
+                counts[record['industry']] = counts.get(record['industry'], 0) + 1
+            return counts
+
+
+benchmark_store = PeerBenchmarkStore(PEER_BENCHMARKS_PATH)
+benchmark_store.refresh()
+
+
+def rank_against_peers(company: Optional[str], industry: Optional[str],
+                       enhanced_analysis: Dict[str, Any], record: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    Rank an analysis against peers, then store it as the company's latest values
+    company must be the authenticated user's company; without one the analysis is ranked but not recorded
+    """
+    metrics = extract_benchmark_metrics(enhanced_analysis)
+    company = company if BENCHMARK_SALT else None
+    results = benchmark_store.percentiles(metrics, industry, exclude_company=company)
+    if record and company:
+        benchmark_store.record(company, industry, metrics)
+    return results
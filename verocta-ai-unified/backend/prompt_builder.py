@@ -0,0 +1,204 @@
+"""
+VeroctaAI Prompt Builder
+Token-budgeted transaction summaries for GPT insight prompts
+"""
+
+import os
+import re
+import math
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+
+from transaction_aggregates import TransactionAggregates
+
+# tiktoken gives exact counts; without it a conservative character estimate is used
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Total input budget: system prompt + template + transaction summary
+PROMPT_TOKEN_BUDGET = int(os.environ.get('PROMPT_TOKEN_BUDGET', '2500'))
+PROMPT_NAME_MAX_CHARS = int(os.environ.get('PROMPT_NAME_MAX_CHARS', '40'))
+
+# Chat message framing overhead per request
+MESSAGE_OVERHEAD_TOKENS = 12
+CHARS_PER_TOKEN_ESTIMATE = 3.5
+
+# Summary detail levels, most detailed first; the first one that fits the budget is used
+SUMMARY_LEVELS = (
+    {'categories': 10, 'vendors': 15, 'subscriptions': 10, 'outliers': 5, 'months': 6, 'name_chars': 40},
+    {'categories': 8, 'vendors': 10, 'subscriptions': 5, 'outliers': 3, 'months': 6, 'name_chars': 32},
+    {'categories': 5, 'vendors': 6, 'subscriptions': 3, 'outliers': 3, 'months': 3, 'name_chars': 24},
+    {'categories': 3, 'vendors': 3, 'subscriptions': 0, 'outliers': 0, 'months': 0, 'name_chars': 16},
+)
+
+_encodings: Dict[str, Any] = {}
+
+
+def _get_encoding(model: str):
+    if tiktoken is None:
+        return None
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except Exception:
+            try:
+                _encodings[model] = tiktoken.get_encoding('o200k_base')
+            except Exception as e:
+                logging.warning(f"tiktoken encoding unavailable, estimating tokens: {str(e)}")
+                _encodings[model] = None
+    return _encodings[model]
+
+
+def token_counter_name(model: str) -> str:
+    return 'tiktoken' if _get_encoding(model) is not None else 'estimate'
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Count tokens locally with tiktoken, or estimate from length when it is not installed"""
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN_ESTIMATE)
+
+
+def truncate_name(name: Any, max_chars: int) -> Tuple[str, bool]:
+    """Collapse whitespace and cut long vendor/category names; returns (name, truncated)"""
+    text = re.sub(r'\s+', ' ', str(name if name is not None else 'Unknown')).strip() or 'Unknown'
+    if len(text) <= max_chars:
+        return text, False
+    return text[:max_chars - 1].rstrip() + '…', True
+
+
+def render_transaction_summary(aggregates: TransactionAggregates, level: Dict[str, int],
+                               name_max_chars: int = PROMPT_NAME_MAX_CHARS,
+                               rollup: bool = True) -> Tuple[str, Dict[str, int]]:
+    """Render the summary at one detail level; with rollup the long tail is folded into Other lines"""
+    total_amount = aggregates.total_amount
+    avg_amount = aggregates.mean_amount
+    name_chars = min(level['name_chars'], name_max_chars)
+    stats = {'truncated_names': 0, 'collapsed_categories': 0, 'collapsed_vendors': 0}
+
+    def name(value):
+        text, truncated = truncate_name(value, name_chars)
+        stats['truncated_names'] += truncated
+        return text
+
+    def share(amount):
+        return (amount / total_amount) * 100 if total_amount else 0.0
+
+    categories = sorted(aggregates.category_spending.items(), key=lambda x: x[1], reverse=True)
+    vendors = sorted(aggregates.vendor_spending.items(), key=lambda x: x[1], reverse=True)
+    top_categories, other_categories = categories[:level['categories']], categories[level['categories']:]
+    top_vendors, other_vendors = vendors[:level['vendors']], vendors[level['vendors']:]
+
+    formatted_data = f"""
+    ENHANCED FINANCIAL DATA ANALYSIS REQUEST
+    
+    Executive Summary:
+    - Total Transactions: {aggregates.count:,}
+    - Total Amount: ${total_amount:,.2f}
+    - Average Transaction: ${avg_amount:,.2f}
+    - Unique Vendors: {len(aggregates.vendor_spending)}
+    - Unique Categories: {len(aggregates.category_spending)}
+    
+    Top Spending Categories (with optimization potential):
+    """
+
+    for category, amount in top_categories:
+        transaction_count = aggregates.category_counts.get(category, 0)
+        avg_per_category = amount / transaction_count if transaction_count > 0 else 0
+        formatted_data += f"- {name(category)}: ${amount:,.2f} ({share(amount):.1f}%) | {transaction_count} transactions | Avg: ${avg_per_category:,.2f}\n"
+    if other_categories and rollup:
+        other_amount = sum(amount for _, amount in other_categories)
+        other_count = sum(aggregates.category_counts.get(category, 0) for category, _ in other_categories)
+        stats['collapsed_categories'] = len(other_categories)
+        formatted_data += f"- Other ({len(other_categories)} categories): ${other_amount:,.2f} ({share(other_amount):.1f}%) | {other_count} transactions\n"
+
+    formatted_data += "\nTop Vendors by Spend (consolidation opportunities):\n"
+    for vendor, amount in top_vendors:
+        frequency = aggregates.vendor_frequency.get(vendor, 0)
+        formatted_data += f"- {name(vendor)}: ${amount:,.2f} ({share(amount):.1f}%) | {frequency} transactions\n"
+    if other_vendors and rollup:
+        other_amount = sum(amount for _, amount in other_vendors)
+        other_count = sum(aggregates.vendor_frequency.get(vendor, 0) for vendor, _ in other_vendors)
+        stats['collapsed_vendors'] = len(other_vendors)
+        formatted_data += f"- Other ({len(other_vendors)} vendors): ${other_amount:,.2f} ({share(other_amount):.1f}%) | {other_count} transactions\n"
+
+    # Identify recurring subscriptions (vendors with regular amounts)
+    likely_subscriptions = []
+    for vendor, total_spent in top_vendors[:level['subscriptions']]:
+        frequency = aggregates.vendor_frequency.get(vendor, 0)
+        if frequency >= 2:  # Appears multiple times
+            likely_subscriptions.append((vendor, total_spent, frequency, total_spent / frequency))
+    if likely_subscriptions:
+        formatted_data += "\nLikely Recurring Subscriptions/Services:\n"
+        for vendor, total, freq, avg in likely_subscriptions:
+            formatted_data += f"- {name(vendor)}: ${avg:,.2f}/transaction × {freq} times = ${total:,.2f} total\n"
+
+    # Add outlier analysis
+    high_value_threshold = avg_amount * 3  # Transactions 3x above average
+    outliers = [t for t in aggregates.largest_transactions() if t.get('amount', 0) > high_value_threshold]
+    outliers = outliers[:level['outliers']]
+    if outliers:
+        formatted_data += f"\nHigh-Value Outliers (>${high_value_threshold:,.2f}+):\n"
+        for transaction in outliers:
+            formatted_data += f"- {name(transaction.get('vendor', 'Unknown'))}: ${transaction.get('amount', 0):,.2f} ({name(transaction.get('category', 'Uncategorized'))})\n"
+
+    # Monthly spending patterns
+    monthly_patterns = aggregates.monthly_spending
+    if len(monthly_patterns) > 1 and level['months']:
+        formatted_data += "\nMonthly Spending Patterns:\n"
+        for month, amount in sorted(monthly_patterns.items())[-level['months']:]:
+            formatted_data += f"- {month}: ${amount:,.2f}\n"
+
+    return formatted_data, stats
+
+
+def build_transaction_summary(aggregates: TransactionAggregates, model: str,
+                              token_budget: Optional[int] = None,
+                              name_max_chars: int = PROMPT_NAME_MAX_CHARS) -> Tuple[str, Dict[str, Any]]:
+    """Most detailed summary whose token count fits the data budget, plus a token report"""
+    formatted_data, stats, tokens, level_index = '', {}, 0, 0
+    for level_index, level in enumerate(SUMMARY_LEVELS):
+        # The most detailed level is the original prompt; Other lines only appear once the budget cut detail
+        formatted_data, stats = render_transaction_summary(aggregates, level, name_max_chars, rollup=level_index > 0)
+        tokens = count_tokens(formatted_data, model)
+        if token_budget is None or tokens <= token_budget:
+            break
+    else:
+        logging.warning(f"Transaction summary uses {tokens} tokens, over the {token_budget} token budget")
+
+    report = {
+        'data_tokens': tokens,
+        'data_token_budget': token_budget,
+        'summary_level': level_index,
+        'token_counter': token_counter_name(model)
+    }
+    report.update(stats)
+    return formatted_data, report
+
+
+def build_insight_messages(aggregates: TransactionAggregates, model: str, system_prompt: str,
+                           template: str, token_budget: int = PROMPT_TOKEN_BUDGET) -> Tuple[List[Dict[str, str]], str, Dict[str, Any]]:
+    """
+    Chat messages for an insight request fitted to the total input token budget
+    Returns (messages, transaction summary, token report)
+    """
+    fixed_tokens = (count_tokens(system_prompt, model) + count_tokens(template, model)
+                    + count_tokens('\n\nTRANSACTION DATA:\n', model) + MESSAGE_OVERHEAD_TOKENS)
+    data_budget = max(token_budget - fixed_tokens, 0)
+
+    transaction_data, report = build_transaction_summary(aggregates, model, data_budget)
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"{template}\n\nTRANSACTION DATA:\n{transaction_data}"}
+    ]
+    report.update({
+        'input_tokens': fixed_tokens + report['data_tokens'],
+        'input_token_budget': token_budget
+    })
+    return messages, transaction_data, report
@@ -0,0 +1,85 @@
+"""
+VeroctaAI Prompt Templates
+Module-relative, mtime-invalidated, versioned prompt templates
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+PROMPTS_DIR = os.environ.get('PROMPTS_DIR', os.path.join(basedir, 'prompts'))
+INSIGHT_PROMPT_TEMPLATE = os.environ.get('INSIGHT_PROMPT_TEMPLATE', 'insight_prompt_v2.txt')
+
+# Used only when the template file is missing; logged loudly so it is never silent
+FALLBACK_INSIGHT_PROMPT = """
+        You are a financial advisor analyzing business expense data.
+        Based on the transaction data provided, generate exactly 3 actionable suggestions
+        to reduce unnecessary expenses or optimize spending.
+
+        Each suggestion should have:
+        - A priority level: "High", "Medium", or "Low"
+        - Specific, actionable text (not vague summaries)
+        - Business-aware language appropriate for a financial platform
+
+        Return your response as JSON in this exact format:
+        {
+            "suggestions": [
+                {"priority": "High", "text": "Specific actionable suggestion"},
+                {"priority": "Medium", "text": "Specific actionable suggestion"},
+                {"priority": "Low", "text": "Specific actionable suggestion"}
+            ]
+        }
+
+        Focus on identifying patterns, unusual expenses, potential savings opportunities,
+        and vendor optimization based on the actual data provided.
+        """
+
+
+class PromptTemplate:
+    def __init__(self, name: str, text: str, path: Optional[str] = None, mtime: Optional[float] = None):
+        self.name = name
+        self.text = text
+        self.path = path
+        self.mtime = mtime
+        # Template name plus content hash: edits change the version even without a rename
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]
+        self.version = f"{os.path.splitext(name)[0]}:{digest}"
+
+    def to_dict(self) -> Dict[str, object]:
+        return {'name': self.name, 'version': self.version, 'path': self.path, 'mtime': self.mtime}
+
+
+_templates: Dict[str, PromptTemplate] = {}
+_templates_lock = threading.Lock()
+
+
+def resolve_template_path(name: str) -> str:
+    return name if os.path.isabs(name) else os.path.join(PROMPTS_DIR, name)
+
+
+def get_prompt_template(name: str = INSIGHT_PROMPT_TEMPLATE) -> PromptTemplate:
+    """Cached template, re-read only when the file's mtime changes"""
+    path = resolve_template_path(name)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+
+    with _templates_lock:
+        cached = _templates.get(path)
+        if cached is not None and cached.mtime == mtime:
+            return cached
+
+        if mtime is None:
+            logging.warning(f"Prompt template {path} not found - using built-in fallback prompt")
+            template = PromptTemplate('inline_fallback', FALLBACK_INSIGHT_PROMPT, None, None)
+        else:
+            with open(path, 'r') as f:
+                template = PromptTemplate(os.path.basename(path), f.read(), path, mtime)
+            logging.info(f"Loaded prompt template {template.version}")
+
+        _templates[path] = template
+        return template
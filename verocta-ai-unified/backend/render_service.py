@@ -0,0 +1,529 @@
+"""
+VeroctaAI Render Service
+PDF reports rendered by a pool of long-lived, preloaded processes behind a local job queue
+"""
+
+import io
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import logging
+import zipfile
+import threading
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+from report_store import report_store, report_content_hash
+from pdf_generator import ChartCache, resolve_chart_backend
+from report_theme import get_report_theme, report_theme_fingerprint
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+# 'process' renders in the process pool; 'inline' renders on a background thread of this process
+RENDER_MODES = ('process', 'inline')
+PDF_RENDER_MODE = os.environ.get('PDF_RENDER_MODE', 'process').strip().lower()
+PDF_RENDER_WORKERS = int(os.environ.get('PDF_RENDER_WORKERS', '2'))
+# Render processes are replaced after this many reports to cap memory growth (0 keeps them forever)
+PDF_RENDER_MAX_TASKS = int(os.environ.get('PDF_RENDER_MAX_TASKS', '200'))
+# Downloads answer 202 with the render job; a request may opt in to waiting (?wait=seconds) up to this long
+PDF_RENDER_WAIT = float(os.environ.get('PDF_RENDER_WAIT', '30'))
+# Finished render jobs are forgotten after this many seconds
+RENDER_JOB_TTL = float(os.environ.get('RENDER_JOB_TTL', '3600'))
+# 'disk' keeps saved-report PDFs in the report store; 'memory' renders them in the request into buffers kept
+# in a per-process LRU (no job, so any worker can answer: a miss in this worker just renders again)
+PDF_STORAGE = os.environ.get('PDF_STORAGE', 'disk').strip().lower()
+PDF_MEMORY_CACHE_BYTES = int(os.environ.get('PDF_MEMORY_CACHE_BYTES', str(32 * 1024 * 1024)))
+# Render analysis PDFs at upload; otherwise they render from the stored report model on first download
+# (uploads asking for the transaction appendix always render at upload, the model has no transactions)
+PDF_RENDER_ON_UPLOAD = os.environ.get('PDF_RENDER_ON_UPLOAD', 'false').strip().lower() in ('1', 'true', 'yes')
+RENDER_JOBS_DIR = os.environ.get('RENDER_JOBS_DIR', os.path.join(basedir, 'outputs', 'render_jobs'))
+
+RENDER_JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+EXPORT_FORMATS = ('zip', 'pdf')
+
+
+def _init_render_process():
+    """Runs once per render process: build the default report theme and load matplotlib up front"""
+    from io import BytesIO
+    import pdf_generator
+
+    get_report_theme()
+    if pdf_generator.CHART_BACKEND == 'matplotlib':
+        # Importing pyplot builds the font cache; one tiny render warms the Agg text path
+        plt = pdf_generator._load_pyplot()
+        fig, ax = plt.subplots(figsize=(1, 1))
+        ax.set_title('$0')
+        fig.savefig(BytesIO(), format='png', dpi=10)
+        plt.close(fig)
+    logging.info(f"Render process {os.getpid()} ready")
+
+
+def _generate_report(payload: Dict[str, Any], output_path, charts=None) -> Dict[str, Any]:
+    from pdf_generator import generate_report_pdf_with_stats, generate_model_pdf_with_stats
+
+    if payload.get('model') is not None:
+        _, stats = generate_model_pdf_with_stats(payload['model'], charts, output_path, payload['chart_backend'])
+        return stats
+    _, stats = generate_report_pdf_with_stats(payload['analysis_data'], payload['transactions'],
+                                              payload['company_name'], payload['logo_path'], charts=charts,
+                                              output_path=output_path, chart_backend=payload['chart_backend'],
+                                              include_appendix=payload.get('appendix', False))
+    return stats
+
+
+def _render_report(payload: Dict[str, Any], output_path: Optional[str] = None) -> Tuple[int, Optional[bytes], Dict]:
+    """Runs in a render process; without output_path the PDF comes back as bytes. Returns (pid, bytes, stats)"""
+    target = output_path or io.BytesIO()
+    stats = _generate_report(payload, target)
+    return os.getpid(), None if output_path else target.getvalue(), stats
+
+
+def _render_bundle(payload: Dict[str, Any], output_path: str) -> Tuple[int, None, Dict]:
+    """Runs in a render process: several reports in one PDF behind a table of contents"""
+    from pdf_generator import generate_combined_report_pdf
+
+    generate_combined_report_pdf(payload['reports'], output_path, payload['title'],
+                                 chart_backend=payload['chart_backend'])
+    return os.getpid(), None, {}
+
+
+def report_render_options(chart_backend: Optional[str] = None, appendix: bool = False,
+                          company_name: Optional[str] = None) -> Dict[str, Any]:
+    """Rendering choices that change a report's PDF, and so its content hash"""
+    options = {'chart_backend': resolve_chart_backend(chart_backend)}
+    if appendix:
+        options['appendix'] = True
+    # A company theme edit changes the PDF; reports on the default theme keep their hashes
+    theme = report_theme_fingerprint(company_name)
+    if theme:
+        options['theme'] = theme
+    return options
+
+
+def report_etag(analysis_data: Dict[str, Any], transactions: List[Dict[str, Any]],
+                company_name: Optional[str] = None, logo_path: Optional[str] = None,
+                chart_backend: Optional[str] = None, appendix: bool = False) -> str:
+    """Content hash identifying a report's PDF; known before rendering, so it doubles as the HTTP ETag"""
+    return report_content_hash(analysis_data, transactions, company_name, logo_path,
+                               report_render_options(chart_backend, appendix, company_name))
+
+
+class RenderService:
+    """Job queue in front of the render processes; jobs persist to disk so any web worker can answer polls"""
+
+    def __init__(self, mode: str = PDF_RENDER_MODE, workers: int = PDF_RENDER_WORKERS,
+                 max_tasks: int = PDF_RENDER_MAX_TASKS, jobs_dir: str = RENDER_JOBS_DIR, store=None):
+        if mode not in RENDER_MODES:
+            raise ValueError(f"Unknown PDF render mode {mode!r}; expected one of {', '.join(RENDER_MODES)}")
+        self.mode = mode
+        self.workers = max(workers, 1)
+        self.max_tasks = max_tasks
+        self.jobs_dir = jobs_dir
+        self.store = store or report_store
+        # One dispatcher thread per render process waits on its result, never a request thread
+        self.dispatcher = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='verocta-render')
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        # Queued or running on-demand PDF jobs by content hash, so repeat downloads share one render
+        self.pending: Dict[str, str] = {}
+        # PDFs rendered for 'memory' storage (see render_pdf_bytes), keyed by content hash
+        self.buffers = ChartCache(PDF_MEMORY_CACHE_BYTES)
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'pool_restarts': 0}
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+
+    @property
+    def uses_processes(self) -> bool:
+        return self.mode == 'process'
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: forking a threaded web worker can deadlock; children import only what they need
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_render_process,
+                    max_tasks_per_child=self.max_tasks or None
+                )
+            return self._pool
+
+    def _reset_pool(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+        with self._lock:
+            self.stats['pool_restarts'] += 1
+
+    def _render_in_pool(self, task, payload: Dict[str, Any], output_path: Optional[str], job: Dict[str, Any]):
+        for attempt in range(2):
+            try:
+                pid, data, stats = self._get_pool().submit(task, payload, output_path).result()
+                job.setdefault('render_pids', []).append(pid)
+                self._record_render_stats(job, stats)
+                return data
+            except BrokenProcessPool:
+                # A render process died (OOM, segfault); replace the pool and retry once
+                logging.error("Render process pool broke; restarting it")
+                self._reset_pool()
+                if attempt:
+                    raise
+
+    def _report_renderer(self, payload: Dict[str, Any], job: Dict[str, Any], charts=None):
+        """render(path) for one report, in the pool or on the calling thread"""
+        if self.uses_processes:
+            return lambda path: self._render_in_pool(_render_report, payload, path, job)
+
+        return lambda path: self._record_render_stats(job, _generate_report(payload, path, charts))
+
+    def _record_render_stats(self, job: Dict[str, Any], stats: Dict[str, Any]):
+        """Add a rendered document's page count and appendix rows to its job (summed across export reports)"""
+        with self._lock:
+            for key in ('pages', 'appendix_rows'):
+                if key in stats:
+                    job[key] = job.get(key, 0) + stats[key]
+
+    def _render_bytes(self, payload: Dict[str, Any], job: Dict[str, Any], charts=None) -> bytes:
+        """One report rendered into memory, in the pool or on the calling thread"""
+        if self.uses_processes:
+            return self._render_in_pool(_render_report, payload, None, job)
+
+        buffer = io.BytesIO()
+        self._report_renderer(payload, job, charts)(buffer)
+        return buffer.getvalue()
+
+    def _bundle_renderer(self, payload: Dict[str, Any], job: Dict[str, Any]):
+        if self.uses_processes:
+            return lambda path: self._render_in_pool(_render_bundle, payload, path, job)
+
+        from pdf_generator import generate_combined_report_pdf
+        return lambda path: generate_combined_report_pdf(payload['reports'], path, payload['title'],
+                                                         chart_backend=payload['chart_backend'])
+
+    def _zip_renderer(self, payload: Dict[str, Any], job: Dict[str, Any]):
+        """render(path) that renders every report in parallel, reusing stored PDFs, then zips them"""
+        def render_one(report):
+            report_payload = {
+                'analysis_data': report['analysis_data'],
+                'transactions': report.get('transactions') or [],
+                'company_name': report.get('company_name'),
+                'logo_path': report.get('logo_path'),
+                'chart_backend': payload['chart_backend']
+            }
+            return self.store.ensure_artifact(report['content_hash'], 'pdf', self._report_renderer(report_payload, job))
+
+        def render(path):
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='verocta-export') as fan_out:
+                pdf_paths = list(fan_out.map(render_one, payload['reports']))
+            # PDFs are already compressed; store them as-is
+            with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) as archive:
+                for report, pdf_path in zip(payload['reports'], pdf_paths):
+                    archive.write(pdf_path, report['filename'])
+        return render
+
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f'{job_id}.json')
+
+    def _save_job(self, job: Dict[str, Any]):
+        """Persist job state atomically so any worker process can answer status polls"""
+        with self._lock:
+            self.jobs[job['id']] = job
+            try:
+                os.makedirs(self.jobs_dir, exist_ok=True)
+                tmp_path = f"{self._job_path(job['id'])}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(job, f, default=str)
+                os.replace(tmp_path, self._job_path(job['id']))
+            except OSError as e:
+                logging.warning(f"Could not persist render job {job['id']}: {str(e)}")
+
+    def _expire_jobs(self):
+        """Drop finished jobs past RENDER_JOB_TTL from memory, and their files, at most once a minute"""
+        now = time.time()
+        with self._lock:
+            if now - self._last_sweep < 60:
+                return
+            self._last_sweep = now
+            cutoff = datetime.fromtimestamp(now - RENDER_JOB_TTL).isoformat()
+            for job_id in [job_id for job_id, job in self.jobs.items()
+                           if job.get('completed_at') and job['completed_at'] < cutoff]:
+                del self.jobs[job_id]
+        try:
+            for name in os.listdir(self.jobs_dir):
+                path = os.path.join(self.jobs_dir, name)
+                if now - os.path.getmtime(path) > RENDER_JOB_TTL:
+                    os.remove(path)
+        except OSError as e:
+            logging.warning(f"Could not prune render jobs: {str(e)}")
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job state from memory, falling back to the persisted copy"""
+        if not RENDER_JOB_ID_PATTERN.match(job_id or ''):
+            return None
+        with self._lock:
+            job = self.jobs.get(job_id)
+        if job is not None:
+            return dict(job)
+        try:
+            with open(self._job_path(job_id), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Poll until the job finishes or timeout seconds pass"""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get_job(job_id)
+            if job is None or job['status'] in ('completed', 'failed') or time.monotonic() >= deadline:
+                return job
+            time.sleep(0.05)
+
+    def _run_job(self, job: Dict[str, Any], payload: Dict[str, Any], charts=None):
+        job.update({'status': 'running', 'started_at': datetime.now().isoformat()})
+        self._save_job(job)
+        started = time.perf_counter()
+        try:
+            content_hash = job['content_hash']
+            if job['kind'] == 'export':
+                render = (self._zip_renderer if job['format'] == 'zip' else self._bundle_renderer)(payload, job)
+                self.store.ensure_artifact(content_hash, job['artifact_kind'], render)
+                self.store.pin_artifact(content_hash, RENDER_JOB_TTL)
+            elif payload.get('model') is not None:
+                self.store.add_artifact(job['analysis_id'], 'pdf', self._report_renderer(payload, job), content_hash)
+            elif job['analysis_id']:
+                record = self.store.save_report(job['analysis_id'], payload['analysis_data'], payload['transactions'],
+                                                payload['company_name'], payload['logo_path'],
+                                                render_pdf=self._report_renderer(payload, job, charts),
+                                                render_options=report_render_options(payload['chart_backend'],
+                                                                                     payload['appendix'],
+                                                                                     payload['company_name']))
+                content_hash = record['content_hash']
+            else:
+                self.store.ensure_artifact(content_hash, 'pdf', self._report_renderer(payload, job, charts))
+
+            job.update({
+                'status': 'completed',
+                'content_hash': content_hash,
+                'pdf_available': self._is_rendered(job, content_hash),
+                'render_seconds': round(time.perf_counter() - started, 3)
+            })
+            with self._lock:
+                self.stats['completed'] += 1
+        except Exception as e:
+            logging.error(f"Render job {job['id']} failed: {str(e)}")
+            job.update({'status': 'failed', 'error': str(e)[:500]})
+            with self._lock:
+                self.stats['failed'] += 1
+        job['completed_at'] = datetime.now().isoformat()
+        self._save_job(job)
+        with self._lock:
+            if self.pending.get(job['content_hash']) == job['id']:
+                del self.pending[job['content_hash']]
+
+    def _is_rendered(self, job: Dict[str, Any], content_hash: str) -> bool:
+        return os.path.exists(self.store.artifact_path(content_hash, job['artifact_kind']))
+
+    def _buffered_pdf(self, content_hash: str, payload: Dict[str, Any]) -> bytes:
+        """The PDF for content_hash from this process's buffers, rendered now (in the pool or inline) on a miss"""
+        data = self.buffers.get(content_hash)
+        if data is None:
+            data = self._render_bytes(payload, {})
+            self.buffers.set(content_hash, data)
+        return data
+
+    def render_pdf_bytes(self, analysis_data: Dict[str, Any], transactions: List[Dict[str, Any]],
+                         company_name: Optional[str] = None, logo_path: Optional[str] = None,
+                         chart_backend: Optional[str] = None, appendix: bool = False) -> Tuple[str, bytes]:
+        """(content hash, PDF bytes) for a report kept in memory ('memory' storage); never touches the report store"""
+        chart_backend = resolve_chart_backend(chart_backend)
+        content_hash = report_etag(analysis_data, transactions, company_name, logo_path, chart_backend, appendix)
+        return content_hash, self._buffered_pdf(content_hash, {
+            'analysis_data': analysis_data,
+            'transactions': transactions,
+            'company_name': company_name,
+            'logo_path': logo_path,
+            'chart_backend': chart_backend,
+            'appendix': appendix
+        })
+
+    def render_analysis_pdf_bytes(self, record: Dict[str, Any]) -> Optional[Tuple[str, bytes]]:
+        """(PDF hash, PDF bytes) of a stored analysis rendered from its report model into memory; None without a model"""
+        model = self.store.load_model(record['analysis_id'])
+        if not model:
+            return None
+        pdf_hash = self.analysis_pdf_hash(record)
+        return pdf_hash, self._buffered_pdf(pdf_hash, {
+            'model': model,
+            'chart_backend': resolve_chart_backend(record.get('render_options', {}).get('chart_backend'))
+        })
+
+    def _enqueue(self, job: Dict[str, Any], payload: Dict[str, Any], charts=None) -> Dict[str, Any]:
+        job.update({
+            'status': 'queued',
+            'mode': self.mode,
+            'created_at': datetime.now().isoformat(),
+            'started_at': None,
+            'completed_at': None,
+            'pdf_available': False,
+            'error': None
+        })
+        with self._lock:
+            self.stats['submitted'] += 1
+        self._expire_jobs()
+        # Already rendered: refresh the stored copy and skip the queue; if a prune removed it meanwhile, render it again
+        if job['analysis_id'] is None and self._is_rendered(job, job['content_hash']) and \
+                self.store.touch_artifact(job['content_hash'], job['artifact_kind']):
+            job.update({'status': 'completed', 'pdf_available': True, 'completed_at': job['created_at']})
+            self._save_job(job)
+            return dict(job)
+        self._save_job(job)
+        self.dispatcher.submit(self._run_job, job, payload, charts)
+        return dict(job)
+
+    def submit(self, analysis_data: Dict[str, Any], transactions: List[Dict[str, Any]],
+               company_name: Optional[str] = None, logo_path: Optional[str] = None,
+               chart_backend: Optional[str] = None, analysis_id: Optional[str] = None,
+               charts=None, appendix: bool = False) -> Dict[str, Any]:
+        """
+        Queue a PDF render and return the job immediately
+        With analysis_id the analysis record is updated to point at the PDF when it is ready;
+        charts (pre-rendered in this process) are only used in inline mode
+        appendix=True appends every transaction as a paginated ledger
+        """
+        chart_backend = resolve_chart_backend(chart_backend)
+        job = {
+            'id': uuid.uuid4().hex,
+            'kind': 'report',
+            'artifact_kind': 'pdf',
+            'analysis_id': analysis_id,
+            'content_hash': report_etag(analysis_data, transactions, company_name, logo_path, chart_backend, appendix)
+        }
+        payload = {
+            'analysis_data': analysis_data,
+            'transactions': transactions,
+            'company_name': company_name,
+            'logo_path': logo_path,
+            'chart_backend': chart_backend,
+            'appendix': appendix
+        }
+        return self._enqueue(job, payload, charts)
+
+    def analysis_pdf_hash(self, record: Dict[str, Any]) -> str:
+        """
+        Key and ETag of a stored analysis's PDF: its content hash while the company theme is the one it was
+        stored with, '<content_hash>-<theme>' once the theme has changed (so edits never serve a stale PDF)
+        """
+        if 'company_name' in record:
+            company_name = record['company_name']
+        else:
+            # Stored before records kept the company name
+            company_name = (self.store.load_model(record['analysis_id']) or {}).get('company_name')
+        theme = report_theme_fingerprint(company_name)
+        if theme == record.get('render_options', {}).get('theme'):
+            return record['content_hash']
+        return f"{record['content_hash']}-{theme or 'default'}"
+
+    def submit_analysis_pdf(self, analysis_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Queue the PDF of a stored analysis (the latest when no id is given), rendered from its report model;
+        returns the job already rendering it if there is one, None for analyses stored without a model
+        """
+        record = self.store.get_record(analysis_id)
+        model = record and self.store.load_model(record['analysis_id'])
+        if not model:
+            return None
+        pdf_hash = self.analysis_pdf_hash(record)
+        with self._lock:
+            job_id = self.pending.get(pdf_hash)
+        job = self.get_job(job_id) if job_id else None
+        if job and job['status'] in ('queued', 'running'):
+            return job
+
+        job = {
+            'id': uuid.uuid4().hex,
+            'kind': 'report',
+            'artifact_kind': 'pdf',
+            'analysis_id': record['analysis_id'],
+            'content_hash': pdf_hash
+        }
+        payload = {
+            'model': model,
+            'chart_backend': resolve_chart_backend(record.get('render_options', {}).get('chart_backend'))
+        }
+        with self._lock:
+            self.pending[job['content_hash']] = job['id']
+        return self._enqueue(job, payload)
+
+    def submit_export(self, reports: List[Dict[str, Any]], export_format: str = 'zip',
+                      title: Optional[str] = None, chart_backend: Optional[str] = None,
+                      owner: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        Queue a bulk export: a zip of one PDF per report (rendered in parallel) or one combined PDF
+        reports: dicts with analysis_data, filename and optional transactions, company_name, logo_path, title
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{export_format}'; expected one of {', '.join(EXPORT_FORMATS)}")
+        chart_backend = resolve_chart_backend(chart_backend)
+        title = title or 'VeroctaAI Report Bundle'
+
+        reports = [dict(report, content_hash=report_etag(
+            report['analysis_data'], report.get('transactions') or [], report.get('company_name'),
+            report.get('logo_path'), chart_backend)) for report in reports]
+        # Same reports, names and layout give the same export
+        fingerprint = json.dumps({
+            'format': export_format,
+            'title': title,
+            'reports': [(report['content_hash'], report['filename'], report.get('title')) for report in reports]
+        }, sort_keys=True)
+
+        job = {
+            'id': uuid.uuid4().hex,
+            'kind': 'export',
+            'format': export_format,
+            'artifact_kind': export_format,
+            'analysis_id': None,
+            'owner': owner,
+            'report_count': len(reports),
+            'content_hash': hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+        }
+        payload = {'reports': reports, 'title': title, 'chart_backend': chart_backend}
+        # No analysis points at an export; keep it through prunes until its download expires (extended on completion)
+        self.store.pin_artifact(job['content_hash'], RENDER_JOB_TTL)
+        return self._enqueue(job, payload)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats.update({'mode': self.mode, 'workers': self.workers, 'memory_cache': self.buffers.get_stats(),
+                      'queued': sum(1 for job in self.jobs.values() if job['status'] == 'queued')})
+        return stats
+
+
+render_service = RenderService()
+
+
+def submit_render_job(analysis_data: Dict[str, Any], transactions: List[Dict[str, Any]], **options) -> Dict[str, Any]:
+    """Main function to queue a PDF report render"""
+    return render_service.submit(analysis_data, transactions, **options)
+
+
+def submit_analysis_pdf_job(analysis_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Main function to render a stored analysis's PDF on demand"""
+    return render_service.submit_analysis_pdf(analysis_id)
+
+
+def submit_export_job(reports: List[Dict[str, Any]], **options) -> Dict[str, Any]:
+    """Main function to queue a bulk report export"""
+    return render_service.submit_export(reports, **options)
+
+
+def get_render_job(job_id: str) -> Optional[Dict[str, Any]]:
+    return render_service.get_job(job_id)
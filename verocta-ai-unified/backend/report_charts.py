@@ -0,0 +1,285 @@
+"""
+VeroctaAI Report Charts
+ReportLab-native vector charts for the PDF report, with no matplotlib or pyplot state
+"""
+
+from typing import Any, Dict, List, Optional
+
+from reportlab.lib import colors
+from reportlab.graphics.shapes import Drawing, Group, Rect, String, Polygon
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.charts.barcharts import HorizontalBarChart
+from reportlab.graphics.charts.linecharts import HorizontalLineChart
+from reportlab.graphics.widgets.markers import makeMarker
+
+# Palettes shared with the matplotlib charts in pdf_generator
+PROFESSIONAL_COLORS = ['#2E86AB', '#A23B72', '#F18F01', '#C73E1D', '#6A994E', '#577590', '#F2CC8F', '#81B29A']
+CLEAN_COLORS = ['#3498db', '#e74c3c', '#2ecc71', '#f39c12', '#9b59b6', '#1abc9c', '#34495e', '#e67e22']
+TREND_COLOR = '#3498db'
+ACCENT_COLOR = '#2E86AB'
+TITLE_COLOR = '#2c3e50'
+
+# matplotlib's viridis sampled at 17 evenly spaced stops, for the bar chart gradient
+VIRIDIS_STOPS = [
+    '#440154', '#48186a', '#472d7b', '#424086', '#3b528b', '#33638d',
+    '#2c728e', '#26828e', '#21918c', '#1fa088', '#28ae80', '#3fbc73',
+    '#5ec962', '#84d44b', '#addc30', '#d8e219', '#fde725'
+]
+
+# The matplotlib pie chart switches to bars above this many categories
+MAX_PIE_CATEGORIES = 6
+
+TITLE_FONT = 'Helvetica-Bold'
+LABEL_FONT = 'Helvetica'
+
+
+def sorted_categories(category_data: Dict[Any, float]) -> List[tuple]:
+    """(category, amount) pairs, largest first, in the order both chart backends plot them"""
+    return sorted(category_data.items(), key=lambda x: x[1], reverse=True)
+
+
+def palette(colors_list: List[str], count: int) -> List[str]:
+    """First count palette colors, cycling when there are more slices than colors"""
+    return [colors_list[i % len(colors_list)] for i in range(count)]
+
+
+def viridis(count: int) -> List[str]:
+    """Hex colors evenly spaced along viridis, like plt.cm.viridis(np.linspace(0, 1, count))"""
+    result = []
+    for i in range(count):
+        position = (i / (count - 1) if count > 1 else 0.0) * (len(VIRIDIS_STOPS) - 1)
+        low = min(int(position), len(VIRIDIS_STOPS) - 2)
+        fraction = position - low
+        start, end = colors.HexColor(VIRIDIS_STOPS[low]), colors.HexColor(VIRIDIS_STOPS[low + 1])
+        mixed = [a + (b - a) * fraction for a, b in zip(start.rgb(), end.rgb())]
+        result.append('#' + ''.join(f'{round(c * 255):02x}' for c in mixed))
+    return result
+
+
+def _money(amount: float) -> str:
+    return f'${amount:,.0f}'
+
+
+def _title(drawing: Drawing, text: str, x: float, y: float, size: float, color: str = TITLE_COLOR):
+    drawing.add(String(x, y, text, fontName=TITLE_FONT, fontSize=size,
+                       fillColor=colors.HexColor(color), textAnchor='middle'))
+
+
+def _pie(amounts: List[float], fill_colors: List[str], x: float, y: float, size: float, popout: float) -> Pie:
+    pie = Pie()
+    pie.x, pie.y = x, y
+    pie.width = pie.height = size
+    pie.data = amounts
+    pie.startAngle = 90
+    pie.direction = 'anticlockwise'  # matplotlib's default wedge order
+    pie.slices.strokeColor = colors.white
+    pie.slices.strokeWidth = 0.5
+    pie.slices.popout = popout
+    for i, color in enumerate(fill_colors):
+        pie.slices[i].fillColor = colors.HexColor(color)
+    return pie
+
+
+def clean_pie_drawing(category_data: Dict[Any, float], title: str, width: float, height: float) -> Optional[Drawing]:
+    """Single pie with category and percentage labels; width/height in points"""
+    if not category_data:
+        return None
+    items = sorted_categories(category_data)
+    amounts = [amount for _, amount in items]
+    total = sum(amounts)
+    if total <= 0:
+        return None
+
+    drawing = Drawing(width, height)
+    _title(drawing, title, width / 2, height - 16, 13)
+
+    size = min(width, height - 30) * 0.5
+    pie = _pie(amounts, palette(CLEAN_COLORS, len(items)), (width - size) / 2, (height - 30 - size) / 2,
+               size, popout=size * 0.025)
+    pie.labels = [f"{category} {amount / total:.1%}" for category, amount in items]
+    # Labels sit just outside each slice, anchored away from the pie so long names never cover it
+    pie.simpleLabels = 0
+    pie.slices.labelRadius = 1.08
+    pie.slices.label_boxAnchor = 'autox'
+    pie.slices.fontName = TITLE_FONT
+    pie.slices.fontSize = 7
+    pie.slices.fontColor = colors.HexColor(TITLE_COLOR)
+    drawing.add(pie)
+    return drawing
+
+
+def breakdown_drawing(category_data: Dict[Any, float], title: str, width: float, height: float) -> Optional[Drawing]:
+    """Pie with a colored amount/percentage table beside it, or a bar chart for many categories"""
+    if not category_data:
+        return None
+    items = sorted_categories(category_data)
+    if len(items) > MAX_PIE_CATEGORIES:
+        return horizontal_bar_drawing(category_data, title, width, height)
+
+    amounts = [amount for _, amount in items]
+    total = sum(amounts)
+    if total <= 0:
+        return None
+    fill_colors = palette(PROFESSIONAL_COLORS, len(items))
+
+    drawing = Drawing(width, height)
+    half = width / 2
+
+    # Left: pie with percentages inside the slices
+    _title(drawing, title, half / 2, height - 18, 11, ACCENT_COLOR)
+    size = min(half, height - 40) * 0.8
+    pie = _pie(amounts, fill_colors, (half - size) / 2, (height - 30 - size) / 2, size, popout=size * 0.04)
+    pie.labels = [f"{amount / total:.1%}" for amount in amounts]
+    pie.slices.labelRadius = 0.7
+    pie.slices.fontName = TITLE_FONT
+    pie.slices.fontSize = 8
+    pie.slices.fontColor = colors.white
+    drawing.add(pie)
+
+    # Right: legend table
+    _title(drawing, 'Spending Breakdown', half + half / 2, height - 18, 10, ACCENT_COLOR)
+    columns = [0.5, 0.25, 0.25]
+    table_width = half * 0.92
+    row_height = min(20, (height - 60) / (len(items) + 1))
+    top = height / 2 + row_height * (len(items) + 1) / 2
+    left = half + (half - table_width) / 2
+    rows = [('Category', 'Amount', 'Percentage')] + [
+        (str(category), f"${amount:,.2f}", f"{amount / total * 100:.1f}%") for category, amount in items
+    ]
+    for r, row in enumerate(rows):
+        y = top - (r + 1) * row_height
+        x = left
+        for c, text in enumerate(row):
+            cell_width = table_width * columns[c]
+            header = r == 0
+            drawing.add(Rect(x, y, cell_width, row_height, strokeColor=colors.HexColor('#dee2e6'), strokeWidth=1,
+                             fillColor=colors.HexColor(ACCENT_COLOR if header else '#f8f9fa')))
+            if header:
+                text_color = colors.white
+            elif c == 0:
+                text_color = colors.HexColor(fill_colors[r - 1])
+            else:
+                text_color = colors.black
+            text_x = x + 4
+            if c == 0 and not header:
+                # Color swatch matching the slice (the standard PDF fonts have no bullet glyph)
+                drawing.add(Rect(text_x, y + row_height / 2 - 3, 6, 6, strokeColor=None,
+                                 fillColor=colors.HexColor(fill_colors[r - 1])))
+                text_x += 9
+            drawing.add(String(text_x, y + row_height / 2 - 3, str(text),
+                               fontName=TITLE_FONT if header or c == 0 else LABEL_FONT,
+                               fontSize=7.5, fillColor=text_color))
+            x += cell_width
+    return drawing
+
+
+def horizontal_bar_drawing(category_data: Dict[Any, float], title: str, width: float,
+                           height: float) -> Optional[Drawing]:
+    """Horizontal bars with viridis colors, largest category at the bottom like matplotlib's barh"""
+    if not category_data:
+        return None
+    items = sorted_categories(category_data)
+    amounts = [amount for _, amount in items]
+    max_amount = max(amounts)
+
+    drawing = Drawing(width, height)
+    _title(drawing, title, width / 2, height - 16, 12, ACCENT_COLOR)
+
+    chart = HorizontalBarChart()
+    chart.x, chart.y = width * 0.24, 34
+    chart.width, chart.height = width * 0.72, height - 64
+    chart.data = [amounts]
+    # Bar and gap widths are relative; 7:3 matches barh(height=0.7)
+    chart.barWidth = 7
+    chart.groupSpacing = 3
+    chart.bars.strokeColor = None
+    for i, color in enumerate(viridis(len(items))):
+        chart.bars[(0, i)].fillColor = colors.HexColor(color)
+
+    chart.categoryAxis.categoryNames = [str(category) for category, _ in items]
+    chart.categoryAxis.labels.fontName = LABEL_FONT
+    chart.categoryAxis.labels.fontSize = 7
+    chart.categoryAxis.labels.boxAnchor = 'e'
+    chart.categoryAxis.strokeColor = colors.HexColor('#dee2e6')
+
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labelTextFormat = _money
+    chart.valueAxis.labels.fontName = LABEL_FONT
+    chart.valueAxis.labels.fontSize = 7
+    chart.valueAxis.visibleGrid = 1
+    chart.valueAxis.gridStrokeColor = colors.HexColor('#e0e0e0')
+    chart.valueAxis.strokeColor = colors.HexColor('#dee2e6')
+
+    # Amount labels inside wide bars, just past the end of narrow ones
+    chart.barLabelFormat = _money
+    chart.barLabels.fontName = TITLE_FONT
+    chart.barLabels.fontSize = 7
+    for i, amount in enumerate(amounts):
+        inside = amount > max_amount * 0.15
+        label = chart.barLabels[(0, i)]
+        label.boxAnchor = 'e' if inside else 'w'
+        label.dx = -3 if inside else 3
+        label.fillColor = colors.white if inside else colors.black
+    drawing.add(chart)
+
+    drawing.add(String(chart.x + chart.width / 2, 6, 'Amount ($)', fontName=TITLE_FONT, fontSize=8,
+                       fillColor=colors.HexColor(ACCENT_COLOR), textAnchor='middle'))
+    return drawing
+
+
+def trend_drawing(monthly_data: Dict[str, float], title: str, width: float, height: float) -> Optional[Drawing]:
+    """Monthly spend line with a shaded area underneath"""
+    if len(monthly_data) < 2:
+        return None
+    months = list(monthly_data.keys())
+    amounts = list(monthly_data.values())
+
+    drawing = Drawing(width, height)
+    _title(drawing, title, width / 2, height - 16, 12)
+
+    chart = HorizontalLineChart()
+    chart.x, chart.y = 56, 50
+    chart.width, chart.height = width - 72, height - 84
+    chart.data = [amounts]
+    chart.joinedLines = 1
+    chart.lines[0].strokeColor = colors.HexColor(TREND_COLOR)
+    chart.lines[0].strokeWidth = 2.25
+    chart.lines[0].symbol = makeMarker('FilledCircle', size=5,
+                                       fillColor=colors.HexColor(TREND_COLOR),
+                                       strokeColor=colors.HexColor(TREND_COLOR))
+
+    chart.categoryAxis.categoryNames = months
+    chart.categoryAxis.labels.angle = 45
+    chart.categoryAxis.labels.boxAnchor = 'ne'
+    chart.categoryAxis.labels.fontName = LABEL_FONT
+    chart.categoryAxis.labels.fontSize = 7
+
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labelTextFormat = _money
+    chart.valueAxis.labels.fontName = LABEL_FONT
+    chart.valueAxis.labels.fontSize = 7
+    chart.valueAxis.visibleGrid = 1
+    chart.valueAxis.gridStrokeColor = colors.HexColor('#e6e6e6')
+    chart.categoryAxis.visibleGrid = 1
+    chart.categoryAxis.gridStrokeColor = colors.HexColor('#e6e6e6')
+
+    # Shade between the line and zero, like matplotlib's fill_between
+    chart.valueAxis.setPosition(chart.x, chart.y, chart.height)
+    chart.valueAxis.configure(chart.data)
+    step = chart.width / len(months)
+    points = []
+    for i, amount in enumerate(amounts):
+        points.extend([chart.x + step * (i + 0.5), chart.valueAxis.scale(amount)])
+    baseline = chart.valueAxis.scale(0)
+    points.extend([points[-2], baseline, points[0], baseline])
+    drawing.add(chart)
+    drawing.add(Polygon(points, fillColor=colors.HexColor(TREND_COLOR), fillOpacity=0.3, strokeColor=None))
+
+    drawing.add(String(chart.x + chart.width / 2, 4, 'Month', fontName=TITLE_FONT, fontSize=8,
+                       fillColor=colors.black, textAnchor='middle'))
+    y_label = Group(String(0, 0, 'Amount ($)', fontName=TITLE_FONT, fontSize=8,
+                           fillColor=colors.black, textAnchor='middle'))
+    y_label.translate(12, chart.y + chart.height / 2)
+    y_label.rotate(90)
+    drawing.add(y_label)
+    return drawing
@@ -0,0 +1,141 @@
+"""
+VeroctaAI Report Model
+Everything a report shows (score, tables, recommendations, chart data) as plain JSON, built once per analysis
+"""
+
+from datetime import datetime
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from transaction_aggregates import parse_transaction_date
+
+# Bump when the model layout changes; stored models are rebuilt with their analysis
+REPORT_MODEL_VERSION = 1
+REPORT_TABLE_ROWS = 10
+
+NEXT_STEPS = [
+    "Implement high-priority recommendations for immediate impact",
+    "Schedule monthly reviews to track progress",
+    "Reassess SpendScore quarterly to measure improvement",
+    "Consider professional consultation for complex optimizations"
+]
+
+
+def summarize_report_totals(transactions):
+    """Category and vendor spend totals used by the report tables and charts"""
+    category_totals = {}
+    vendor_totals = {}
+
+    for transaction in transactions or []:
+        category = transaction.get('category', 'Uncategorized')
+        vendor = transaction.get('vendor', 'Unknown')
+        amount = transaction.get('amount', 0)
+
+        category_totals[category] = category_totals.get(category, 0) + amount
+        vendor_totals[vendor] = vendor_totals.get(vendor, 0) + amount
+
+    return category_totals, vendor_totals
+
+
+def monthly_spending_totals(transactions):
+    """Absolute spend per YYYY-MM, oldest first; rows without a parseable date are skipped"""
+    monthly_data = defaultdict(float)
+    for transaction in transactions:
+        date_value = transaction.get('date')
+        if isinstance(date_value, str):
+            date_value = date_value.split()[0] if date_value.strip() else None
+
+        # CSV uploads carry date objects; older callers pass strings
+        date_obj = parse_transaction_date(date_value)
+        if date_obj is None:
+            continue
+        monthly_data[date_obj.strftime('%Y-%m')] += abs(float(transaction.get('amount', 0)))
+
+    return dict(sorted(monthly_data.items()))
+
+
+def score_band(score: float) -> str:
+    """SpendScore traffic light: 'green', 'amber' or 'red'"""
+    if score >= 90:
+        return 'green'
+    if score >= 70:
+        return 'amber'
+    return 'red'
+
+
+def _ranked(totals: Dict[Any, float], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Largest first (ties keep upload order), with each entry's share of the total"""
+    total = sum(totals.values())
+    ranked = sorted(totals.items(), key=lambda x: x[1], reverse=True)[:limit]
+    return [{'name': str(name), 'amount': amount, 'share': (amount / total) * 100 if total else 0.0}
+            for name, amount in ranked]
+
+
+def build_report_model(analysis_data: Dict[str, Any], transactions: List[Dict[str, Any]],
+                       company_name: Optional[str] = None, logo_path: Optional[str] = None,
+                       generated_at: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Report content independent of output format; the PDF, HTML and JSON renderers all read this
+    Amounts stay numbers; renderers format them
+    """
+    spend_score = analysis_data.get('spend_score', 0)
+    if spend_score >= 80:
+        interpretation = "Excellent financial discipline with optimized spending patterns."
+    elif spend_score >= 60:
+        interpretation = "Good financial management with opportunities for improvement."
+    else:
+        interpretation = "Significant optimization potential - immediate action recommended."
+
+    total_transactions = analysis_data.get('total_transactions', 0)
+    total_amount = analysis_data.get('total_amount', 0)
+    suggestions = analysis_data.get('suggestions', [])
+
+    category_totals, vendor_totals = summarize_report_totals(transactions)
+    categories = _ranked(category_totals)
+    highlights = None
+    if categories:
+        highlights = {
+            'top_category': categories[0]['name'],
+            'top_share': categories[0]['share'],
+            'category_count': len(categories),
+            'total_spending': sum(category_totals.values())
+        }
+
+    return {
+        'version': REPORT_MODEL_VERSION,
+        'generated_at': generated_at or datetime.now().isoformat(),
+        'company_name': company_name or None,
+        'logo_path': logo_path or None,
+        'source': analysis_data.get('filename', 'Financial Data'),
+        'score': {
+            'value': spend_score,
+            'band': score_band(spend_score),
+            'label': analysis_data.get('score_label', 'Unknown'),
+            'color_name': analysis_data.get('score_color', 'Gray'),
+            'interpretation': interpretation
+        },
+        'metrics': {
+            'total_transactions': total_transactions,
+            'total_amount': total_amount,
+            'average_transaction': total_amount / max(total_transactions, 1)
+        },
+        'recommendations': {
+            'counts': {priority: len([s for s in suggestions if s.get('priority') == priority])
+                       for priority in ('High', 'Medium', 'Low')},
+            'items': [{'priority': s.get('priority', 'Medium'), 'text': s.get('text', 'No recommendation available')}
+                      for s in suggestions]
+        },
+        'tables': {
+            'categories': categories[:REPORT_TABLE_ROWS],
+            'vendors': _ranked(vendor_totals, REPORT_TABLE_ROWS)
+        },
+        # Every category (largest first) and month (oldest first), as the charts plot them
+        'charts': {
+            'categories': [{'label': c['name'], 'value': c['amount']} for c in categories],
+            'monthly': [{'label': month, 'value': value}
+                        for month, value in monthly_spending_totals(transactions or []).items()]
+        },
+        'highlights': highlights,
+        'next_steps': NEXT_STEPS,
+        'transaction_count': len(transactions or [])
+    }
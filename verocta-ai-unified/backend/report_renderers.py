@@ -0,0 +1,167 @@
+"""
+VeroctaAI Report Renderers
+Pluggable output formats for a report model: the PDF, a lightweight HTML page and chart-ready JSON
+"""
+
+import io
+import json
+import html
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from report_charts import CLEAN_COLORS, TREND_COLOR, palette
+from report_theme import report_themes, SCORE_COLORS, CSS_FONTS
+from pdf_generator import generate_model_pdf_with_stats
+
+PRIORITY_COLORS = {'High': 'red', 'Medium': 'orange', 'Low': 'green'}
+
+# Format name -> {'render': render(model, **options) -> bytes, 'mimetype', 'extension'}
+REPORT_RENDERERS: Dict[str, Dict[str, Any]] = {}
+
+
+def register_report_renderer(name: str, render: Callable[..., bytes], mimetype: str, extension: str) -> None:
+    """Add (or replace) an output format for report models"""
+    REPORT_RENDERERS[name] = {'render': render, 'mimetype': mimetype, 'extension': extension}
+
+
+def _money(amount: float) -> str:
+    return f"${amount:,.2f}"
+
+
+def _generated(model: Dict[str, Any]) -> str:
+    return datetime.fromisoformat(model['generated_at']).strftime("%B %d, %Y at %I:%M %p")
+
+
+def render_report_pdf(model: Dict[str, Any], charts=None, chart_backend: Optional[str] = None, **options) -> bytes:
+    """The full PDF report; charts are rendered from the model's chart data"""
+    buffer = io.BytesIO()
+    generate_model_pdf_with_stats(model, charts, buffer, chart_backend)
+    return buffer.getvalue()
+
+
+def render_report_json(model: Dict[str, Any], **options) -> bytes:
+    """The model for the dashboard, with chart data shaped as Chart.js datasets and no server paths"""
+    categories = model['charts']['categories']
+    monthly = model['charts']['monthly']
+    data = {key: value for key, value in model.items() if key not in ('logo_path', 'charts')}
+    data['charts'] = {
+        'categories': {
+            'type': 'doughnut',
+            'labels': [c['label'] for c in categories],
+            'datasets': [{'label': 'Spend', 'data': [c['value'] for c in categories],
+                          'backgroundColor': palette(CLEAN_COLORS, len(categories))}]
+        },
+        'monthly': {
+            'type': 'line',
+            'labels': [m['label'] for m in monthly],
+            'datasets': [{'label': 'Monthly spend', 'data': [m['value'] for m in monthly],
+                          'borderColor': TREND_COLOR}]
+        }
+    }
+    return json.dumps(data, default=str).encode('utf-8')
+
+
+def _table(columns, rows) -> str:
+    head = ''.join(f'<th>{html.escape(column)}</th>' for column in columns)
+    body = ''.join('<tr>' + ''.join(f'<td>{html.escape(str(cell))}</td>' for cell in row) + '</tr>' for row in rows)
+    return f'<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>'
+
+
+def _bars(items, color_list) -> str:
+    """Horizontal CSS bars scaled to the largest value"""
+    largest = max((item['value'] for item in items), default=0) or 1
+    rows = []
+    for item, color in zip(items, palette(color_list, len(items))):
+        rows.append(f'<div class="bar"><span class="label">{html.escape(item["label"])}</span>'
+                    f'<span class="track"><span style="width:{item["value"] / largest * 100:.1f}%;background:{color}">'
+                    f'</span></span><span class="value">{_money(item["value"])}</span></div>')
+    return ''.join(rows)
+
+
+def render_report_html(model: Dict[str, Any], **options) -> bytes:
+    """A single self-contained page (no scripts, no images) in the company's report theme"""
+    theme = report_themes.settings_for(model['company_name'])
+    primary = theme['primary_color']
+    score = model['score']
+    score_color = SCORE_COLORS[score['band']]
+    metrics = model['metrics']
+    recommendations = model['recommendations']
+    counts = recommendations['counts']
+    title = html.escape(model['company_name'] or 'VeroctaAI')
+
+    parts = [
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">',
+        '<meta name="viewport" content="width=device-width, initial-scale=1">',
+        f'<title>{title} Financial Intelligence Report</title><style>',
+        f'body{{font-family:{CSS_FONTS[theme["font"]]};max-width:820px;margin:2em auto;padding:0 1em;color:#222}}',
+        f'h1,h2{{color:{primary}}}h1{{text-align:center}}h3{{font-style:italic}}',
+        f'.meta{{text-align:center;color:{theme["muted_color"]};font-size:.9em}}',
+        f'hr{{border:0;border-top:2px solid {primary}}}',
+        'table{border-collapse:collapse;margin:1em 0}th,td{border:1px solid #000;padding:4px 10px;text-align:left}',
+        f'th{{background:{primary};color:#f5f5f5}}td:not(:first-child){{text-align:right}}',
+        f'.score{{font-size:1.6em;font-weight:bold;color:{score_color}}}',
+        '.bar{display:flex;align-items:center;margin:3px 0}.label{width:30%}.value{width:20%;text-align:right}',
+        '.track{flex:1;background:#eee;height:14px;margin:0 8px}.track span{display:block;height:100%}',
+        f'.insight{{background:{theme["highlight_color"]};border:2px solid {primary};padding:1em}}',
+        '</style></head><body>',
+        f'<h1>{title}<br><small>Financial Intelligence Report</small></h1>',
+        f'<p class="meta">Generated: {_generated(model)}<br>Data Source: {html.escape(str(model["source"]))}</p>',
+        '<hr><h2>Executive Summary</h2>',
+        f'<p class="score">SpendScore: {score["value"]:.1f}/100</p>',
+        f'<p><b>Financial Health: {html.escape(score["label"])} ({html.escape(score["color_name"])} Zone)</b></p>',
+        f'<p><i>{html.escape(score["interpretation"])}</i></p>',
+        _table(['Metric', 'Value'], [
+            ['Total Transactions', f"{metrics['total_transactions']:,}"],
+            ['Total Amount', _money(metrics['total_amount'])],
+            ['Average Transaction', _money(metrics['average_transaction'])],
+            ['Financial Health', f"{score['label']} ({score['color_name']})"]
+        ]),
+        '<h2>AI-Powered Financial Recommendations</h2>',
+        f"<p>Analysis identified {counts['High']} high-priority, {counts['Medium']} medium-priority, "
+        f"and {counts['Low']} low-priority optimization opportunities.</p><ol>"
+    ]
+    for item in recommendations['items']:
+        color = PRIORITY_COLORS.get(item['priority'], 'green')
+        parts.append(f'<li><b style="color:{color}">{html.escape(item["priority"])} Priority:</b> '
+                     f'{html.escape(item["text"])}</li>')
+    parts.append('</ol>')
+
+    tables = model['tables']
+    if tables['categories'] or tables['vendors']:
+        parts.append('<h2>Spending Analysis</h2>')
+    for heading, column, rows in (('Top Spending Categories', 'Category', tables['categories']),
+                                  ('Top Vendors', 'Vendor', tables['vendors'])):
+        if rows:
+            parts.append(f'<h3>{heading}</h3>')
+            parts.append(_table([column, 'Amount', 'Percentage'],
+                                [[row['name'], _money(row['amount']), f"{row['share']:.1f}%"] for row in rows]))
+
+    highlights = model['highlights']
+    if highlights:
+        parts.append('<hr><h2>Visual Analytics</h2><h3>Spending by Category</h3>')
+        parts.append(_bars(model['charts']['categories'], CLEAN_COLORS))
+        if len(model['charts']['monthly']) >= 2:
+            parts.append('<h3>Monthly Spending Patterns</h3>')
+            parts.append(_bars(model['charts']['monthly'], [TREND_COLOR]))
+        parts.append(
+            f'<p class="insight"><b>Primary Focus:</b> {html.escape(highlights["top_category"])} represents '
+            f'{highlights["top_share"]:.1f}% of total spending across {highlights["category_count"]} categories '
+            f'({_money(highlights["total_spending"])} analyzed).</p>')
+
+    parts.append('<hr><h3>Next Steps Summary</h3><ol>')
+    parts.extend(f'<li>{html.escape(step)}</li>' for step in model['next_steps'])
+    parts.append('</ol><p class="meta">Generated by the Verocta AI Financial Insight Platform.</p></body></html>')
+    return ''.join(parts).encode('utf-8')
+
+
+register_report_renderer('pdf', render_report_pdf, 'application/pdf', 'pdf')
+register_report_renderer('html', render_report_html, 'text/html', 'html')
+register_report_renderer('json', render_report_json, 'application/json', 'json')
+
+
+def render_report(model: Dict[str, Any], report_format: str = 'html', **options) -> bytes:
+    """Main function to render a report model in any registered format"""
+    renderer = REPORT_RENDERERS.get(report_format)
+    if renderer is None:
+        raise ValueError(f"Unknown report format '{report_format}'; expected one of {', '.join(REPORT_RENDERERS)}")
+    return renderer['render'](model, **options)
@@ -0,0 +1,359 @@
+"""
+VeroctaAI Report Store
+Content-addressed PDF/JSON/report model artifacts keyed by analysis id, written atomically
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import logging
+import tempfile
+import threading
+import weakref
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Any
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+REPORT_STORE_DIR = os.environ.get('REPORT_STORE_DIR', os.path.join(basedir, 'outputs', 'reports'))
+REPORT_RETENTION_DAYS = float(os.environ.get('REPORT_RETENTION_DAYS', '30'))   # 0 keeps reports forever
+REPORT_MAX_ANALYSES = int(os.environ.get('REPORT_MAX_ANALYSES', '1000'))       # 0 disables the count limit
+REPORT_PRUNE_INTERVAL = float(os.environ.get('REPORT_PRUNE_INTERVAL', '300'))  # seconds between sweeps
+REPORT_ORPHAN_GRACE = float(os.environ.get('REPORT_ORPHAN_GRACE', '3600'))     # keep fresh artifacts during races
+
+# Bump when the PDF layout changes so identical analyses stop reusing old artifacts
+REPORT_FORMAT_VERSION = 2
+
+ANALYSIS_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+ARTIFACT_KINDS = {'pdf': 'pdf', 'json': 'json', 'zip': 'zip', 'model': 'model.json',
+                  'transactions': 'transactions.json'}
+
+
+def new_analysis_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _file_digest(path: Optional[str]) -> Optional[str]:
+    """Hash file contents so re-uploaded logos with new names still match"""
+    if not path or not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def report_content_hash(analysis_data: Dict[str, Any], transactions: List[Dict[str, Any]],
+                        company_name: Optional[str] = None, logo_path: Optional[str] = None,
+                        render_options: Optional[Dict[str, Any]] = None) -> str:
+    """Stable hash of everything that determines the rendered report, including render options"""
+    analysis = {key: value for key, value in analysis_data.items() if key != 'logo_path'}
+    payload = json.dumps({
+        'format': REPORT_FORMAT_VERSION,
+        'analysis': analysis,
+        'transactions': transactions,
+        'company_name': company_name or None,
+        'logo': _file_digest(logo_path),
+        'render': render_options or {}
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _atomic_write(path: str, write: Callable[[str], Any]):
+    """Run write(tmp_path) and move the result into place, so readers never see a partial file"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_json(path: str, data: Any):
+    def write(tmp_path):
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2, default=str)
+    _atomic_write(path, write)
+
+
+class ReportStore:
+    """
+    Artifacts live under artifacts/<hash>.<kind> and are shared by identical analyses;
+    analyses/<id>.json points an analysis at its current content hash
+    """
+
+    def __init__(self, root: str = REPORT_STORE_DIR, retention_days: float = REPORT_RETENTION_DAYS,
+                 max_analyses: int = REPORT_MAX_ANALYSES, prune_interval: float = REPORT_PRUNE_INTERVAL,
+                 orphan_grace: float = REPORT_ORPHAN_GRACE):
+        self.root = root
+        self.retention_days = retention_days
+        self.max_analyses = max_analyses
+        self.prune_interval = prune_interval
+        self.orphan_grace = orphan_grace
+        self.stats = {'renders': 0, 'reused': 0, 'pruned_analyses': 0, 'pruned_artifacts': 0}
+        self._last_prune = 0.0
+        self._lock = threading.Lock()
+        # A hash's lock lives while any caller holds or waits on it, so two callers never get different locks
+        self._hash_locks: 'weakref.WeakValueDictionary[str, threading.Lock]' = weakref.WeakValueDictionary()
+
+    def artifact_path(self, content_hash: str, kind: str) -> str:
+        return os.path.join(self.root, 'artifacts', f"{content_hash}.{ARTIFACT_KINDS[kind]}")
+
+    def _record_path(self, analysis_id: str) -> str:
+        return os.path.join(self.root, 'analyses', f'{analysis_id}.json')
+
+    def _latest_path(self) -> str:
+        return os.path.join(self.root, 'latest.json')
+
+    def _hash_lock(self, content_hash: str) -> threading.Lock:
+        with self._lock:
+            lock = self._hash_locks.get(content_hash)
+            if lock is None:
+                lock = self._hash_locks[content_hash] = threading.Lock()
+            return lock
+
+    def ensure_artifact(self, content_hash: str, kind: str, write: Callable[[str], Any]) -> str:
+        """Path of the artifact for content_hash, calling write(tmp_path) only if it does not exist yet"""
+        path = self.artifact_path(content_hash, kind)
+        with self._hash_lock(content_hash):
+            reused = os.path.exists(path)
+            if reused:
+                os.utime(path)  # refresh so a concurrent prune treats it as in use
+            else:
+                _atomic_write(path, write)
+        with self._lock:
+            self.stats['reused' if reused else 'renders'] += 1
+        return path
+
+    def touch_artifact(self, content_hash: str, kind: str) -> bool:
+        """Mark an existing artifact as in use; False when it is gone (e.g. pruned since it was looked up)"""
+        with self._hash_lock(content_hash):
+            try:
+                os.utime(self.artifact_path(content_hash, kind))
+            except FileNotFoundError:
+                return False
+        with self._lock:
+            self.stats['reused'] += 1
+        return True
+
+    def pin_artifact(self, content_hash: str, seconds: float):
+        """
+        Keep content_hash's artifacts through prunes for at least `seconds` more, for artifacts no analysis
+        points at (e.g. bulk exports, until their download expires); the pin file's mtime is its expiry
+        """
+        path = os.path.join(self.root, 'pins', content_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        expires = time.time() + seconds
+        with self._hash_lock(content_hash):
+            if not os.path.exists(path) or os.path.getmtime(path) < expires:
+                open(path, 'a').close()
+                os.utime(path, (expires, expires))
+
+    def save_report(self, analysis_id: str, analysis_data: Dict[str, Any], transactions: List[Dict[str, Any]],
+                    company_name: Optional[str] = None, logo_path: Optional[str] = None,
+                    render_pdf: Optional[Callable[[str], Any]] = None,
+                    render_options: Optional[Dict[str, Any]] = None,
+                    report_model: Optional[Dict[str, Any]] = None, set_latest: bool = True) -> Dict[str, Any]:
+        """
+        Store the analysis JSON and its transactions (and the PDF when render_pdf(path) is given, the report
+        model when report_model is given) and point analysis_id (and the latest-report pointer) at them
+        """
+        if not ANALYSIS_ID_PATTERN.match(analysis_id or ''):
+            raise ValueError(f'Invalid analysis id: {analysis_id}')
+
+        content_hash = report_content_hash(analysis_data, transactions, company_name, logo_path, render_options)
+        json_path = self.ensure_artifact(content_hash, 'json', lambda path: _write_json(path, analysis_data))
+        transactions_path = self.ensure_artifact(content_hash, 'transactions',
+                                                 lambda path: _write_json(path, transactions))
+        pdf_path = self.ensure_artifact(content_hash, 'pdf', render_pdf) if render_pdf else None
+        model_path = self.ensure_artifact(content_hash, 'model',
+                                          lambda path: _write_json(path, report_model)) if report_model else None
+
+        previous = self.get_record(analysis_id) or {}
+        if model_path is None and previous.get('content_hash') == content_hash:
+            # Re-saving the same content (e.g. with its PDF) keeps the stored model
+            model_path = previous['artifacts'].get('model') and os.path.join(self.root, previous['artifacts']['model'])
+        now = datetime.now().isoformat()
+        record = {
+            'analysis_id': analysis_id,
+            'content_hash': content_hash,
+            'created_at': previous.get('created_at', now),
+            'updated_at': now,
+            'company_name': company_name,
+            'render_options': render_options or {},
+            'artifacts': {
+                'json': os.path.relpath(json_path, self.root),
+                'pdf': os.path.relpath(pdf_path, self.root) if pdf_path else None,
+                'model': os.path.relpath(model_path, self.root) if model_path else None,
+                'transactions': os.path.relpath(transactions_path, self.root)
+            }
+        }
+        _write_json(self._record_path(analysis_id), record)
+        if set_latest:
+            _write_json(self._latest_path(), {'analysis_id': analysis_id})
+
+        self.maybe_prune()
+        return record
+
+    def add_artifact(self, analysis_id: str, kind: str, write: Callable[[str], Any],
+                     artifact_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Render an artifact for an analysis's stored content (e.g. its PDF on demand) and record it
+        artifact_hash: key for a variant of the content (e.g. '<content_hash>-<theme>'); the content hash by default
+        """
+        record = self.get_record(analysis_id)
+        if record is None:
+            return None
+        path = self.ensure_artifact(artifact_hash or record['content_hash'], kind, write)
+        with self._lock:
+            # The analysis may have been re-saved with new content while this rendered
+            current = self.get_record(analysis_id)
+            if current and current['content_hash'] == record['content_hash']:
+                current['artifacts'][kind] = os.path.relpath(path, self.root)
+                _write_json(self._record_path(analysis_id), current)
+        return current
+
+    def get_record(self, analysis_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Record for analysis_id, or for the most recently saved analysis"""
+        try:
+            if analysis_id is None:
+                with open(self._latest_path(), 'r') as f:
+                    analysis_id = json.load(f)['analysis_id']
+            if not ANALYSIS_ID_PATTERN.match(analysis_id or ''):
+                return None
+            with open(self._record_path(analysis_id), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def get_artifact_path(self, analysis_id: Optional[str], kind: str) -> Optional[str]:
+        record = self.get_record(analysis_id)
+        relative = record and record['artifacts'].get(kind)
+        if not relative:
+            return None
+        path = os.path.join(self.root, relative)
+        return path if os.path.exists(path) else None
+
+    def load_analysis(self, analysis_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        path = self.get_artifact_path(analysis_id, 'json')
+        if not path:
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def load_model(self, analysis_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Report model of an analysis (see report_model); None for analyses stored without one"""
+        path = self.get_artifact_path(analysis_id, 'model')
+        if not path:
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def load_transactions(self, analysis_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Normalized transactions an analysis was scored from; None for analyses stored without them"""
+        path = self.get_artifact_path(analysis_id, 'transactions')
+        if not path:
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def iter_records(self) -> Iterable[Dict[str, Any]]:
+        """Records of every stored analysis (read one at a time; ones pruned meanwhile are skipped)"""
+        records_dir = os.path.join(self.root, 'analyses')
+        if not os.path.isdir(records_dir):
+            return
+        for name in sorted(os.listdir(records_dir)):
+            record = name.endswith('.json') and self.get_record(name[:-len('.json')])
+            if record:
+                yield record
+
+    def maybe_prune(self):
+        """Prune at most once per interval per process"""
+        with self._lock:
+            if time.time() - self._last_prune < self.prune_interval:
+                return
+            self._last_prune = time.time()
+        try:
+            self.prune()
+        except OSError as e:
+            logging.warning(f"Report store prune failed: {str(e)}")
+
+    def prune(self) -> Dict[str, int]:
+        """Drop analyses past retention or over the count limit, then artifacts nothing points at"""
+        now = time.time()
+        records_dir = os.path.join(self.root, 'analyses')
+        artifacts_dir = os.path.join(self.root, 'artifacts')
+
+        records = []
+        if os.path.isdir(records_dir):
+            for name in os.listdir(records_dir):
+                path = os.path.join(records_dir, name)
+                if name.endswith('.json'):
+                    records.append((os.path.getmtime(path), path))
+                elif now - os.path.getmtime(path) > self.orphan_grace:
+                    os.remove(path)  # temp file left by a crashed writer
+        records.sort(reverse=True)
+
+        keep, removed = [], 0
+        for index, (mtime, path) in enumerate(records):
+            expired = self.retention_days and now - mtime > self.retention_days * 86400
+            over_limit = self.max_analyses and index >= self.max_analyses
+            if expired or over_limit:
+                os.remove(path)
+                removed += 1
+            else:
+                keep.append(path)
+
+        referenced = set()
+        pins_dir = os.path.join(self.root, 'pins')
+        if os.path.isdir(pins_dir):
+            for name in os.listdir(pins_dir):
+                path = os.path.join(pins_dir, name)
+                if os.path.getmtime(path) > now:
+                    referenced.add(name)
+                else:
+                    os.remove(path)
+        for path in keep:
+            try:
+                with open(path, 'r') as f:
+                    referenced.add(json.load(f)['content_hash'])
+            except (OSError, ValueError, KeyError):
+                continue
+
+        orphans = 0
+        if os.path.isdir(artifacts_dir):
+            for name in os.listdir(artifacts_dir):
+                path = os.path.join(artifacts_dir, name)
+                # '<content_hash>-<theme>' variants belong to their analysis's content hash
+                content_hash = name.split('.', 1)[0].split('-', 1)[0]
+                if content_hash in referenced or now - os.path.getmtime(path) < self.orphan_grace:
+                    continue
+                os.remove(path)
+                orphans += 1
+
+        with self._lock:
+            self.stats['pruned_analyses'] += removed
+            self.stats['pruned_artifacts'] += orphans
+        if removed or orphans:
+            logging.info(f"Report store pruned {removed} analyses and {orphans} artifacts")
+        return {'analyses': removed, 'artifacts': orphans}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        artifacts_dir = os.path.join(self.root, 'artifacts')
+        records_dir = os.path.join(self.root, 'analyses')
+        stats['analyses'] = len(os.listdir(records_dir)) if os.path.isdir(records_dir) else 0
+        stats['artifacts'] = len(os.listdir(artifacts_dir)) if os.path.isdir(artifacts_dir) else 0
+        return stats
+
+
+report_store = ReportStore()
@@ -0,0 +1,366 @@
+"""
+VeroctaAI Report Theme
+Paragraph styles, colors and table styles for PDF reports, built once per process per theme
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import TableStyle
+
+from table_store import table_lock, write_table
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+REPORT_THEMES_PATH = os.environ.get(
+    'REPORT_THEMES_PATH', os.path.join(basedir, 'data', 'report_themes.json')
+)
+# Built themes kept per process; cleared when a theme table edit leaves this many behind
+REPORT_THEME_CACHE_MAX = 64
+
+DEFAULT_THEME = {
+    'primary_color': '#2E86AB',
+    'muted_color': '#666666',
+    'highlight_color': '#f0f8ff',
+    'font': 'Helvetica'
+}
+# Standard PDF fonts (regular, bold, bold italic); no font file is embedded for these
+FONT_FAMILIES = {
+    'Helvetica': ('Helvetica', 'Helvetica-Bold', 'Helvetica-BoldOblique'),
+    'Times-Roman': ('Times-Roman', 'Times-Bold', 'Times-BoldItalic'),
+    'Courier': ('Courier', 'Courier-Bold', 'Courier-BoldOblique')
+}
+COLOR_PATTERN = re.compile(r'^#[0-9a-fA-F]{6}$')
+
+# SpendScore traffic light by report_model.score_band (see pdf_generator.get_score_color_rgb)
+SCORE_COLORS = {'green': '#28a745', 'amber': '#ffc107', 'red': '#dc3545'}
+SCORE_GREEN = colors.HexColor(SCORE_COLORS['green'])
+SCORE_AMBER = colors.HexColor(SCORE_COLORS['amber'])
+SCORE_RED = colors.HexColor(SCORE_COLORS['red'])
+# Theme fonts for the HTML report
+CSS_FONTS = {
+    'Helvetica': 'Helvetica, Arial, sans-serif',
+    'Times-Roman': "'Times New Roman', Times, serif",
+    'Courier': "'Courier New', Courier, monospace"
+}
+
+LEDGER_FONT_SIZE = 7
+
+
+def _company_key(company: Optional[str]) -> str:
+    return (company or '').strip().lower()
+
+
+def theme_fingerprint(settings: Dict[str, str]) -> str:
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def validate_theme(theme: Dict[str, Any]) -> Dict[str, str]:
+    """Check one company's overrides; raises ValueError for unknown keys, colors or fonts"""
+    if not isinstance(theme, dict):
+        raise ValueError('theme must be an object')
+    unknown = set(theme) - set(DEFAULT_THEME)
+    if unknown:
+        raise ValueError(f"Unknown theme settings: {', '.join(sorted(unknown))}")
+    for key, value in theme.items():
+        if key == 'font':
+            if not isinstance(value, str) or value not in FONT_FAMILIES:
+                raise ValueError(f"font must be one of: {', '.join(FONT_FAMILIES)}")
+        elif not isinstance(value, str) or not COLOR_PATTERN.match(value):
+            raise ValueError(f'{key} must be a #RRGGBB color')
+    return {key: str(value) for key, value in theme.items()}
+
+
+def load_report_themes(path: Optional[str] = None) -> Dict[str, Dict[str, str]]:
+    """Load the company -> theme overrides table"""
+    path = path or REPORT_THEMES_PATH
+    try:
+        with open(path, 'r') as f:
+            themes = json.load(f)
+        return {str(company): validate_theme(theme) for company, theme in themes.items()}
+    except FileNotFoundError:
+        return {}
+    except (ValueError, AttributeError) as e:
+        logging.error(f"Invalid report theme table {path}: {str(e)}")
+        return {}
+
+
+def save_report_themes(themes: Dict[str, Dict[str, str]], path: Optional[str] = None) -> None:
+    """Persist the theme table atomically"""
+    write_table(path or REPORT_THEMES_PATH, themes)
+
+
+class ReportTheme:
+    """Styles for one theme; read-only once built and shared by every report that uses it"""
+
+    def __init__(self, settings: Optional[Dict[str, str]] = None):
+        self.settings = dict(DEFAULT_THEME, **(settings or {}))
+        self.fingerprint = theme_fingerprint(self.settings)
+
+        self.primary = colors.HexColor(self.settings['primary_color'])
+        self.muted = colors.HexColor(self.settings['muted_color'])
+        self.highlight = colors.HexColor(self.settings['highlight_color'])
+        self.font, self.bold_font, self.bold_italic_font = FONT_FAMILIES[self.settings['font']]
+
+        self.styles = self._build_styles()
+        self.score_badges = {color.hexval(): self._score_badge_style(color)
+                             for color in (SCORE_GREEN, SCORE_AMBER, SCORE_RED)}
+        self.table_styles = self._build_table_styles()
+
+    def _build_styles(self) -> Dict[str, Any]:
+        styles = getSampleStyleSheet()
+        return {
+            'base': styles,
+            'normal': ParagraphStyle('ThemeNormal', parent=styles['Normal'], fontName=self.font),
+            'subheading': ParagraphStyle('ThemeHeading3', parent=styles['Heading3'],
+                                         fontName=self.bold_italic_font),
+            'title': ParagraphStyle(
+                'CustomTitle',
+                parent=styles['Heading1'],
+                fontName=self.bold_font,
+                fontSize=26,
+                spaceAfter=30,
+                spaceBefore=20,
+                textColor=self.primary,
+                alignment=1  # Center alignment
+            ),
+            'heading': ParagraphStyle(
+                'CustomHeading',
+                parent=styles['Heading2'],
+                fontName=self.bold_font,
+                fontSize=18,
+                spaceAfter=15,
+                spaceBefore=25,
+                textColor=self.primary
+            ),
+            'body': ParagraphStyle(
+                'CustomBody',
+                parent=styles['Normal'],
+                fontName=self.font,
+                fontSize=11,
+                spaceAfter=12,
+                leading=14
+            ),
+            'company_header': ParagraphStyle(
+                'CompanyHeader',
+                parent=styles['Normal'],
+                fontName=self.font,
+                fontSize=16,
+                spaceAfter=25,
+                spaceBefore=10,
+                textColor=self.primary,
+                alignment=1
+            ),
+            'fallback_header': ParagraphStyle(
+                'FallbackHeader',
+                parent=styles['Normal'],
+                fontName=self.font,
+                fontSize=16,
+                alignment=1,
+                textColor=self.primary
+            ),
+            'metadata': ParagraphStyle(
+                'MetadataStyle',
+                parent=styles['Normal'],
+                fontName=self.font,
+                fontSize=10,
+                textColor=self.muted,
+                alignment=1
+            ),
+            'insight': ParagraphStyle(
+                'ComprehensiveInsightStyle',
+                parent=styles['Normal'],
+                fontName=self.font,
+                fontSize=11,
+                spaceAfter=15,
+                leftIndent=20,
+                rightIndent=20,
+                backColor=self.highlight,
+                borderColor=self.primary,
+                borderWidth=2,
+                borderPadding=15
+            ),
+            'reward': ParagraphStyle(
+                'RewardStyle',
+                parent=styles['Normal'],
+                fontName=self.font,
+                fontSize=12,
+                spaceAfter=10,
+                spaceBefore=10,
+                textColor=SCORE_GREEN,
+                backColor=colors.HexColor('#d4edda'),
+                borderColor=SCORE_GREEN,
+                borderWidth=1,
+                borderPadding=8,
+                alignment=1
+            ),
+            'toc_entry': ParagraphStyle(
+                'TOCEntry',
+                parent=styles['Normal'],
+                fontName=self.font,
+                fontSize=11,
+                leading=16,
+                leftIndent=10
+            )
+        }
+
+    def _score_badge_style(self, score_color) -> ParagraphStyle:
+        return ParagraphStyle(
+            'ScoreBadge',
+            parent=self.styles['normal'],
+            fontSize=24,
+            spaceAfter=10,
+            spaceBefore=10,
+            textColor=colors.white,
+            backColor=score_color,
+            borderColor=score_color,
+            borderWidth=2,
+            borderPadding=10,
+            alignment=1,  # Center alignment
+            borderRadius=15
+        )
+
+    def _build_table_styles(self) -> Dict[str, TableStyle]:
+        header = [
+            ('BACKGROUND', (0, 0), (-1, 0), self.primary),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), self.bold_font),
+            ('FONTNAME', (0, 1), (-1, -1), self.font)
+        ]
+        return {
+            'metrics': TableStyle(header + [
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTSIZE', (0, 0), (-1, 0), 12),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('FONTSIZE', (0, 1), (-1, -1), 10),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]),
+            # Top categories and top vendors
+            'ranking': TableStyle(header + [
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+                ('FONTSIZE', (0, 0), (-1, 0), 11),
+                ('FONTSIZE', (0, 1), (-1, -1), 9),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey)
+            ]),
+            'ledger': TableStyle(header + [
+                ('FONTSIZE', (0, 0), (-1, -1), LEDGER_FONT_SIZE),
+                ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+                ('ALIGN', (-1, 0), (-1, -1), 'RIGHT'),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                ('TOPPADDING', (0, 0), (-1, -1), 1),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f2f6f9')]),
+                ('LINEBELOW', (0, 0), (-1, 0), 0.5, self.primary)
+            ])
+        }
+
+
+class ReportThemeRegistry:
+    """Company theme table (reloaded when the file changes) and the themes built from it"""
+
+    def __init__(self, path: str = REPORT_THEMES_PATH):
+        self.path = path
+        self.table: Dict[str, Dict[str, str]] = {}
+        self.overrides: Dict[str, Dict[str, str]] = {}
+        self.mtime: Optional[float] = None
+        self.loaded = False
+        self.themes: Dict[str, ReportTheme] = {}
+        self.stats = {'built': 0, 'reused': 0}
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """Reload the overrides if the file changed; render processes see edits made by the web process"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if not self.loaded or mtime != self.mtime:
+            self.table = load_report_themes(self.path)
+            self.overrides = {_company_key(company): theme for company, theme in self.table.items()}
+            self.mtime, self.loaded = mtime, True
+
+    def settings_table(self, company_name: Optional[str] = None) -> Dict[str, Dict[str, str]]:
+        """The company theme table; only the given company's entry when company_name is set"""
+        with self._lock:
+            self._refresh()
+            if company_name is None:
+                return dict(self.table)
+            return {company: theme for company, theme in self.table.items()
+                    if _company_key(company) == _company_key(company_name)}
+
+    def settings_for(self, company_name: Optional[str] = None) -> Dict[str, str]:
+        with self._lock:
+            self._refresh()
+            return dict(DEFAULT_THEME, **self.overrides.get(_company_key(company_name), {}))
+
+    def get(self, company_name: Optional[str] = None) -> ReportTheme:
+        """The theme for a company (the default theme when it has none), built on first use"""
+        settings = self.settings_for(company_name)
+        key = theme_fingerprint(settings)
+        with self._lock:
+            theme = self.themes.get(key)
+            if theme is not None:
+                self.stats['reused'] += 1
+                return theme
+
+        # getSampleStyleSheet and friends run outside the lock; a racing build of the same theme is harmless
+        theme = ReportTheme(settings)
+        with self._lock:
+            if len(self.themes) >= REPORT_THEME_CACHE_MAX:
+                self.themes.clear()
+            theme = self.themes.setdefault(key, theme)
+            self.stats['built'] += 1
+        return theme
+
+    def update(self, themes: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, Dict[str, str]]:
+        """Validate and merge company themes into the table; a None theme removes that company's entry"""
+        validated = {}
+        for company, theme in themes.items():
+            if not isinstance(company, str) or not company.strip():
+                raise ValueError('company names must be non-empty strings')
+            validated[company.strip()] = None if theme is None else validate_theme(theme)
+
+        # Re-read under the file lock so concurrent edits for other companies are kept
+        with self._lock, table_lock(self.path):
+            table = load_report_themes(self.path)
+            for company, theme in validated.items():
+                table = {name: settings for name, settings in table.items()
+                         if _company_key(name) != _company_key(company)}
+                if theme is not None:
+                    table[company] = theme
+            save_report_themes(table, self.path)
+            self.loaded = False
+            self._refresh()
+            return dict(self.table)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats, cached_themes=len(self.themes), company_themes=len(self.overrides))
+
+
+report_themes = ReportThemeRegistry()
+
+
+def get_report_theme(company_name: Optional[str] = None) -> ReportTheme:
+    """Main function to get the (process-wide, cached) theme a company's reports are rendered with"""
+    return report_themes.get(company_name)
+
+
+def report_theme_fingerprint(company_name: Optional[str] = None) -> Optional[str]:
+    """Identifies a company's custom theme for report hashes; None for the default theme"""
+    settings = report_themes.settings_for(company_name)
+    return None if settings == DEFAULT_THEME else theme_fingerprint(settings)
+
+
+def update_report_themes(themes: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+    """Main function to set or remove company themes"""
+    return report_themes.update(themes)
@@ -0,0 +1,248 @@
+"""
+VeroctaAI Resilient OpenAI Client
+Per-call deadlines, jittered retries and a circuit breaker around the OpenAI SDK client
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from types import SimpleNamespace
+from typing import Dict, Any, Optional
+
+import openai
+
+OPENAI_TIMEOUT = float(os.environ.get('OPENAI_TIMEOUT', '20'))          # seconds per attempt
+OPENAI_DEADLINE = float(os.environ.get('OPENAI_DEADLINE', '45'))        # seconds per call, retries included
+OPENAI_MAX_RETRIES = int(os.environ.get('OPENAI_MAX_RETRIES', '2'))
+OPENAI_BACKOFF_BASE = float(os.environ.get('OPENAI_BACKOFF_BASE', '0.5'))
+OPENAI_BACKOFF_MAX = float(os.environ.get('OPENAI_BACKOFF_MAX', '8'))
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('OPENAI_BREAKER_FAILURES', '5'))
+BREAKER_RESET_TIMEOUT = float(os.environ.get('OPENAI_BREAKER_RESET', '30'))
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the API while the breaker is open"""
+
+
+def is_retryable(error: Exception) -> bool:
+    """Timeouts, connection failures, rate limits and 5xx responses are worth retrying"""
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, TimeoutError, ConnectionError)):
+        return True
+    return getattr(error, 'status_code', None) in RETRYABLE_STATUS_CODES
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Server-requested delay from a Retry-After header, if any"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    try:
+        return max(float(headers.get('retry-after')), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets a single trial call through after the reset timeout"""
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.transitions = {CLOSED: 0, OPEN: 0, HALF_OPEN: 0}
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str):
+        if state != self.state:
+            logging.warning(f"OpenAI circuit breaker {self.state} -> {state}")
+            self.state = state
+            self.transitions[state] += 1
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self._transition(HALF_OPEN)
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.trial_in_flight = False
+            self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.trial_in_flight = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+                self._transition(OPEN)
+
+
+class BreakerStream:
+    """A streamed completion whose outcome reaches the breaker when iteration ends, not when the stream opens"""
+
+    def __init__(self, stream, client: 'ResilientChatClient'):
+        self.stream = stream
+        self.client = client
+        self.finished = False
+
+    def __iter__(self):
+        failed = False
+        try:
+            yield from self.stream
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._finish(failed)
+
+    def _finish(self, failed: bool):
+        if self.finished:
+            return
+        self.finished = True
+        if failed:
+            self.client.breaker.record_failure()
+            self.client._count('failures')
+        else:
+            # Read to the end, or closed early by the caller (e.g. a disconnected browser)
+            self.client.breaker.record_success()
+            self.client._count('successes')
+
+    def close(self):
+        close = getattr(self.stream, 'close', None)
+        if close:
+            close()
+        self._finish(False)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class ResilientChatClient:
+    """
+    Drop-in for the SDK client's chat.completions.create with deadlines, retries and circuit breaking
+    Build the wrapped SDK client with max_retries=0 so retries are only counted here
+    """
+
+    def __init__(self, client, timeout: float = OPENAI_TIMEOUT, deadline: float = OPENAI_DEADLINE,
+                 max_retries: int = OPENAI_MAX_RETRIES, backoff_base: float = OPENAI_BACKOFF_BASE,
+                 backoff_max: float = OPENAI_BACKOFF_MAX, breaker: Optional[CircuitBreaker] = None,
+                 sleep=time.sleep):
+        self.client = client
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+        self.metrics = {
+            'calls': 0, 'successes': 0, 'failures': 0, 'retries': 0,
+            'timeouts': 0, 'short_circuited': 0, 'deadline_exceeded': 0
+        }
+        self._metrics_lock = threading.Lock()
+        # Keep the SDK call shape: client.chat.completions.create(...)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create_chat_completion))
+
+    def _count(self, metric: str):
+        with self._metrics_lock:
+            self.metrics[metric] += 1
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, never shorter than a server Retry-After"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        retry_after = _retry_after(error)
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    def create_chat_completion(self, **kwargs):
+        """Call the API within the deadline, retrying retryable errors with jittered backoff"""
+        self._count('calls')
+        if not self.breaker.allow():
+            self._count('short_circuited')
+            raise CircuitOpenError("OpenAI circuit breaker is open")
+
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            remaining = self.deadline - (time.monotonic() - started)
+            try:
+                response = self.client.chat.completions.create(
+                    timeout=max(min(self.timeout, remaining), 0.1), **kwargs
+                )
+                if kwargs.get('stream'):
+                    # Errors can still arrive mid-stream; the stream records the outcome when it ends
+                    return BreakerStream(response, self)
+                self.breaker.record_success()
+                self._count('successes')
+                return response
+            except Exception as e:
+                if isinstance(e, (openai.APITimeoutError, TimeoutError)):
+                    self._count('timeouts')
+
+                if not is_retryable(e):
+                    # 4xx client errors (bad request, auth) mean the API itself answered
+                    if getattr(e, 'status_code', None):
+                        self.breaker.record_success()
+                    else:
+                        self.breaker.record_failure()
+                    self._count('failures')
+                    raise
+
+                delay = self._backoff(attempt, e)
+                out_of_time = time.monotonic() - started + delay >= self.deadline
+                if attempt >= self.max_retries or out_of_time:
+                    if out_of_time:
+                        self._count('deadline_exceeded')
+                    self.breaker.record_failure()
+                    self._count('failures')
+                    raise
+
+                attempt += 1
+                self._count('retries')
+                logging.warning(f"OpenAI call failed ({type(e).__name__}), retry {attempt} in {delay:.2f}s")
+                self.sleep(delay)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Call counters plus breaker state and transition counts"""
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+        metrics['breaker'] = {
+            'state': self.breaker.state,
+            'consecutive_failures': self.breaker.consecutive_failures,
+            'transitions': dict(self.breaker.transitions)
+        }
+        return metrics
+
+
+def build_openai_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> Optional[ResilientChatClient]:
+    """SDK client with its own retries disabled, wrapped for resilience; base_url allows a local fake server"""
+    api_key = api_key or os.environ.get('OPENAI_API_KEY')
+    if not api_key:
+        return None
+    sdk_client = openai.OpenAI(
+        api_key=api_key,
+        base_url=base_url or os.environ.get('OPENAI_BASE_URL') or None,
+        timeout=OPENAI_TIMEOUT,
+        max_retries=0
+    )
+    return ResilientChatClient(sdk_client)
@@ -1,26 +1,47 @@
+import io
 import os
 import json
 import logging
 from datetime import datetime
-from flask import render_template, request, flash, redirect, url_for, send_file, send_from_directory, jsonify
+from flask import render_template, request, flash, redirect, url_for, send_file, send_from_directory, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, create_access_token, get_jwt_identity
 from werkzeug.utils import secure_filename
 from app import app
-from auth import validate_user, create_user, get_current_user, require_admin
+from auth import validate_user, create_user, get_current_user, get_optional_user, require_admin
 from models import create_report, get_reports_by_user, get_report_by_id, delete_report, init_sample_data
+from budgets import get_budgets_for_company, replace_budgets, delete_budget, calculate_budget_adherence
+from peer_benchmarks import rank_against_peers, benchmark_store
 from csv_parser import parse_csv_file
+from currency import normalize_currency, check_fx_rates
+from vendor_normalizer import canonicalize_transactions, get_vendor_canonicalizer, update_vendor_aliases
+from categorizer import categorize_transactions
+import gpt_utils
 from gpt_utils import generate_financial_insights
+from insight_cache import insight_cache
 from spend_score_engine import calculate_spend_score, get_score_label, get_score_color, get_enhanced_analysis
-from pdf_generator import generate_report_pdf
+from pdf_generator import resolve_chart_backend
+from report_store import report_store, new_analysis_id
+from logo_store import save_logo
+from report_theme import report_themes, update_report_themes, report_theme_fingerprint, DEFAULT_THEME, FONT_FAMILIES
+from report_model import build_report_model
+from report_renderers import REPORT_RENDERERS, render_report
+from render_service import (
+    render_service, submit_render_job, submit_analysis_pdf_job, submit_export_job, get_render_job, report_etag,
+    report_render_options, PDF_RENDER_WAIT, PDF_RENDER_ON_UPLOAD, PDF_STORAGE, EXPORT_FORMATS
+)
+from analysis_pipeline import run_analysis_pipeline
+from insight_jobs import submit_insight_job, get_job, validate_callback_url
+from insight_stream import stream_financial_insights, format_sse
 from clone_verifier import verify_project_integrity
 
 # Initialize sample data
 init_sample_data()
+check_fx_rates()
 
 # Configure upload settings
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'csv'}
-ALLOWED_LOGO_EXTENSIONS = {'png', 'jpg', 'jpeg', 'svg'}
+ALLOWED_LOGO_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
@@ -28,6 +49,9 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs('outputs', exist_ok=True)
 
+# Largest number of reports accepted by one bulk export
+BULK_EXPORT_MAX_REPORTS = int(os.environ.get('BULK_EXPORT_MAX_REPORTS', '100'))
+
 def allowed_file(filename):
     """Check if uploaded file has allowed extension"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -36,6 +60,67 @@ def allowed_logo_file(filename):
     """Check if uploaded logo file has allowed extension"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_LOGO_EXTENSIONS
 
+def report_pdf_analysis(report_data):
+    """Analysis fields for rendering a saved report as a PDF"""
+    spend_score = report_data.get('spend_score', 0)
+    return {
+        'spend_score': spend_score,
+        'total_transactions': report_data.get('data', {}).get('transactions', 0),
+        'total_amount': report_data.get('data', {}).get('total_amount', 0),
+        'filename': report_data.get('data', {}).get('filename', report_data.get('title', 'Report')),
+        'suggestions': [{'text': rec, 'priority': 'Medium'} for rec in report_data.get('insights', {}).get('recommendations', [])],
+        'category_breakdown': report_data.get('data', {}).get('top_categories', {}),
+        'score_label': 'Excellent' if spend_score >= 80 else 'Good' if spend_score >= 60 else 'Needs Work',
+        'score_color': 'Green' if spend_score >= 80 else 'Amber' if spend_score >= 60 else 'Red'
+    }
+
+def wants_flag(value):
+    """True for the usual spellings of an enabled query or form flag"""
+    return str(value).strip().lower() in ('1', 'true', 'yes')
+
+def render_wait(source):
+    """Seconds a request asked to wait for its render job (?wait=N, capped at PDF_RENDER_WAIT); 0 by default"""
+    try:
+        wait = float(source.get('wait') or 0)
+    except (TypeError, ValueError):
+        return 0
+    return min(wait, PDF_RENDER_WAIT) if wait > 0 else 0
+
+def not_modified(etag):
+    """304 when the client already holds this version; checked before anything is rendered or read"""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+def send_pdf(download_name, etag, path=None, data=None, mimetype='application/pdf'):
+    """Stream a stored file or an in-memory PDF with ETag, Content-Length and conditional GET support"""
+    return send_file(
+        path if data is None else io.BytesIO(data),
+        as_attachment=True,
+        download_name=download_name,
+        mimetype=mimetype,
+        etag=etag,
+        conditional=True
+    )
+
+def render_pending(job, body):
+    """202 for a render job that has not finished, pointing the client at its status URL"""
+    response = jsonify(body)
+    response.status_code = 202
+    response.headers['Location'] = url_for('api_render_job_status', job_id=job['id'])
+    response.headers['Retry-After'] = '2'
+    return response
+
+def render_job_summary(job):
+    """Render job fields returned to API clients"""
+    return {
+        'id': job['id'],
+        'status': job['status'],
+        'status_url': url_for('api_render_job_status', job_id=job['id'])
+    }
+
 # Legacy routes removed - now using React frontend with API endpoints
 
 @app.route('/api/health', methods=['GET'])
@@ -198,31 +283,34 @@ def download_report_pdf(report_id):
         
         # Convert report to dict for PDF generation
         report_data = report.to_dict()
+        company_name = user.get('company', 'VeroctaAI Demo')
         
-        # Generate PDF using the existing PDF generator
+        # Generate PDF using the existing PDF generator, reusing the stored copy for unchanged reports
         try:
-            pdf_path = generate_report_pdf(
-                analysis_data={
-                    'spend_score': report_data.get('spend_score', 0),
-                    'total_transactions': report_data.get('data', {}).get('transactions', 0),
-                    'total_amount': report_data.get('data', {}).get('total_amount', 0),
-                    'filename': report_data.get('data', {}).get('filename', report_data.get('title', 'Report')),
-                    'suggestions': [{'text': rec, 'priority': 'Medium'} for rec in report_data.get('insights', {}).get('recommendations', [])],
-                    'category_breakdown': report_data.get('data', {}).get('top_categories', {}),
-                    'score_label': 'Excellent' if report_data.get('spend_score', 0) >= 80 else 'Good' if report_data.get('spend_score', 0) >= 60 else 'Needs Work',
-                    'score_color': 'Green' if report_data.get('spend_score', 0) >= 80 else 'Amber' if report_data.get('spend_score', 0) >= 60 else 'Red'
-                },
-                transactions=[],
-                company_name=user.get('company', 'VeroctaAI Demo')
-            )
+            pdf_analysis = report_pdf_analysis(report_data)
+            download_name = f'verocta-report-{report_id}.pdf'
+            
+            # The ETag is the report's content hash, so an unchanged report is answered without rendering
+            etag = report_etag(pdf_analysis, [], company_name)
+            unchanged = not_modified(etag)
+            if unchanged:
+                return unchanged
+            if PDF_STORAGE == 'memory':
+                # Buffers are per process, so the PDF is rendered in this request when this worker has none
+                etag, pdf_bytes = render_service.render_pdf_bytes(pdf_analysis, [], company_name=company_name)
+                return send_pdf(download_name, etag, data=pdf_bytes)
+            
+            # Rendering happens in the render service; the request gets the job unless it asks to wait (?wait=seconds)
+            job = submit_render_job(pdf_analysis, [], company_name=company_name)
+            if render_wait(request.args):
+                job = render_service.wait(job['id'], render_wait(request.args))
+            if job['status'] == 'failed':
+                raise RuntimeError(job.get('error'))
+            if job['status'] != 'completed':
+                return render_pending(job, {'status': job['status'], 'render_job': render_job_summary(job)})
             
             # Return the PDF file
-            return send_file(
-                pdf_path,
-                as_attachment=True,
-                download_name=f'verocta-report-{report_id}.pdf',
-                mimetype='application/pdf'
-            )
+            return send_pdf(download_name, job['content_hash'], path=report_store.artifact_path(job['content_hash'], 'pdf'))
             
         except Exception as pdf_error:
             logging.error(f"PDF generation error: {str(pdf_error)}")
@@ -232,6 +320,82 @@ def download_report_pdf(report_id):
         logging.error(f"PDF download error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/reports/export', methods=['POST'])
+@jwt_required()
+def export_reports():
+    """Export several reports as a zip of PDFs or as one combined PDF with a table of contents"""
+    try:
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        data = request.get_json() or {}
+        report_ids = data.get('report_ids')
+        export_format = str(data.get('format', 'zip')).strip().lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        if not isinstance(report_ids, list) or not report_ids or not all(isinstance(rid, int) for rid in report_ids):
+            return jsonify({'error': 'report_ids must be a non-empty list of report ids'}), 400
+        if len(report_ids) > BULK_EXPORT_MAX_REPORTS:
+            return jsonify({'error': f'At most {BULK_EXPORT_MAX_REPORTS} reports can be exported at once'}), 400
+        
+        company_name = user.get('company', 'VeroctaAI Demo')
+        reports = []
+        for report_id in dict.fromkeys(report_ids):
+            report = get_report_by_id(report_id, user['id'])
+            if not report:
+                return jsonify({'error': f'Report {report_id} not found'}), 404
+            reports.append({
+                'analysis_data': report_pdf_analysis(report.to_dict()),
+                'company_name': company_name,
+                'title': report.title,
+                'filename': f'verocta-report-{report_id}.pdf'
+            })
+        
+        job = submit_export_job(reports, export_format=export_format, title=f'{company_name} Reports',
+                                owner=user['id'])
+        wait = render_wait(request.args) or render_wait(data)
+        if wait:
+            job = render_service.wait(job['id'], wait)
+        return export_response(job)
+        
+    except Exception as e:
+        logging.error(f"Report export error: {str(e)}")
+        return jsonify({'error': f'Report export failed: {str(e)}'}), 500
+
+@app.route('/api/reports/export/<job_id>', methods=['GET'])
+@jwt_required()
+def download_report_export(job_id):
+    """Download a finished bulk export"""
+    try:
+        user = get_current_user()
+        job = get_render_job(job_id)
+        if not user or not job or job.get('kind') != 'export' or job.get('owner') != user['id']:
+            return jsonify({'error': 'Export not found'}), 404
+        return not_modified(job['content_hash']) or export_response(job)
+        
+    except Exception as e:
+        logging.error(f"Report export download error: {str(e)}")
+        return jsonify({'error': f'Failed to download export: {str(e)}'}), 500
+
+def export_response(job):
+    """The export file once its job completes, otherwise the job status"""
+    if job['status'] == 'failed':
+        return jsonify({'error': f"Report export failed: {job.get('error')}"}), 500
+    if job['status'] != 'completed':
+        return render_pending(job, {
+            'status': job['status'],
+            'render_job': render_job_summary(job),
+            'download_url': url_for('download_report_export', job_id=job['id'])
+        })
+    
+    return send_pdf(
+        f"verocta-reports.{job['format']}",
+        job['content_hash'],
+        path=report_store.artifact_path(job['content_hash'], job['artifact_kind']),
+        mimetype='application/zip' if job['format'] == 'zip' else 'application/pdf'
+    )
+
 @app.route('/api/reports', methods=['POST'])
 @jwt_required()
 def create_report_endpoint():
@@ -254,6 +418,178 @@ def create_report_endpoint():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/vendors/aliases', methods=['GET'])
+@jwt_required()
+def get_vendor_aliases():
+    """Get the vendor alias table used for canonicalization"""
+    try:
+        canonicalizer = get_vendor_canonicalizer()
+        return jsonify({
+            'aliases': canonicalizer.aliases,
+            'cache': canonicalizer.cache_info()
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/vendors/aliases', methods=['PUT'])
+@require_admin
+def put_vendor_aliases():
+    """Replace the vendor alias table (admin only; it applies to every company)"""
+    try:
+        data = request.get_json() or {}
+        canonicalizer = update_vendor_aliases(data.get('aliases'))
+        return jsonify({
+            'message': 'Vendor aliases updated successfully',
+            'aliases': canonicalizer.aliases
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/reports/themes', methods=['GET'])
+@jwt_required()
+def get_report_themes():
+    """Get the report themes the user may edit (every company's for admins) and the default they override"""
+    try:
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        is_admin = user['role'] == 'admin'
+        response = {
+            'default': DEFAULT_THEME,
+            'fonts': list(FONT_FAMILIES),
+            'themes': report_themes.settings_table(None if is_admin else user['company'])
+        }
+        if is_admin:
+            response['cache'] = report_themes.get_stats()
+        return jsonify(response)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/reports/themes', methods=['PUT'])
+@jwt_required()
+def put_report_themes():
+    """Set or remove report themes; users may only change their own company's theme"""
+    try:
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        data = request.get_json() or {}
+        themes = data.get('themes')
+        
+        if not isinstance(themes, dict):
+            return jsonify({'error': 'themes must map company names to theme settings'}), 400
+        if user['role'] != 'admin' and any(company.strip().lower() != user['company'].strip().lower()
+                                           for company in themes):
+            return jsonify({'error': "Only admins can change other companies' themes"}), 403
+        
+        try:
+            themes = update_report_themes(themes)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'message': 'Report themes updated successfully',
+            'themes': themes if user['role'] == 'admin' else report_themes.settings_table(user['company'])
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/budgets', methods=['GET'])
+@jwt_required()
+def get_budgets():
+    """Get category budgets for the current user's company"""
+    try:
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        budgets = get_budgets_for_company(user['company'])
+        return jsonify({
+            'budgets': [budget.to_dict() for budget in budgets],
+            'total': len(budgets)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/budgets', methods=['PUT'])
+@jwt_required()
+def put_budgets():
+    """Replace category budgets for the current user's company"""
+    try:
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        data = request.get_json() or {}
+        limits = data.get('budgets')
+        if not isinstance(limits, dict):
+            return jsonify({'error': 'budgets must map category names to monthly limits'}), 400
+        
+        try:
+            budgets = replace_budgets(user['company'], limits)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'message': 'Budgets updated successfully',
+            'budgets': [budget.to_dict() for budget in budgets]
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/budgets/<path:category>', methods=['DELETE'])
+@jwt_required()
+def delete_budget_endpoint(category):
+    """Delete a single category budget"""
+    try:
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        if not delete_budget(user['company'], category):
+            return jsonify({'error': 'Budget not found'}), 404
+        
+        return jsonify({'message': 'Budget deleted successfully'})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/benchmarks', methods=['GET'])
+@jwt_required()
+def get_benchmark_summary():
+    """Get anonymized peer counts per industry"""
+    try:
+        industries = benchmark_store.summary()
+        return jsonify({
+            'industries': industries,
+            'total_peers': sum(industries.values())
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/insights/cache', methods=['GET'])
+@require_admin
+def get_insight_cache_stats():
+    """Get insight cache hit/miss counters for this worker"""
+    try:
+        return jsonify({'cache': insight_cache.get_stats()})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/insights/client', methods=['GET'])
+@require_admin
+def get_insight_client_metrics():
+    """Get OpenAI call, retry and circuit breaker metrics for this worker"""
+    try:
+        if not gpt_utils.openai_client:
+            return jsonify({'configured': False})
+        return jsonify({'configured': True, 'client': gpt_utils.openai_client.get_metrics()})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/upload', methods=['POST'])
 def api_upload():
     """API endpoint for CSV upload and analysis"""
@@ -267,16 +603,39 @@ def api_upload():
         
         # Get company branding information
         company_name = request.form.get('companyName', '').strip()
+        industry = request.form.get('industry', '').strip()
         logo_path = None
         
+        # Async mode returns right after scoring; insights and the PDF follow in a background job
+        async_flag = request.args.get('async', request.form.get('async', ''))
+        async_insights = str(async_flag).strip().lower() in ('1', 'true', 'yes')
+        callback_url = request.form.get('callbackUrl', '').strip() or None
+        callback_error = validate_callback_url(callback_url)
+        if callback_error:
+            return jsonify({'error': callback_error}), 400
+        
+        # Chart backend for this report: matplotlib images or native ReportLab vector charts
+        try:
+            chart_backend = resolve_chart_backend(request.args.get('chartBackend', request.form.get('chartBackend')))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        # Optional appendix listing every transaction (the auditors' full ledger)
+        include_appendix = wants_flag(request.args.get('appendix', request.form.get('appendix', '')))
+        render_options = report_render_options(chart_backend, include_appendix, company_name)
+        
         # Handle logo upload
         if 'companyLogo' in request.files:
             logo_file = request.files['companyLogo']
-            if logo_file and logo_file.filename and allowed_logo_file(logo_file.filename):
-                logo_filename = secure_filename(f"logo_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{logo_file.filename}")
-                logo_path = os.path.join(app.config['UPLOAD_FOLDER'], logo_filename)
-                logo_file.save(logo_path)
-                logging.info(f"Logo uploaded: {logo_filename}")
+            if logo_file and logo_file.filename:
+                if not allowed_logo_file(logo_file.filename):
+                    return jsonify({'error': 'Company logo must be a PNG or JPEG image'}), 400
+                # Stored once per content hash and normalized for print; the same logo reuses one file
+                try:
+                    logo_path = save_logo(logo_file.read(), logo_file.filename)
+                    logging.info(f"Logo uploaded: {logo_file.filename} -> {os.path.basename(logo_path)}")
+                except ValueError as e:
+                    logging.warning(f"Rejecting company logo {logo_file.filename}: {str(e)}")
+                    return jsonify({'error': str(e)}), 400
         
         filename = secure_filename(file.filename)
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
@@ -288,11 +647,29 @@ def api_upload():
         if not transactions:
             return jsonify({'error': 'No valid transactions found in the CSV file'}), 400
         
-        # Calculate enhanced spend score
-        enhanced_analysis = get_enhanced_analysis(transactions)
+        # Convert everything to one reporting currency before any totals are taken
+        currency_stats = normalize_currency(transactions, request.form.get('reportingCurrency'))
+        
+        # Collapse raw vendor strings and label uncategorized rows before scoring
+        canonicalize_transactions(transactions)
+        categorization_stats = categorize_transactions(transactions)
         
-        # Generate AI insights
-        insights = generate_financial_insights(transactions)
+        # Render the PDF now, or only when it is first downloaded (from the stored report model)
+        render_pdf_now = PDF_RENDER_ON_UPLOAD or include_appendix
+        
+        # Score against the signed-in user's company budgets (never the free-text companyName)
+        # while AI insights and charts run concurrently
+        # Charts are only needed here when the PDF is rendered now, in this process
+        user = get_optional_user()
+        budgets = get_budgets_for_company(user['company']) if user else []
+        pipeline_result = run_analysis_pipeline(transactions, budgets,
+                                                include_insights=not async_insights, chart_backend=chart_backend,
+                                                render_charts=render_pdf_now and not render_service.uses_processes)
+        enhanced_analysis = pipeline_result['enhanced_analysis']
+        insights = pipeline_result['insights']
+        
+        # Rank against anonymized peers; only signed-in companies are recorded (one row each)
+        peer_benchmarks = rank_against_peers(user['company'] if user else None, industry, enhanced_analysis)
         
         # Prepare analysis results with enhanced data
         analysis_data = {
@@ -300,57 +677,211 @@ def api_upload():
             'tier_info': enhanced_analysis['tier_info'],
             'score_breakdown': enhanced_analysis['score_breakdown'],
             'suggestions': insights,
+            'insights_status': 'pending' if async_insights else 'completed',
             'total_transactions': len(transactions),
             'total_amount': sum(t.get('amount', 0) for t in transactions),
             'enhanced_metrics': enhanced_analysis['transaction_summary'],
+            'categorization': categorization_stats,
+            'currency': currency_stats,
+            'budget_report': enhanced_analysis['budget_report'],
+            'peer_benchmarks': peer_benchmarks,
             'filename': filename,
             'green_reward_eligible': enhanced_analysis['tier_info'].get('green_reward_eligible', False),
             'company_name': company_name if company_name else None,
             'logo_path': logo_path if logo_path else None
         }
         
-        # Save JSON output
-        output_json_path = os.path.join('outputs', 'verocta_analysis_output.json')
-        with open(output_json_path, 'w') as f:
-            json.dump(analysis_data, f, indent=2, default=str)
+        # Each upload gets its own analysis id; identical analyses share stored artifacts
+        analysis_id = new_analysis_id()
+        
+        def queue_pdf():
+            """Queue the PDF render when it renders at upload; the job adds the PDF to this analysis when it is ready"""
+            if not render_pdf_now:
+                return None
+            return submit_render_job(analysis_data, transactions, company_name=company_name, logo_path=logo_path,
+                                     chart_backend=chart_backend, analysis_id=analysis_id,
+                                     charts=pipeline_result['charts'], appendix=include_appendix)
         
-        # Generate PDF report with company branding
-        pdf_path = generate_report_pdf(analysis_data, transactions, company_name, logo_path)
+        def save_analysis():
+            """Store the analysis with the report model its HTML, JSON and PDF reports are rendered from"""
+            report_model = build_report_model(analysis_data, transactions, company_name, logo_path)
+            report_store.save_report(analysis_id, analysis_data, transactions, company_name, logo_path,
+                                     render_options=render_options, report_model=report_model)
         
         # Prepare API response
         response_data = {
             'success': True,
+            'analysis_id': analysis_id,
+            'report_url': url_for('api_download_report', analysis_id=analysis_id),
+            'report_urls': {report_format: url_for('api_download_report', analysis_id=analysis_id, format=report_format)
+                            for report_format in REPORT_RENDERERS},
             'filename': filename,
             'spend_score': enhanced_analysis['final_score'],
             'tier_info': enhanced_analysis['tier_info'],
             'score_breakdown': enhanced_analysis['score_breakdown'],
             'transaction_summary': enhanced_analysis['transaction_summary'],
+            'categorization': categorization_stats,
+            'currency': currency_stats,
+            'budget_report': enhanced_analysis['budget_report'],
+            'peer_benchmarks': peer_benchmarks,
             'ai_insights': insights,
             'analysis_timestamp': datetime.now().isoformat(),
             'company_name': company_name if company_name else None,
             'logo_path': logo_path if logo_path else None,
-            'pdf_available': os.path.exists(pdf_path)
+            'timings': pipeline_result['timings'],
+            'prompt_usage': pipeline_result['prompt_usage']
         }
         
+        # Store the scored analysis and its report model now; the PDF is added by its render job
+        save_analysis()
+        
+        if async_insights:
+            def finish_report(suggestions):
+                """Store the completed analysis and queue its PDF once insights arrive"""
+                analysis_data['suggestions'] = suggestions
+                analysis_data['insights_status'] = 'completed'
+                save_analysis()
+                render_job = queue_pdf()
+                return {'pdf_available': False, 'analysis_id': analysis_id,
+                        'render_job_id': render_job['id'] if render_job else None}
+            
+            job = submit_insight_job(transactions, callback_url=callback_url, on_complete=finish_report,
+                                     metadata={'filename': filename, 'company_name': company_name or None,
+                                               'analysis_id': analysis_id},
+                                     budget_report=enhanced_analysis['budget_report'])
+            response_data.update({
+                'pdf_available': False,
+                'insight_job': {
+                    'id': job['id'],
+                    'status': job['status'],
+                    'status_url': url_for('api_insight_job_status', job_id=job['id'])
+                }
+            })
+            return jsonify(response_data), 202
+        
+        # The PDF report with company branding renders off the request; report_url serves it when ready
+        render_job = queue_pdf()
+        response_data.update({
+            'pdf_available': False,
+            'render_job': render_job_summary(render_job) if render_job else None
+        })
+        
         return jsonify(response_data)
         
     except Exception as e:
         logging.error(f"API upload error: {str(e)}")
         return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
 
+@app.route('/api/insights/jobs/<job_id>', methods=['GET'])
+def api_insight_job_status(job_id):
+    """API endpoint to poll an asynchronous insight job"""
+    try:
+        job = get_job(job_id)
+        if not job:
+            return jsonify({'error': 'Insight job not found'}), 404
+        
+        return jsonify({
+            'id': job['id'],
+            'status': job['status'],
+            'created_at': job.get('created_at'),
+            'started_at': job.get('started_at'),
+            'completed_at': job.get('completed_at'),
+            'ai_insights': job.get('suggestions'),
+            'result': job.get('result'),
+            'error': job.get('error'),
+            'callback': job.get('callback')
+        })
+        
+    except Exception as e:
+        logging.error(f"API insight job error: {str(e)}")
+        return jsonify({'error': f'Failed to retrieve insight job: {str(e)}'}), 500
+
+@app.route('/api/render/jobs/<job_id>', methods=['GET'])
+def api_render_job_status(job_id):
+    """API endpoint to poll a PDF render job"""
+    try:
+        job = get_render_job(job_id)
+        if not job:
+            return jsonify({'error': 'Render job not found'}), 404
+        
+        response = {
+            'id': job['id'],
+            'status': job['status'],
+            'analysis_id': job.get('analysis_id'),
+            'created_at': job.get('created_at'),
+            'started_at': job.get('started_at'),
+            'completed_at': job.get('completed_at'),
+            'render_seconds': job.get('render_seconds'),
+            'page_count': job.get('pages'),
+            'appendix_rows': job.get('appendix_rows'),
+            'pdf_available': job.get('pdf_available', False),
+            'error': job.get('error')
+        }
+        if job.get('analysis_id'):
+            response['report_url'] = url_for('api_download_report', analysis_id=job['analysis_id'])
+        if job.get('kind') == 'export':
+            response['download_url'] = url_for('download_report_export', job_id=job['id'])
+        return jsonify(response)
+        
+    except Exception as e:
+        logging.error(f"API render job error: {str(e)}")
+        return jsonify({'error': f'Failed to retrieve render job: {str(e)}'}), 500
+
+@app.route('/api/insights/stream', methods=['POST'])
+def api_stream_insights():
+    """API endpoint streaming AI insights for an uploaded CSV as server-sent events"""
+    try:
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file provided'}), 400
+        
+        file = request.files['file']
+        if file.filename == '' or not allowed_file(file.filename):
+            return jsonify({'error': 'Invalid file type. Only CSV files are allowed.'}), 400
+        
+        filename = secure_filename(file.filename)
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        file.save(filepath)
+        
+        transactions = parse_csv_file(filepath)
+        if not transactions:
+            return jsonify({'error': 'No valid transactions found in the CSV file'}), 400
+        
+        # Same normalization as /api/upload so prompts (and cache keys) match
+        normalize_currency(transactions, request.form.get('reportingCurrency'))
+        canonicalize_transactions(transactions)
+        categorize_transactions(transactions)
+        
+        # Rule-based fallbacks mention overruns of the signed-in company's budgets
+        user = get_optional_user()
+        budgets = get_budgets_for_company(user['company']) if user else []
+        budget_report = calculate_budget_adherence(transactions, budgets) if budgets else None
+        
+        def events():
+            for event, data in stream_financial_insights(transactions, budget_report=budget_report):
+                yield format_sse(event, data)
+        
+        return Response(
+            stream_with_context(events()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+        
+    except Exception as e:
+        logging.error(f"API insight stream error: {str(e)}")
+        return jsonify({'error': f'Insight streaming failed: {str(e)}'}), 500
+
 @app.route('/api/spend-score', methods=['GET'])
-def api_spend_score():
-    """API endpoint to get latest SpendScore metrics"""
+@app.route('/api/spend-score/<analysis_id>', methods=['GET'])
+def api_spend_score(analysis_id=None):
+    """API endpoint to get SpendScore metrics for an analysis (latest when no id is given)"""
     try:
-        # Check if we have recent analysis data
-        output_json_path = os.path.join('outputs', 'verocta_analysis_output.json')
+        analysis_data = report_store.load_analysis(analysis_id)
         
-        if not os.path.exists(output_json_path):
+        if analysis_data is None:
+            if analysis_id:
+                return jsonify({'error': 'Analysis not found'}), 404
             return jsonify({'error': 'No analysis data available. Please upload a CSV file first.'}), 404
         
-        with open(output_json_path, 'r') as f:
-            analysis_data = json.load(f)
-        
         # Return SpendScore metrics
         response = {
             'spend_score': analysis_data.get('spend_score'),
@@ -368,25 +899,89 @@ def api_spend_score():
         return jsonify({'error': f'Failed to retrieve SpendScore: {str(e)}'}), 500
 
 @app.route('/api/report', methods=['GET'])
-def api_download_report():
-    """API endpoint to download latest PDF report"""
+@app.route('/api/report/<analysis_id>', methods=['GET'])
+def api_download_report(analysis_id=None):
+    """API endpoint to get the report for an analysis (latest when no id is given) as PDF, HTML or JSON"""
     try:
-        pdf_path = os.path.join('outputs', 'verocta_report.pdf')
+        report_format = request.args.get('format', 'pdf').strip().lower()
+        if report_format not in REPORT_RENDERERS:
+            return jsonify({'error': f"Unknown report format '{report_format}'; expected one of {', '.join(REPORT_RENDERERS)}"}), 400
+        
+        # Read the record once so the ETag and the file belong to the same version of the latest report
+        record = report_store.get_record(analysis_id)
+        if report_format != 'pdf':
+            return report_model_response(record, report_format, analysis_id)
         
-        if not os.path.exists(pdf_path):
+        pdf_path = None
+        if record:
+            # Keyed on the company theme too, so a theme edit changes the ETag and renders a fresh PDF
+            pdf_hash = render_service.analysis_pdf_hash(record)
+            if pdf_hash != record['content_hash'] and not record['artifacts'].get('model'):
+                # Rendered at upload with the transaction appendix; there is no model to render it again from
+                pdf_hash = record['content_hash']
+            unchanged = not_modified(pdf_hash)
+            if unchanged:
+                return unchanged
+            pdf_path = report_store.artifact_path(pdf_hash, 'pdf')
+        
+        if record and PDF_STORAGE == 'memory' and not os.path.exists(pdf_path):
+            # Rendered in this request into the worker's buffers instead of the report store
+            rendered = render_service.render_analysis_pdf_bytes(record)
+            if rendered:
+                return send_pdf('verocta_financial_report.pdf', rendered[0], data=rendered[1])
+        
+        if not pdf_path or not os.path.exists(pdf_path):
+            if record:
+                # Rendered on first download from the stored report model; ?wait=seconds waits for the job
+                job = submit_analysis_pdf_job(record['analysis_id'])
+                if job and render_wait(request.args):
+                    job = render_service.wait(job['id'], render_wait(request.args))
+                if job and job['status'] == 'failed':
+                    raise RuntimeError(job.get('error'))
+                if job and job['status'] == 'completed':
+                    return send_pdf('verocta_financial_report.pdf', job['content_hash'],
+                                    path=report_store.artifact_path(job['content_hash'], 'pdf'))
+                
+                # Analysis stored, PDF render job not finished yet
+                body = {'status': 'rendering', 'message': 'PDF report is still being generated',
+                        'render_job': render_job_summary(job) if job else None}
+                if job:
+                    return render_pending(job, body)
+                response = jsonify(body)
+                response.headers['Retry-After'] = '2'
+                return response, 202
+            if analysis_id:
+                return jsonify({'error': 'PDF report not found'}), 404
             return jsonify({'error': 'No PDF report available. Please analyze a CSV file first.'}), 404
         
-        return send_file(
-            pdf_path, 
-            as_attachment=True, 
-            download_name='verocta_financial_report.pdf',
-            mimetype='application/pdf'
-        )
+        return send_pdf('verocta_financial_report.pdf', pdf_hash, path=pdf_path)
         
     except Exception as e:
         logging.error(f"API report download error: {str(e)}")
         return jsonify({'error': f'Failed to download report: {str(e)}'}), 500
 
+def report_model_response(record, report_format, analysis_id=None):
+    """An analysis's report rendered from its stored model; cheap enough to render per request"""
+    if not record:
+        if analysis_id:
+            return jsonify({'error': 'Report not found'}), 404
+        return jsonify({'error': 'No report available. Please analyze a CSV file first.'}), 404
+    
+    model = report_store.load_model(record['analysis_id'])
+    if model is None:
+        return jsonify({'error': 'This analysis was stored without a report model; only its PDF is available'}), 404
+    
+    # The company theme styles the HTML and may change after the analysis was stored
+    etag = '-'.join(filter(None, [record['content_hash'], report_format,
+                                  report_theme_fingerprint(model['company_name'])]))
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
+    
+    response = Response(render_report(model, report_format), mimetype=REPORT_RENDERERS[report_format]['mimetype'])
+    response.set_etag(etag)
+    return response
+
 @app.route('/api/verify-clone', methods=['GET'])
 def api_verify_clone():
     """API endpoint to check clone integrity status"""
@@ -422,18 +1017,49 @@ def api_documentation():
         "endpoints": {
             "POST /upload": {
                 "description": "Upload CSV and trigger analysis",
+                "parameters": {
+                    "file": "CSV file (multipart/form-data)",
+                    "Authorization": "Optional bearer token; signed-in uploads use the company's budgets and are recorded as its peer benchmark",
+                    "async": "Optional; return after scoring with an insight job id (query or form)",
+                    "callbackUrl": "Optional; public URL on a host in INSIGHT_CALLBACK_ALLOWED_HOSTS that receives a POST when the insight job finishes",
+                    "chartBackend": "Optional; 'matplotlib' (default) or 'reportlab' for native vector charts",
+                    "appendix": "Optional; append every transaction to the PDF as a paginated ledger (renders the PDF at upload)"
+                },
+                "response": "Analysis results with SpendScore, insights and report_urls per format; render_job when the PDF renders at upload (202 with insight_job in async mode)"
+            },
+            "GET /render/jobs/<job_id>": {
+                "description": "Poll a PDF render job",
+                "response": "Job status, render time, page count and report_url once the PDF is ready"
+            },
+            "GET|PUT /reports/themes": {
+                "description": "Read or set report themes (primary_color, muted_color, highlight_color, font); users see and change only their own company's theme, admins any company's",
+                "parameters": {
+                    "themes": "PUT; company name -> theme settings, merged into the table (null removes the company's theme)"
+                },
+                "response": "Company themes keyed by company name; companies without one use the default theme"
+            },
+            "POST /insights/stream": {
+                "description": "Stream AI insights for a CSV as server-sent events",
                 "parameters": {
                     "file": "CSV file (multipart/form-data)"
                 },
-                "response": "Analysis results with SpendScore and insights"
+                "response": "text/event-stream of 'suggestion' events followed by a 'done' event"
             },
-            "GET /spend-score": {
-                "description": "Return JSON of latest SpendScore metrics",
+            "GET /insights/jobs/<job_id>": {
+                "description": "Poll an asynchronous insight job",
+                "response": "Job status, AI insights and PDF availability once completed"
+            },
+            "GET /spend-score[/<analysis_id>]": {
+                "description": "Return JSON of SpendScore metrics for an analysis (latest when no id is given)",
                 "response": "SpendScore breakdown and tier information"
             },
-            "GET /report": {
-                "description": "Download latest PDF report",
-                "response": "PDF file download"
+            "GET /report[/<analysis_id>]": {
+                "description": "Get the report for an analysis (latest when no id is given)",
+                "parameters": {
+                    "format": "Optional; 'pdf' (default), 'html' for a lightweight page or 'json' for chart-ready report data",
+                    "wait": f"Optional; seconds (at most {PDF_RENDER_WAIT:g}) to wait for a PDF that is not rendered yet"
+                },
+                "response": "The report with an ETag; 304 for an unchanged report. PDFs render on first download (202 with the render job, Location and Retry-After while rendering)"
             },
             "GET /verify-clone": {
                 "description": "Returns sync integrity status",
@@ -0,0 +1,174 @@
+"""
+VeroctaAI Rule-Based Insights
+Deterministic {priority, text} suggestions from computed spend signals, used as the
+fast default and as the fallback when GPT is unavailable
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+
+from transaction_aggregates import TransactionAggregates
+from spend_score_engine import SpendScoreEngine, normalize_category
+
+PRIORITIES = ['High', 'Medium', 'Low']
+
+# Signal thresholds
+VENDOR_CONCENTRATION_SHARE = 0.30     # one vendor above this share of spend
+TOP3_CONCENTRATION_SHARE = 0.60
+SUBSCRIPTION_MIN_CHARGES = 3
+SUBSCRIPTION_MAX_VARIATION = 0.10     # coefficient of variation of charge amounts
+SUBSCRIPTION_INTERVAL_DAYS = (6, 40)  # weekly to monthly cadence
+SPIKE_BASELINE_MULTIPLE = 5.0       # charge vs the vendor's (or category's) other charges
+WASTE_SHARE = 0.15
+
+
+def _money(amount: float) -> str:
+    return f"${amount:,.2f}"
+
+
+def _plural(count: int, noun: str) -> str:
+    return f"{count} {noun}" if count == 1 else f"{count} {noun}s"
+
+
+def _vendor_concentration(aggregates: TransactionAggregates) -> List[Tuple[float, str]]:
+    total = aggregates.total_amount
+    if total <= 0 or len(aggregates.vendor_spending) < 2:
+        return []
+
+    ranked = sorted(aggregates.vendor_spending.items(), key=lambda x: (-x[1], str(x[0])))
+    vendor, amount = ranked[0]
+    share = amount / total
+    # A single large payment is a spike, not a supplier relationship
+    if share >= VENDOR_CONCENTRATION_SHARE and aggregates.vendor_frequency[vendor] > 1:
+        return [(share, f"{vendor} accounts for {share:.0%} of spend ({_money(amount)} across "
+                        f"{_plural(aggregates.vendor_frequency[vendor], 'transaction')}). Negotiate volume pricing "
+                        f"or a committed-spend discount, and confirm a second supplier to reduce dependency.")]
+
+    top3 = sum(amount for _, amount in ranked[:3])
+    if len(ranked) > 3 and top3 / total >= TOP3_CONCENTRATION_SHARE:
+        names = ', '.join(str(v) for v, _ in ranked[:3])
+        return [(0.8 * top3 / total, f"Three vendors ({names}) make up {top3 / total:.0%} of spend "
+                                     f"({_money(top3)}). Review these contracts first for renegotiation.")]
+    return []
+
+
+def detect_subscriptions(aggregates: TransactionAggregates) -> List[Dict[str, Any]]:
+    """Vendors charging near-identical amounts on a regular cadence"""
+    subscriptions = []
+    for vendor, count in aggregates.vendor_frequency.items():
+        if count < SUBSCRIPTION_MIN_CHARGES:
+            continue
+        if aggregates.vendor_amount_variation(vendor) > SUBSCRIPTION_MAX_VARIATION:
+            continue
+        first, last = aggregates.vendor_first_date.get(vendor), aggregates.vendor_last_date.get(vendor)
+        if first is None or last is None:
+            continue
+        interval = (last - first).days / (count - 1)
+        if SUBSCRIPTION_INTERVAL_DAYS[0] <= interval <= SUBSCRIPTION_INTERVAL_DAYS[1]:
+            charge = aggregates.vendor_spending[vendor] / count
+            subscriptions.append({
+                'vendor': vendor,
+                'charge': charge,
+                'charges': count,
+                'interval_days': round(interval),
+                'annualized': charge * 365 / interval if interval else charge * 12
+            })
+    return sorted(subscriptions, key=lambda s: (-s['annualized'], str(s['vendor'])))
+
+
+def _subscriptions(aggregates: TransactionAggregates) -> List[Tuple[float, str]]:
+    subscriptions = detect_subscriptions(aggregates)
+    if not subscriptions or aggregates.total_amount <= 0:
+        return []
+
+    annualized = sum(s['annualized'] for s in subscriptions)
+    listed = ', '.join(f"{s['vendor']} ({_money(s['charge'])} every ~{s['interval_days']} days)"
+                       for s in subscriptions[:3])
+    more = f" and {len(subscriptions) - 3} more" if len(subscriptions) > 3 else ''
+    share = sum(s['charge'] * s['charges'] for s in subscriptions) / aggregates.total_amount
+    return [(0.2 + share, f"Detected {_plural(len(subscriptions), 'recurring charge')} worth about "
+                          f"{_money(annualized)} a year: {listed}{more}. Cancel unused seats or "
+                          f"switch to annual billing where it is cheaper.")]
+
+
+def _spikes(aggregates: TransactionAggregates) -> List[Tuple[float, str]]:
+    spikes = aggregates.spend_spikes(SPIKE_BASELINE_MULTIPLE)
+    if not spikes:
+        return []
+
+    top, baseline, basis = spikes[0]
+    amount = float(top.get('amount', 0))
+    multiple = amount / baseline
+    usual = f"its usual {top.get('vendor', 'Unknown')} charge" if basis == 'vendor' \
+        else f"the usual {top.get('category', 'Uncategorized')} transaction"
+    return [(min(multiple / 50, 0.9), f"{_plural(len(spikes), 'one-off spend spike')} detected; the largest is "
+                                      f"{_money(amount)} at {top.get('vendor', 'Unknown')} "
+                                      f"({multiple:.0f}x {usual} of {_money(baseline)}). Require pre-approval "
+                                      f"for purchases well above a vendor's normal charge.")]
+
+
+def _waste(aggregates: TransactionAggregates) -> List[Tuple[float, str]]:
+    total = aggregates.total_amount
+    if total <= 0:
+        return []
+
+    # Same category normalization and low-value list the SpendScore waste ratio uses
+    spending, _ = aggregates.regroup_categories(normalize_category)
+    low_value = {category: amount for category, amount in spending.items()
+                 if any(lv_cat in category.lower() for lv_cat in SpendScoreEngine.LOW_VALUE_CATEGORIES)}
+    waste = sum(low_value.values())
+    share = waste / total
+    if share < WASTE_SHARE:
+        return []
+
+    top = sorted(low_value.items(), key=lambda x: (-x[1], x[0]))[:3]
+    names = ', '.join(f"{category} ({_money(amount)})" for category, amount in top)
+    return [(share, f"{share:.0%} of spend ({_money(waste)}) is in non-essential categories: {names}. "
+                    f"Set category caps; trimming these by a quarter saves about {_money(waste * 0.25)}.")]
+
+
+def _budget_overruns(budget_report: Optional[Dict[str, Any]]) -> List[Tuple[float, str]]:
+    if not budget_report or not budget_report.get('over_budget'):
+        return []
+    worst = budget_report['over_budget'][0]
+    return [(0.7, f"{_plural(budget_report['cells_over_budget'], 'category-month')} went over budget; the largest "
+                  f"was {worst['category']} in {worst['period']} at {_money(worst['spent'])} against a "
+                  f"{_money(worst['limit'])} limit. Tighten approvals for that category.")]
+
+
+def _top_category(aggregates: TransactionAggregates) -> List[Tuple[float, str]]:
+    total = aggregates.total_amount
+    if total <= 0 or not aggregates.category_spending:
+        return []
+    category, amount = sorted(aggregates.category_spending.items(), key=lambda x: (-x[1], str(x[0])))[0]
+    count = aggregates.category_counts.get(category, 0)
+    return [(0.0, f"{category} is your largest category at {_money(amount)} ({amount / total:.0%} of spend, "
+                  f"{_plural(count, 'transaction')}). Benchmark its top vendors against alternative quotes.")]
+
+
+def generate_rule_based_insights(transactions: List[Dict[str, Any]],
+                                 aggregates: Optional[TransactionAggregates] = None,
+                                 budget_report: Optional[Dict[str, Any]] = None) -> List[Dict[str, str]]:
+    """Three prioritized suggestions ranked by signal strength; same input, same output"""
+    if not transactions:
+        return [
+            {"priority": "High", "text": "No transactions were found to analyze."},
+            {"priority": "Medium", "text": "Upload a CSV export with date, vendor and amount columns."},
+            {"priority": "Low", "text": "Categorized transactions produce more specific recommendations."}
+        ]
+
+    aggregates = aggregates or TransactionAggregates(transactions)
+    candidates = []
+    for signal in (_vendor_concentration, _subscriptions, _spikes, _waste):
+        candidates.extend(signal(aggregates))
+    candidates.extend(_budget_overruns(budget_report))
+
+    # Strongest signals first; the top-category note only fills remaining slots
+    texts = [text for _, text in sorted(candidates, key=lambda c: -c[0])]
+    texts.extend(text for _, text in _top_category(aggregates))
+    if not candidates:
+        texts.append("Spending looks evenly spread with no major anomalies; review vendor contracts "
+                     "annually to keep costs in line.")
+    texts.append("Keep transactions categorized and vendor names consistent to sharpen future recommendations.")
+    texts.append("Re-run the analysis monthly to catch new recurring charges and spend spikes early.")
+
+    return [{"priority": priority, "text": text} for priority, text in zip(PRIORITIES, texts)]
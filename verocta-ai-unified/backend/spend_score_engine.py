@@ -8,7 +8,37 @@ import math
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
 from statistics import median, mean
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
+from budgets import calculate_budget_adherence as score_against_budgets
+from transaction_aggregates import TransactionAggregates
+
+# Common label variations mapped to the standard categories used for scoring
+CATEGORY_MAPPINGS = {
+    'food': 'groceries',
+    'gas': 'fuel',
+    'petrol': 'fuel',
+    'restaurant': 'dining',
+    'cafe': 'coffee',
+    'subscription': 'subscriptions',
+    'streaming': 'subscriptions',
+    'electric': 'utilities',
+    'water': 'utilities',
+    'internet': 'utilities',
+    'phone': 'utilities'
+}
+
+def normalize_category(category: str) -> str:
+    """Normalize category names for consistent analysis (shared with the rule-based insights)"""
+    if not category:
+        return 'Uncategorized'
+    
+    category = category.lower().strip()
+    
+    for key, value in CATEGORY_MAPPINGS.items():
+        if key in category:
+            return value
+    
+    return category
 
 class SpendScoreEngine:
     """Enhanced SpendScore calculation engine with detailed metrics"""
@@ -34,10 +64,14 @@ class SpendScoreEngine:
         'fast food', 'coffee', 'alcohol', 'tobacco', 'impulse purchases'
     }
     
-    def __init__(self, transactions: List[Dict[str, Any]]):
-        """Initialize with transaction data"""
+    def __init__(self, transactions: List[Dict[str, Any]], budgets: Optional[List[Any]] = None,
+                 aggregates: Optional[TransactionAggregates] = None):
+        """Initialize with transaction data, optional category budgets and precomputed aggregates"""
         self.transactions = transactions
-        self.total_amount = sum(t.get('amount', 0) for t in transactions)
+        self.budgets = budgets or []
+        self.budget_report = None
+        self.aggregates = aggregates or TransactionAggregates(transactions)
+        self.total_amount = self.aggregates.total_amount
         self.num_transactions = len(transactions)
         self.score_breakdown = {}
         
@@ -47,80 +81,31 @@ class SpendScoreEngine:
     def _prepare_data(self):
         """Prepare and clean transaction data for analysis"""
         try:
+            aggregates = self.aggregates
+            
             # Extract amounts and ensure numeric values
-            self.amounts = [float(t.get('amount', 0)) for t in self.transactions]
+            self.amounts = aggregates.amounts
             
             # Calculate median instead of average (as per requirements)
-            self.median_amount = median(self.amounts) if self.amounts else 0
-            self.mean_amount = mean(self.amounts) if self.amounts else 0
+            self.median_amount = aggregates.median_amount
+            self.mean_amount = aggregates.mean_amount
             
-            # Group by categories and vendors
-            self.category_spending = defaultdict(float)
-            self.vendor_spending = defaultdict(float)
-            self.vendor_frequency = defaultdict(int)
+            # Group by categories and vendors (categories regrouped from per-label totals)
+            category_spending, category_frequencies = aggregates.regroup_categories(normalize_category)
+            self.category_spending = defaultdict(float, category_spending)
+            self.category_frequencies = defaultdict(int, category_frequencies)
+            self.vendor_spending = defaultdict(float, aggregates.vendor_spending)
+            self.vendor_frequency = defaultdict(int, aggregates.vendor_frequency)
             
             # Process dates
-            self.transaction_dates = []
-            
-            for transaction in self.transactions:
-                # Category grouping
-                category = self._normalize_category(transaction.get('category', 'Uncategorized'))
-                amount = float(transaction.get('amount', 0))
-                self.category_spending[category] += amount
-                
-                # Vendor grouping
-                vendor = transaction.get('vendor', 'Unknown')
-                self.vendor_spending[vendor] += amount
-                self.vendor_frequency[vendor] += 1
-                
-                # Date processing
-                date = transaction.get('date')
-                if date:
-                    if isinstance(date, str):
-                        try:
-                            date = datetime.strptime(date, '%Y-%m-%d')
-                        except:
-                            try:
-                                date = datetime.strptime(date, '%m/%d/%Y')
-                            except:
-                                continue
-                    self.transaction_dates.append(date)
-            
-            self.transaction_dates.sort()
+            self.transaction_dates = aggregates.transaction_dates
             
         except Exception as e:
             logging.error(f"Error preparing data: {str(e)}")
             self.amounts = [0]
             self.median_amount = 0
             self.mean_amount = 0
-    
-    def _normalize_category(self, category: str) -> str:
-        """Normalize category names for consistent analysis"""
-        if not category:
-            return 'Uncategorized'
-        
-        category = category.lower().strip()
-        
-        # Map common variations to standard categories
-        category_mappings = {
-            'food': 'groceries',
-            'gas': 'fuel',
-            'petrol': 'fuel',
-            'restaurant': 'dining',
-            'cafe': 'coffee',
-            'subscription': 'subscriptions',
-            'streaming': 'subscriptions',
-            'electric': 'utilities',
-            'water': 'utilities',
-            'internet': 'utilities',
-            'phone': 'utilities'
-        }
-        
-        for key, value in category_mappings.items():
-            if key in category:
-                return value
-        
-        return category
+            self.category_frequencies = defaultdict(int)
     
     def calculate_frequency_score(self) -> float:
         """
@@ -131,11 +116,8 @@ class SpendScoreEngine:
             if not self.category_spending:
                 return 0.0
             
-            # Calculate transaction frequency by category
-            category_frequencies = defaultdict(int)
-            for transaction in self.transactions:
-                category = self._normalize_category(transaction.get('category', 'Uncategorized'))
-                category_frequencies[category] += 1
+            # Transaction frequency by category
+            category_frequencies = self.category_frequencies
             
             # Calculate frequency distribution score
             total_transactions = sum(category_frequencies.values())
@@ -190,12 +172,20 @@ class SpendScoreEngine:
     def calculate_budget_adherence(self) -> float:
         """
         Calculate budget adherence score (20% weight)
-        Actual spend vs benchmark/limit based on transaction patterns
+        Actual spend vs stored category budgets per month, falling back to
+        the transaction median as a benchmark when no budgets are defined
         """
         try:
             if not self.amounts:
                 return 0.0
             
+            if self.budgets:
+                self.budget_report = score_against_budgets(self.transactions, self.budgets)
+                if self.budget_report is not None:
+                    score = self.budget_report['score']
+                    self.score_breakdown['budget_adherence'] = round(score, 2)
+                    return score
+            
             # Use median as benchmark (more robust than mean)
             benchmark = self.median_amount
             
@@ -432,7 +422,8 @@ class SpendScoreEngine:
                 'mean_amount': self.mean_amount,
                 'unique_categories': len(self.category_spending),
                 'unique_vendors': len(self.vendor_spending)
-            }
+            },
+            'budget_report': self.budget_report
         }
 
 
@@ -459,7 +450,8 @@ def get_score_color(score: float) -> str:
     return tier_info['color']
 
 
-def get_enhanced_analysis(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+def get_enhanced_analysis(transactions: List[Dict[str, Any]], budgets: Optional[List[Any]] = None,
+                          aggregates: Optional[TransactionAggregates] = None) -> Dict[str, Any]:
     """Get complete enhanced analysis"""
-    engine = SpendScoreEngine(transactions)
+    engine = SpendScoreEngine(transactions, budgets, aggregates)
     return engine.get_detailed_analysis()
@@ -0,0 +1,43 @@
+"""
+VeroctaAI Table Store
+Small JSON tables on disk shared by every worker process (budgets, peer benchmarks, report themes)
+"""
+
+import os
+import json
+import fcntl
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Optional
+
+
+@contextmanager
+def table_lock(path: str):
+    """Exclusive lock across processes, held for a read-modify-write of the table at path"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.lock", 'a') as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def write_table(path: str, data: Any) -> None:
+    """Write JSON through a unique temp file so readers never see a partial table"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def table_mtime(path: str) -> Optional[float]:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
@@ -0,0 +1,41 @@
+"""
+VeroctaAI Test Configuration
+Makes the backend modules importable and points every writable store at a temp directory
+"""
+
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_data_dir = tempfile.mkdtemp(prefix='verocta-tests-')
+for name, path in {
+    'REPORT_STORE_DIR': 'reports',
+    'RENDER_JOBS_DIR': 'render_jobs',
+    'INSIGHT_JOBS_DIR': 'insight_jobs',
+    'INSIGHT_CACHE_PATH': 'insight_cache.db',
+    'LOGO_STORE_DIR': 'logos',
+    'REPORT_THEMES_PATH': 'report_themes.json',
+    'BATCH_INSIGHT_CHECKPOINT': 'batch_insights.jsonl',
+    'BUDGETS_PATH': 'budgets.json',
+    'PEER_BENCHMARKS_PATH': 'peer_benchmarks.jsonl',
+}.items():
+    os.environ.setdefault(name, os.path.join(_data_dir, path))
+os.environ.setdefault('BENCHMARK_SALT', 'test-benchmark-salt')
+os.environ.setdefault('INSIGHT_MODE', 'rules')
+os.environ.setdefault('PDF_RENDER_MODE', 'inline')
+
+import pytest
+
+
+@pytest.fixture
+def auth_headers():
+    """auth_headers(email, password) -> Authorization header for a signed-in demo user"""
+    from app import app
+
+    def login(email='verocta@devstudio.com', password='veroctaai'):
+        token = app.test_client().post('/api/auth/login', json={'email': email, 'password': password}).get_json()['token']
+        return {'Authorization': f'Bearer {token}'}
+    return login
@@ -0,0 +1,115 @@
+"""
+Frozen copy of the GPT prompt builder as it was before shared aggregates and token budgets,
+kept here so the parity tests do not depend on benchmark code
+"""
+
+import random
+from datetime import date, timedelta
+
+
+def make_transactions(rows, categories=40, vendors=2000, seed=7):
+    """Synthetic ledger with a long tail of vendors over twelve months"""
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    return [
+        {
+            'date': start + timedelta(days=rng.randrange(365)),
+            'vendor': f"Vendor {int(rng.paretovariate(1.2)) % vendors}",
+            'category': f"Category {rng.randrange(categories)}",
+            'amount': round(rng.lognormvariate(4, 1.2), 2)
+        }
+        for _ in range(rows)
+    ]
+
+
+def legacy_format_transactions_for_gpt(transactions):
+    """Prompt builder before shared aggregates: one pass plus a rescan per top category and for outliers"""
+    if not transactions:
+        return "No transaction data available."
+    
+    # Create comprehensive statistics
+    total_amount = sum(t['amount'] for t in transactions)
+    avg_amount = total_amount / len(transactions)
+    
+    # Enhanced breakdowns
+    categories = {}
+    vendors = {}
+    vendor_frequency = {}
+    monthly_patterns = {}
+    
+    for transaction in transactions:
+        category = transaction.get('category', 'Uncategorized')
+        vendor = transaction.get('vendor', 'Unknown')
+        amount = transaction.get('amount', 0)
+        date = transaction.get('date')
+        
+        # Category and vendor tracking
+        categories[category] = categories.get(category, 0) + amount
+        vendors[vendor] = vendors.get(vendor, 0) + amount
+        vendor_frequency[vendor] = vendor_frequency.get(vendor, 0) + 1
+        
+        # Monthly pattern analysis
+        if date:
+            month_key = date.strftime('%Y-%m') if hasattr(date, 'strftime') else str(date)[:7]
+            monthly_patterns[month_key] = monthly_patterns.get(month_key, 0) + amount
+    
+    # Sort by amount and identify patterns
+    top_categories = sorted(categories.items(), key=lambda x: x[1], reverse=True)[:10]
+    top_vendors = sorted(vendors.items(), key=lambda x: x[1], reverse=True)[:15]
+    frequent_vendors = sorted(vendor_frequency.items(), key=lambda x: x[1], reverse=True)[:10]
+    
+    # Identify recurring subscriptions (vendors with regular amounts)
+    likely_subscriptions = []
+    for vendor, total_spent in top_vendors[:10]:
+        frequency = vendor_frequency.get(vendor, 0)
+        if frequency >= 2:  # Appears multiple times
+            avg_per_transaction = total_spent / frequency
+            likely_subscriptions.append((vendor, total_spent, frequency, avg_per_transaction))
+    
+    # Format enhanced data for GPT
+    formatted_data = f"""
+    ENHANCED FINANCIAL DATA ANALYSIS REQUEST
+    
+    Executive Summary:
+    - Total Transactions: {len(transactions):,}
+    - Total Amount: ${total_amount:,.2f}
+    - Average Transaction: ${avg_amount:,.2f}
+    - Unique Vendors: {len(vendors)}
+    - Unique Categories: {len(categories)}
+    
+    Top Spending Categories (with optimization potential):
+    """
+    
+    for category, amount in top_categories:
+        percentage = (amount / total_amount) * 100
+        transaction_count = sum(1 for t in transactions if t.get('category') == category)
+        avg_per_category = amount / transaction_count if transaction_count > 0 else 0
+        formatted_data += f"- {category}: ${amount:,.2f} ({percentage:.1f}%) | {transaction_count} transactions | Avg: ${avg_per_category:,.2f}\n"
+    
+    formatted_data += "\nTop Vendors by Spend (consolidation opportunities):\n"
+    for vendor, amount in top_vendors:
+        percentage = (amount / total_amount) * 100
+        frequency = vendor_frequency.get(vendor, 0)
+        formatted_data += f"- {vendor}: ${amount:,.2f} ({percentage:.1f}%) | {frequency} transactions\n"
+    
+    # Add subscription analysis
+    if likely_subscriptions:
+        formatted_data += "\nLikely Recurring Subscriptions/Services:\n"
+        for vendor, total, freq, avg in likely_subscriptions:
+            formatted_data += f"- {vendor}: ${avg:,.2f}/transaction × {freq} times = ${total:,.2f} total\n"
+    
+    # Add outlier analysis
+    high_value_threshold = avg_amount * 3  # Transactions 3x above average
+    outliers = [t for t in transactions if t.get('amount', 0) > high_value_threshold]
+    if outliers:
+        formatted_data += f"\nHigh-Value Outliers (>${high_value_threshold:,.2f}+):\n"
+        for transaction in sorted(outliers, key=lambda x: x.get('amount', 0), reverse=True)[:5]:
+            formatted_data += f"- {transaction.get('vendor', 'Unknown')}: ${transaction.get('amount', 0):,.2f} ({transaction.get('category', 'Uncategorized')})\n"
+    
+    # Monthly spending patterns
+    if len(monthly_patterns) > 1:
+        formatted_data += "\nMonthly Spending Patterns:\n"
+        for month, amount in sorted(monthly_patterns.items())[-6:]:  # Last 6 months
+            formatted_data += f"- {month}: ${amount:,.2f}\n"
+    
+    return formatted_data
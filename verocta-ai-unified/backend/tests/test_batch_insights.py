@@ -0,0 +1,111 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import gpt_utils
+import batch_insights
+from batch_insights import InsightBatch, iter_stored_reports
+from report_store import ReportStore, new_analysis_id
+
+
+class StubClient:
+    """Answers every chat completion with the same three suggestions, or fails while `down`"""
+
+    def __init__(self):
+        self.calls = 0
+        self.down = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError('API unavailable')
+        content = json.dumps({'suggestions': [{'priority': p, 'text': f'{p} tip'} for p in ('High', 'Medium', 'Low')]})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+def items(*amounts):
+    return [(f'upload-{index}.csv', [{'vendor': 'Acme', 'category': 'Software', 'amount': amount}])
+            for index, amount in enumerate(amounts)]
+
+
+def latest_records(path):
+    """Last checkpoint record per item id"""
+    with open(path) as f:
+        return {record['id']: record for record in map(json.loads, f)}
+
+
+@pytest.fixture
+def batch(monkeypatch, tmp_path):
+    monkeypatch.setattr(gpt_utils, 'INSIGHT_MODE', 'gpt')
+    client = StubClient()
+
+    def make(store=None):
+        return InsightBatch(str(tmp_path / 'checkpoint.jsonl'), concurrency=2, requests_per_minute=0,
+                            client=client, cache=False, store=store)
+    return make, client
+
+
+def test_resume_returns_stored_results_without_calling_the_api(batch):
+    make, client = batch
+    first = make().run(items(10, 20))
+    assert first['completed'] == 2 and client.calls == 2
+    assert 'results' not in first
+
+    resumed = make().run(items(10, 20))
+    assert resumed['resumed'] == 2 and resumed['completed'] == 0
+    assert client.calls == 2
+
+
+def test_changed_input_or_prompt_version_is_processed_again(batch, monkeypatch):
+    make, client = batch
+    make().run(items(10, 20))
+
+    changed = make().run(items(10, 25))
+    assert (changed['resumed'], changed['completed']) == (1, 1)
+
+    monkeypatch.setattr(batch_insights, 'get_prompt_template', lambda: SimpleNamespace(version='insight_prompt_v3:abc'))
+    new_prompt = make().run(items(10, 25))
+    assert (new_prompt['resumed'], new_prompt['completed']) == (0, 2)
+
+
+def test_fallback_results_are_stored_and_retried(batch):
+    make, client = batch
+    client.down = True
+    fallback = make().run(items(10))
+    record = latest_records(make().checkpoint_path)['upload-0.csv']
+    assert fallback['fallback'] == 1
+    assert len(record['suggestions']) == 3 and record['usage']['source'] == 'rules'
+
+    client.down = False
+    retried = make().run(items(10))
+    assert retried['completed'] == 1
+    assert latest_records(make().checkpoint_path)['upload-0.csv']['suggestions'][0]['text'] == 'High tip'
+
+
+def test_stored_reports_are_regenerated_and_saved_back(batch, tmp_path):
+    make, client = batch
+    store = ReportStore(str(tmp_path / 'reports'))
+    analysis_ids = []
+    for amount in (10, 20):
+        analysis_id = new_analysis_id()
+        store.save_report(analysis_id, {'spend_score': 70, 'suggestions': [], 'insights_status': 'pending'},
+                          [{'vendor': 'Acme', 'category': 'Software', 'amount': amount}], 'Acme Corp')
+        analysis_ids.append(analysis_id)
+    latest = store.get_record()['analysis_id']
+
+    stats = make(store).run(iter_stored_reports(store))
+    assert (stats['completed'], stats['saved']) == (2, 2)
+    for analysis_id in analysis_ids:
+        analysis = store.load_analysis(analysis_id)
+        assert analysis['suggestions'][0]['text'] == 'High tip'
+        assert set(analysis['insights_key']) == {'prompt_version', 'input_hash'}
+        assert store.load_model(analysis_id)['recommendations']['counts']['High'] == 1
+        assert store.get_record(analysis_id)['company_name'] == 'Acme Corp'
+    assert store.get_record()['analysis_id'] == latest
+
+    # Already saved under the same prompt version and input: nothing is called or rewritten
+    resumed = make(store).run(iter_stored_reports(store))
+    assert (resumed['resumed'], resumed['saved']) == (2, 0)
+    assert client.calls == 2
@@ -0,0 +1,42 @@
+import pytest
+
+from app import app
+from budgets import BudgetStore, Budget, get_budgets_for_company, replace_budgets
+
+
+def test_budgets_written_by_one_store_are_seen_by_another(tmp_path):
+    path = str(tmp_path / 'budgets.json')
+    writer, reader = BudgetStore(path), BudgetStore(path)
+    assert reader.get('Acme') == []
+
+    writer.modify('Acme', lambda budgets: budgets.update(rent=Budget('Acme', 'Rent', 500)))
+    assert [(b.category, b.monthly_limit) for b in reader.get(' acme ')] == [('Rent', 500.0)]
+    assert BudgetStore(path).get('Other Co') == []
+
+
+def test_modify_merges_with_edits_from_other_processes(tmp_path):
+    path = str(tmp_path / 'budgets.json')
+    first, second = BudgetStore(path), BudgetStore(path)
+    first.get('Acme')
+    second.modify('Beta', lambda budgets: budgets.update(rent=Budget('Beta', 'Rent', 100)))
+    # first's in-memory table is stale; its write must not drop Beta
+    first.modify('Acme', lambda budgets: budgets.update(rent=Budget('Acme', 'Rent', 200)))
+    assert [b.monthly_limit for b in BudgetStore(path).get('Beta')] == [100.0]
+
+
+def test_non_finite_and_non_positive_limits_are_rejected(auth_headers):
+    client, headers = app.test_client(), auth_headers()
+    before = client.get('/api/budgets', headers=headers).get_json()['budgets']
+    # Flask's JSON parser accepts NaN and Infinity
+    for limit in ('NaN', 'Infinity', '-Infinity', '0', '-5', '"abc"', 'null'):
+        response = client.put('/api/budgets', headers=headers, data=f'{{"budgets": {{"Rent": {limit}}}}}',
+                              content_type='application/json')
+        assert response.status_code == 400, limit
+    assert client.get('/api/budgets', headers=headers).get_json()['budgets'] == before
+
+
+def test_replace_budgets_checks_every_limit_before_storing():
+    with pytest.raises(ValueError):
+        replace_budgets('Limit Check Co', {'Rent': 500, 'Travel': float('nan')})
+    assert get_budgets_for_company('Limit Check Co') == []
+    assert [b.monthly_limit for b in replace_budgets('Limit Check Co', {'Rent': '500'})] == [500.0]
@@ -0,0 +1,40 @@
+from categorizer import CategoryRuleEngine, get_category_engine
+
+RULES = [
+    {'name': 'meals', 'category': 'Meals', 'keywords': ['restaurant', 'uber eats'],
+     'patterns': [r'\b(pizza|sushi)\b']},
+    {'name': 'transport', 'category': 'Transportation', 'keywords': ['uber', 'lyft']},
+    {'name': 'pizza-supplies', 'category': 'Supplies', 'patterns': [r'pizza oven parts']},
+]
+
+
+def test_longest_keyword_wins_over_an_earlier_shorter_one():
+    engine = CategoryRuleEngine(RULES)
+    # Canonicalization turns the vendor into "Uber" while raw_vendor keeps "Uber Eats"
+    assert engine.match('Uber Uber Eats order 1234') == ('Meals', 'meals')
+    assert engine.match('UBER   EATS') == ('Meals', 'meals')
+    assert engine.match('Uber trip') == ('Transportation', 'transport')
+
+
+def test_longest_pattern_match_wins_across_rules():
+    engine = CategoryRuleEngine(RULES)
+    assert engine.match('Pizza place') == ('Meals', 'meals')
+    assert engine.match('Lyft to pizza oven parts depot') == ('Supplies', 'pizza-supplies')
+
+
+def test_shipped_rules_label_uber_eats_as_dining():
+    transactions = [{'vendor': 'Uber', 'raw_vendor': 'UBER EATS 8821', 'category': ''},
+                    {'vendor': 'Uber', 'raw_vendor': 'UBER TRIP', 'category': ''}]
+    get_category_engine().categorize_transactions(transactions)
+    assert [t['category'] for t in transactions] == ['Dining', 'Transportation']
+
+
+def test_longer_match_starting_inside_an_earlier_match_wins():
+    engine = CategoryRuleEngine([
+        {'name': 'supplies', 'category': 'Supplies', 'keywords': ['home depot']},
+        {'name': 'parking', 'category': 'Transportation', 'patterns': [r'depot', r'depot\s+parking\s+garage']},
+    ])
+    # 'home depot' is found first; the longer pattern starts at 'depot', inside it
+    assert engine.match('Home Depot Parking Garage 12') == ('Transportation', 'parking')
+    assert engine.match('Home Depot #4410') == ('Supplies', 'supplies')
+    assert engine.match('Depot') == ('Transportation', 'parking')
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from csv_parser import clean_amount_value, parse_csv_file
+from currency import normalize_currency
+
+RATES = pd.DataFrame({
+    'date': pd.to_datetime(['2024-01-02', '2024-01-02', '2024-01-02', '2024-02-01', '2024-02-01', '2024-02-01']),
+    'currency': ['USD', 'GBP', 'EUR', 'USD', 'GBP', 'EUR'],
+    'rate': [1.0, 1.25, 1.10, 1.0, 1.30, 1.05]
+})
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('$1,234.50', 1234.5),
+    ('£99', 99.0),
+    ('C$ 12.00', 12.0),
+    ('EUR 45.10', 45.1),
+    ('45.10 GBP', 45.1),
+    ('(250.00)', -250.0),
+    ('n/a', 0.0),
+    (None, 0.0),
+])
+def test_clean_amount_value(raw, expected):
+    assert clean_amount_value(raw) == expected
+
+
+def test_mixed_currency_csv_is_converted_to_the_reporting_currency(tmp_path):
+    path = tmp_path / 'mixed.csv'
+    path.write_text(
+        'Date,Vendor,Amount,Currency\n'
+        '2024-01-15,Acme,100.00,USD\n'
+        '2024-01-15,London Ltd,£100.00,\n'
+        '2024-02-10,Berlin GmbH,100.00,EUR\n'
+    )
+    transactions = parse_csv_file(str(path))
+    assert [t['currency'] for t in transactions] == ['USD', 'GBP', 'EUR']
+
+    stats = normalize_currency(transactions, 'USD', rates=RATES)
+    assert (stats['converted'], stats['unconverted'], stats['stale']) == (2, 0, 0)
+    assert [t['amount'] for t in transactions] == [100.0, 125.0, 105.0]
+    assert transactions[1]['original_amount'] == 100.0 and transactions[1]['original_currency'] == 'GBP'
+    assert {t['currency'] for t in transactions} == {'USD'}
+
+
+def test_rows_outside_the_rate_table_use_rates_only_within_the_staleness_limit():
+    transactions = [
+        {'amount': 100.0, 'currency': 'GBP', 'date': '2023-12-20'},  # before the table, next rate 13 days later
+        {'amount': 100.0, 'currency': 'GBP', 'date': '2024-02-01'},  # on the last rate date
+        {'amount': 100.0, 'currency': 'GBP', 'date': '2024-03-01'},  # 29 days after the last rate
+        {'amount': 100.0, 'currency': 'GBP', 'date': '2024-06-01'},  # far past the end of the table
+        {'amount': 100.0, 'currency': 'GBP', 'date': '2023-06-01'},  # far before the start
+    ]
+    stats = normalize_currency(transactions, 'USD', rates=RATES)
+
+    assert [t['amount'] for t in transactions] == [125.0, 130.0, 130.0, 100.0, 100.0]
+    assert [t['currency'] for t in transactions] == ['USD', 'USD', 'USD', 'GBP', 'GBP']
+    assert (stats['converted'], stats['forward_rate']) == (3, 1)
+    assert (stats['unconverted'], stats['stale']) == (2, 2)
+
+
+def test_currency_without_rates_is_left_unconverted():
+    transactions = [
+        {'amount': 100.0, 'currency': 'USD', 'date': '2024-01-15'},
+        {'amount': 100.0, 'currency': 'CHF', 'date': '2024-01-15'},
+        {'amount': 100.0, 'currency': None, 'date': '2024-01-15'},
+    ]
+    stats = normalize_currency(transactions, 'USD', rates=RATES)
+
+    assert [t['currency'] for t in transactions] == ['USD', 'CHF', 'USD']
+    assert transactions[1]['amount'] == 100.0 and 'original_amount' not in transactions[1]
+    assert (stats['converted'], stats['unconverted'], stats['stale']) == (0, 1, 0)
@@ -0,0 +1,103 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import gpt_utils
+import insight_cache
+from insight_cache import InsightCache, prompt_fingerprint
+from prompt_templates import PromptTemplate, get_prompt_template
+
+TRANSACTIONS = [
+    {'date': '2024-01-05', 'vendor': 'Acme Cloud', 'category': 'Software', 'amount': 120.0},
+    {'date': '2024-02-05', 'vendor': 'Delta', 'category': 'Travel', 'amount': 310.0},
+]
+
+
+class StubClient:
+    """Counts chat completions and answers each with three suggestions"""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        content = json.dumps({'suggestions': [{'priority': p, 'text': f'{p} tip {self.calls}'}
+                                              for p in ('High', 'Medium', 'Low')]})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return InsightCache(str(tmp_path / 'insights.db'))
+
+
+def insights(client, cache):
+    return gpt_utils.generate_financial_insights_with_usage(TRANSACTIONS, client, cache, mode='gpt')
+
+
+def test_miss_then_hit(cache):
+    assert cache.get('key') is None
+    cache.set('key', [{'priority': 'High', 'text': 'tip'}], prompt_version='v1')
+    assert cache.get('key') == [{'priority': 'High', 'text': 'tip'}]
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+    assert stats['prompt_versions'] == {'v1': 1}
+
+
+def test_expired_entries_are_misses(cache, monkeypatch):
+    cache.ttl = 60
+    cache.set('key', [])
+    now = insight_cache.time.time()
+    monkeypatch.setattr(insight_cache.time, 'time', lambda: now + 61)
+    assert cache.get('key') is None
+    assert cache.stats['expired'] == 1
+
+
+def test_least_recently_used_entries_are_evicted(cache, monkeypatch):
+    cache.max_entries = 2
+    clock = iter(range(100, 200))
+    monkeypatch.setattr(insight_cache.time, 'time', lambda: next(clock))
+    cache.set('a', [])
+    cache.set('b', [])
+    cache.get('a')
+    cache.set('c', [])
+    assert cache.get('b') is None
+    assert cache.get('a') == [] and cache.get('c') == []
+
+
+def test_fingerprint_covers_everything_that_shapes_the_answer():
+    base = dict(model='gpt-4o', system_prompt='system', template='template', formatted_data='data')
+    key = prompt_fingerprint(**base, max_tokens=1000)
+    assert key == prompt_fingerprint(**base, max_tokens=1000)
+    for change in ({'model': 'gpt-4o-mini'}, {'system_prompt': 'other'}, {'template': 'other'},
+                   {'formatted_data': 'other'}):
+        assert prompt_fingerprint(**dict(base, **change), max_tokens=1000) != key
+    assert prompt_fingerprint(**base, max_tokens=500) != key
+
+
+def test_repeated_request_calls_the_client_once(cache):
+    client = StubClient()
+    first, usage = insights(client, cache)
+    second, cached_usage = insights(client, cache)
+    assert client.calls == 1
+    assert second == first
+    assert (usage['cached'], cached_usage['cached']) == (False, True)
+
+
+def test_prompt_or_model_change_misses_the_cache(cache, monkeypatch):
+    client = StubClient()
+    insights(client, cache)
+
+    template = get_prompt_template()
+    monkeypatch.setattr(gpt_utils, 'get_prompt_template',
+                        lambda: PromptTemplate(template.name, template.text + '\nBe brief.'))
+    _, usage = insights(client, cache)
+    assert client.calls == 2 and not usage['cached']
+    insights(client, cache)
+    assert client.calls == 2
+
+    monkeypatch.setattr(gpt_utils, 'INSIGHT_MODEL', 'gpt-4o-mini')
+    _, usage = insights(client, cache)
+    assert client.calls == 3 and not usage['cached']
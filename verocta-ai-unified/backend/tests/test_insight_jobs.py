@@ -0,0 +1,143 @@
+import os
+import sys
+import time
+import socket
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+import insight_jobs
+
+
+@pytest.fixture
+def resolves_to(monkeypatch):
+    """Point every hostname at a fixed address and allow a couple of callback hosts"""
+    monkeypatch.setattr(insight_jobs, 'CALLBACK_ALLOWED_HOSTS', {'hooks.example.com', 'internal.example.com'})
+
+    def use(address):
+        monkeypatch.setattr(socket, 'getaddrinfo',
+                            lambda host, *args, **kwargs: [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, 0))])
+    return use
+
+
+def test_callbacks_are_refused_without_an_allowlist(monkeypatch):
+    monkeypatch.setattr(insight_jobs, 'CALLBACK_ALLOWED_HOSTS', set())
+    assert 'disabled' in insight_jobs.validate_callback_url('https://hooks.example.com/done')
+    assert insight_jobs.validate_callback_url(None) is None
+
+
+@pytest.mark.parametrize('address', ['127.0.0.1', '10.0.0.5', '192.168.1.1', '169.254.169.254', '100.64.0.1'])
+def test_allowlisted_hosts_resolving_to_internal_addresses_are_refused(resolves_to, address):
+    resolves_to(address)
+    assert 'non-public' in insight_jobs.validate_callback_url('https://internal.example.com/done')
+
+
+def test_public_allowlisted_host_is_accepted(resolves_to):
+    resolves_to('93.184.216.34')
+    assert insight_jobs.validate_callback_url('https://hooks.example.com/done') is None
+    assert 'not allowed' in insight_jobs.validate_callback_url('https://other.example.com/done')
+
+
+def test_callback_redirects_are_not_followed():
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            hits.append(self.path)
+            self.send_response(307)
+            self.send_header('Location', '/elsewhere')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.handle_request, daemon=True).start()
+    request = urllib.request.Request(f'http://127.0.0.1:{server.server_port}/hook', data=b'{}', method='POST')
+    with pytest.raises(urllib.error.HTTPError) as error:
+        insight_jobs._callback_opener.open(request, timeout=5)
+    server.server_close()
+    assert error.value.code == 307
+    assert hits == ['/hook']
+
+
+def test_finished_jobs_expire_from_memory_and_disk(monkeypatch, tmp_path):
+    monkeypatch.setattr(insight_jobs, 'INSIGHT_JOBS_DIR', str(tmp_path))
+    monkeypatch.setattr(insight_jobs, '_last_sweep', 0.0)
+    monkeypatch.setattr(insight_jobs, 'jobs_db', {})
+    old = (datetime.now() - timedelta(seconds=insight_jobs.INSIGHT_JOB_TTL + 60)).isoformat()
+    insight_jobs._save_job({'id': 'a' * 32, 'status': 'completed', 'completed_at': old})
+    insight_jobs._save_job({'id': 'b' * 32, 'status': 'running', 'completed_at': None})
+    stale = os.path.join(str(tmp_path), 'a' * 32 + '.json')
+    os.utime(stale, (0, 0))
+
+    insight_jobs._expire_jobs()
+    assert set(insight_jobs.jobs_db) == {'b' * 32}
+    assert not os.path.exists(stale)
+    assert insight_jobs.get_job('b' * 32)['status'] == 'running'
+
+
+@pytest.fixture
+def job_store(monkeypatch, tmp_path):
+    monkeypatch.setattr(insight_jobs, 'INSIGHT_JOBS_DIR', str(tmp_path))
+    monkeypatch.setattr(insight_jobs, '_last_sweep', 0.0)
+    monkeypatch.setattr(insight_jobs, 'jobs_db', {})
+    return tmp_path
+
+
+def poll(job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = insight_jobs.get_job(job_id)
+        if job['status'] in ('completed', 'failed') or time.monotonic() > deadline:
+            return job
+        time.sleep(0.02)
+
+
+def test_job_runs_the_generator_and_completes(job_store):
+    release = threading.Event()
+
+    def generator(transactions):
+        release.wait(5)
+        return [{'priority': 'High', 'text': f'{len(transactions)} rows'}]
+
+    job = insight_jobs.submit_insight_job([{'amount': 1}, {'amount': 2}], generator=generator,
+                                          on_complete=lambda suggestions: {'count': len(suggestions)})
+    assert job['status'] == 'queued'
+    assert insight_jobs.get_job(job['id'])['status'] in ('queued', 'running')
+
+    release.set()
+    job = poll(job['id'])
+    assert job['status'] == 'completed'
+    assert job['suggestions'] == [{'priority': 'High', 'text': '2 rows'}]
+    assert job['result'] == {'count': 1}
+    assert job['completed_at']
+
+
+def test_generator_errors_fail_the_job(job_store):
+    def generator(transactions):
+        raise RuntimeError('model unavailable')
+
+    job = poll(insight_jobs.submit_insight_job([], generator=generator)['id'])
+    assert job['status'] == 'failed'
+    assert 'model unavailable' in job['error']
+
+
+def test_unfinished_jobs_are_kept_and_orphaned_ones_fail(job_store):
+    finished = subprocess.Popen([sys.executable, '-c', 'pass'])
+    finished.wait()
+    insight_jobs._save_job({'id': 'c' * 32, 'status': 'running', 'pid': finished.pid, 'completed_at': None})
+    insight_jobs._save_job({'id': 'd' * 32, 'status': 'queued', 'pid': os.getpid(), 'completed_at': None})
+    # Old but still owned by a live worker: neither deleted nor failed
+    os.utime(os.path.join(str(job_store), 'd' * 32 + '.json'), (0, 0))
+    insight_jobs.jobs_db.clear()
+
+    insight_jobs._expire_jobs()
+    orphan = insight_jobs.get_job('c' * 32)
+    assert orphan['status'] == 'failed' and 'stopped' in orphan['error']
+    assert insight_jobs.get_job('d' * 32)['status'] == 'queued'
@@ -0,0 +1,83 @@
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import gpt_utils
+import insight_stream
+from app import app
+
+CSV = b"Date,Vendor,Category,Amount\n2024-01-05,Acme Cloud,Software,120.00\n2024-02-05,Acme Cloud,Software,120.00\n"
+
+
+class StubStream:
+    """Chat completion stream that splits one JSON answer into small chunks"""
+
+    def __init__(self, content, size=7):
+        self.chunks = [content[i:i + size] for i in range(0, len(content), size)]
+        self.sent = 0
+        self.closed = False
+
+    def __iter__(self):
+        for text in self.chunks:
+            self.sent += 1
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    answer = json.dumps({'suggestions': [{'priority': p, 'text': f'{p} priority tip'} for p in ('High', 'Medium', 'Low')]})
+    upstream = StubStream(answer)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kwargs: upstream)))
+    monkeypatch.setattr(insight_stream, 'INSIGHT_MODE', 'gpt')
+    monkeypatch.setattr(insight_stream, 'insight_cache', None)
+    monkeypatch.setattr(gpt_utils, 'openai_client', client)
+    return upstream
+
+
+def post_csv(client):
+    return client.post('/api/insights/stream', data={'file': (io.BytesIO(CSV), 'ledger.csv')},
+                       content_type='multipart/form-data', buffered=False)
+
+
+def parse_events(body):
+    events = []
+    for block in body.split('\n\n'):
+        if block:
+            lines = dict(line.split(': ', 1) for line in block.split('\n'))
+            events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+def test_stream_frames_suggestions_then_done(stream):
+    response = post_csv(app.test_client())
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    body = response.get_data(as_text=True)
+    assert body.endswith('\n\n')
+    events = parse_events(body)
+    assert [event for event, _ in events] == ['suggestion', 'suggestion', 'suggestion', 'done']
+    assert [data['priority'] for _, data in events[:3]] == ['High', 'Medium', 'Low']
+    done = events[-1][1]
+    assert done['suggestions'] == [data for _, data in events[:3]]
+    assert done['usage']['streamed'] is True and 'fallback' not in done['usage']
+    assert stream.closed
+
+
+def test_disconnect_closes_the_upstream_stream(stream):
+    response = post_csv(app.test_client())
+    chunks = response.response
+    first = next(iter(chunks))
+    assert first.startswith(b'event: suggestion\n')
+    assert not stream.closed
+
+    # The client goes away after the first event
+    response.close()
+    assert stream.closed
+    assert stream.sent < len(stream.chunks)
@@ -0,0 +1,59 @@
+import io
+
+import pytest
+from PIL import Image
+
+from app import app
+from logo_store import LogoStore
+
+CSV = b"Date,Vendor,Category,Amount\n2024-01-05,Acme Cloud,Software,120.00\n"
+
+
+def png(size):
+    output = io.BytesIO()
+    Image.new('RGB', size, 'white').save(output, format='PNG')
+    return output.getvalue()
+
+
+@pytest.fixture
+def small_pixel_limit(monkeypatch):
+    monkeypatch.setattr(Image, 'MAX_IMAGE_PIXELS', 100 * 100)
+
+
+def test_logo_is_normalized(tmp_path):
+    store = LogoStore(str(tmp_path))
+    path = store.save(png((2000, 400)), 'logo.png')
+    assert path.endswith('.jpg')
+    assert store.get_dimensions(path) == (900, 180)
+
+
+@pytest.mark.parametrize('size', [(120, 120), (300, 300)])
+def test_images_over_the_pixel_limit_are_rejected(tmp_path, small_pixel_limit, size):
+    # (120, 120) only triggers Pillow's warning, (300, 300) its error
+    with pytest.raises(ValueError, match='too large'):
+        LogoStore(str(tmp_path)).save(png(size), 'logo.png')
+
+
+def test_svg_logos_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match='SVG'):
+        LogoStore(str(tmp_path)).save(b'<svg xmlns="http://www.w3.org/2000/svg"/>', 'logo.svg')
+
+
+@pytest.mark.parametrize('logo, name', [(b'<svg xmlns="http://www.w3.org/2000/svg"/>', 'logo.svg'),
+                                        (b'not an image', 'logo.png')])
+def test_upload_with_a_rejected_logo_is_a_bad_request(logo, name):
+    response = app.test_client().post('/api/upload', data={
+        'file': (io.BytesIO(CSV), 'ledger.csv'),
+        'companyLogo': (io.BytesIO(logo), name)
+    }, content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_upload_with_a_decompression_bomb_is_a_bad_request(small_pixel_limit):
+    response = app.test_client().post('/api/upload', data={
+        'file': (io.BytesIO(CSV), 'ledger.csv'),
+        'companyLogo': (io.BytesIO(png((300, 300))), 'logo.png')
+    }, content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert 'too large' in response.get_json()['error']
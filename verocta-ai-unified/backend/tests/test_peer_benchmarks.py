@@ -0,0 +1,72 @@
+import pytest
+
+import peer_benchmarks
+from peer_benchmarks import PeerBenchmarkStore
+
+
+def test_rows_persist_and_are_seeded_into_new_stores(tmp_path):
+    path = str(tmp_path / 'peers.jsonl')
+    store = PeerBenchmarkStore(path)
+    for index in range(6):
+        store.record(f'Company {index}', 'retail', {'spend_score': 50 + index})
+    # One row per company: re-recording replaces the earlier values
+    store.record('Company 0', 'retail', {'spend_score': 90})
+
+    restarted = PeerBenchmarkStore(path)
+    restarted.refresh()
+    assert restarted.summary() == {'retail': 6}
+    ranked = restarted.percentiles({'spend_score': 95}, 'retail')
+    assert ranked['spend_score'] == {'percentile': 100.0, 'peers': 6, 'industry': 'retail'}
+
+
+def test_rows_recorded_by_another_worker_are_picked_up(tmp_path):
+    path = str(tmp_path / 'peers.jsonl')
+    first, second = PeerBenchmarkStore(path), PeerBenchmarkStore(path)
+    first.record('Acme', 'retail', {'spend_score': 70})
+    second.record('Beta', 'retail', {'spend_score': 80})
+    assert first.summary() == {'retail': 2}
+    assert second.summary() == {'retail': 2}
+
+
+def test_new_rows_are_appended_and_inserted_without_a_reload(tmp_path, monkeypatch):
+    path = tmp_path / 'peers.jsonl'
+    first, second = PeerBenchmarkStore(str(path)), PeerBenchmarkStore(str(path))
+    first.record('Acme', 'retail', {'spend_score': 70})
+    second.refresh()
+
+    def fail_bulk_load(*args, **kwargs):
+        raise AssertionError('the whole table was reloaded')
+
+    monkeypatch.setattr(first, 'bulk_load', fail_bulk_load)
+    monkeypatch.setattr(second, 'bulk_load', fail_bulk_load)
+    first.record('Beta', 'retail', {'spend_score': 60})
+    second.record('Acme', 'retail', {'spend_score': 90})
+
+    assert len(path.read_text().splitlines()) == 3
+    for store in (first, second):
+        store.refresh()
+        assert store._sorted[('spend_score', 'retail')] == [60.0, 90.0]
+
+
+def test_log_is_compacted_to_one_row_per_company(tmp_path, monkeypatch):
+    monkeypatch.setattr(peer_benchmarks, 'PEER_LOG_COMPACT_RATIO', 0)
+    path = tmp_path / 'peers.jsonl'
+    store = PeerBenchmarkStore(str(path))
+    for value in (50, 60, 70):
+        store.record('Acme', 'retail', {'spend_score': value})
+    store.record('Beta', 'retail', {'spend_score': 80})
+
+    assert len(path.read_text().splitlines()) == 2
+    restarted = PeerBenchmarkStore(str(path))
+    assert restarted.summary() == {'retail': 2}
+    assert restarted._sorted[('spend_score', 'retail')] == [70.0, 80.0]
+
+
+def test_rows_are_not_recorded_without_a_salt(tmp_path, monkeypatch):
+    monkeypatch.setattr(peer_benchmarks, 'BENCHMARK_SALT', None)
+    monkeypatch.setattr(peer_benchmarks, 'benchmark_store', PeerBenchmarkStore(str(tmp_path / 'peers.jsonl')))
+    with pytest.raises(ValueError):
+        peer_benchmarks.anonymize_company('Acme')
+
+    peer_benchmarks.rank_against_peers('Acme', 'retail', {'final_score': 70})
+    assert peer_benchmarks.benchmark_store.summary() == {}
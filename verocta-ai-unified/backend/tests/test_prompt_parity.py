@@ -0,0 +1,36 @@
+import os
+import glob
+
+import pytest
+
+from fixtures.legacy_prompt_builder import legacy_format_transactions_for_gpt, make_transactions
+from csv_parser import parse_csv_file
+from gpt_utils import format_transactions_for_gpt
+from prompt_builder import build_transaction_summary, count_tokens
+from transaction_aggregates import TransactionAggregates
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES = sorted(glob.glob(os.path.join(BACKEND_DIR, 'samples', '*.csv')))
+
+
+@pytest.mark.parametrize('path', SAMPLES, ids=os.path.basename)
+def test_prompt_matches_the_legacy_builder_on_sample_uploads(path):
+    transactions = parse_csv_file(path)
+    assert format_transactions_for_gpt(transactions) == legacy_format_transactions_for_gpt(transactions)
+
+
+@pytest.mark.parametrize('categories, vendors', [(8, 12), (40, 2000)])
+def test_prompt_within_budget_is_byte_identical(categories, vendors):
+    transactions = make_transactions(500, categories=categories, vendors=vendors)
+    aggregates = TransactionAggregates(transactions)
+    prompt, report = build_transaction_summary(aggregates, 'gpt-4o', token_budget=100000)
+    assert report['summary_level'] == 0 and report['collapsed_vendors'] == 0
+    assert prompt == format_transactions_for_gpt(transactions, aggregates) == legacy_format_transactions_for_gpt(transactions)
+
+
+def test_budgeted_summary_fits_the_budget():
+    transactions = make_transactions(5000, categories=40, vendors=2000)
+    summary, report = build_transaction_summary(TransactionAggregates(transactions), 'gpt-4o', token_budget=400)
+    assert report['summary_level'] > 0
+    assert '- Other (' in summary and report['collapsed_vendors'] > 0
+    assert count_tokens(summary, 'gpt-4o') == report['data_tokens'] <= 400
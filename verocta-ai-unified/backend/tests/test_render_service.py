@@ -0,0 +1,114 @@
+import io
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import render_service
+from app import app
+from render_service import RenderService, RENDER_JOB_TTL
+from report_store import ReportStore
+
+ANALYSIS = {'spend_score': 72, 'total_spending': 1200.0, 'suggestions': [], 'category_breakdown': {}}
+TRANSACTIONS = [{'date': '2024-01-05', 'vendor': 'Acme Cloud', 'category': 'Software', 'amount': 1200.0}]
+
+
+@pytest.fixture
+def service(tmp_path):
+    return RenderService(mode='inline', workers=1, jobs_dir=str(tmp_path / 'jobs'),
+                         store=ReportStore(str(tmp_path / 'store')))
+
+
+def test_unknown_render_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="'thread'"):
+        RenderService(mode='thread', jobs_dir=str(tmp_path / 'jobs'), store=ReportStore(str(tmp_path / 'store')))
+
+
+def test_finished_jobs_expire_from_memory_and_disk(service):
+    old = (datetime.now() - timedelta(seconds=RENDER_JOB_TTL + 60)).isoformat()
+    service._save_job({'id': 'a' * 32, 'status': 'completed', 'completed_at': old})
+    service._save_job({'id': 'b' * 32, 'status': 'running', 'completed_at': None})
+    stale = service._job_path('a' * 32)
+    os.utime(stale, (0, 0))
+
+    service._expire_jobs()
+    assert set(service.jobs) == {'b' * 32}
+    assert not os.path.exists(stale)
+    assert service.get_job('a' * 32) is None
+
+
+def test_pruned_artifact_is_rendered_again(service, monkeypatch):
+    job = service.wait(service.submit(ANALYSIS, TRANSACTIONS)['id'], 30)
+    assert job['status'] == 'completed'
+    path = service.store.artifact_path(job['content_hash'], 'pdf')
+
+    # A prune removes the PDF between the existence check and the refresh
+    real_is_rendered = service._is_rendered
+    def pruned_after_check(job, content_hash):
+        rendered = real_is_rendered(job, content_hash)
+        os.remove(path)
+        return rendered
+    monkeypatch.setattr(service, '_is_rendered', pruned_after_check)
+    job = service.submit(ANALYSIS, TRANSACTIONS)
+    monkeypatch.undo()
+
+    assert job['status'] == 'queued'
+    assert service.wait(job['id'], 30)['status'] == 'completed'
+    assert os.path.exists(path)
+
+
+def test_report_download_answers_202_unless_asked_to_wait(monkeypatch, tmp_path):
+    service = RenderService(mode='inline', workers=1, jobs_dir=str(tmp_path / 'jobs'))
+    monkeypatch.setattr(render_service, 'render_service', service)
+    import routes
+    monkeypatch.setattr(routes, 'render_service', service)
+    release = threading.Event()
+    real_run = service._run_job
+    monkeypatch.setattr(service, '_run_job', lambda *args: release.wait(10) and real_run(*args))
+
+    client = app.test_client()
+    csv = b"Date,Vendor,Category,Amount\n2024-01-05,Acme Cloud,Software,120.00\n2024-02-05,Delta,Travel,310.00\n"
+    upload = client.post('/api/upload', data={'file': (io.BytesIO(csv), 'ledger.csv')},
+                         content_type='multipart/form-data').get_json()
+
+    response = client.get(f"/api/report/{upload['analysis_id']}")
+    assert response.status_code == 202
+    job_id = response.get_json()['render_job']['id']
+    assert response.headers['Location'].endswith(f'/api/render/jobs/{job_id}')
+    assert response.headers['Retry-After']
+
+    release.set()
+    response = client.get(f"/api/report/{upload['analysis_id']}?wait=10")
+    assert response.status_code == 200
+    assert response.data.startswith(b'%PDF')
+
+
+def test_theme_change_renders_a_new_pdf_under_a_new_etag(monkeypatch, tmp_path):
+    import report_theme
+    import routes
+    service = RenderService(mode='inline', workers=1, jobs_dir=str(tmp_path / 'jobs'))
+    monkeypatch.setattr(render_service, 'render_service', service)
+    monkeypatch.setattr(routes, 'render_service', service)
+    themes = report_theme.ReportThemeRegistry(str(tmp_path / 'report_themes.json'))
+    monkeypatch.setattr(report_theme, 'report_themes', themes)
+
+    client = app.test_client()
+    csv = b"Date,Vendor,Category,Amount\n2024-01-05,Acme Cloud,Software,120.00\n2024-02-05,Delta,Travel,310.00\n"
+    upload = client.post('/api/upload', data={'file': (io.BytesIO(csv), 'ledger.csv'), 'companyName': 'Themed Co'},
+                         content_type='multipart/form-data').get_json()
+    url = f"/api/report/{upload['analysis_id']}?wait=10"
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert client.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    themes.update({'Themed Co': {'primary_color': '#112233'}})
+    second = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert second.data != first.data
+
+    # Back on the default theme the original PDF is current again
+    themes.update({'Themed Co': None})
+    assert client.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
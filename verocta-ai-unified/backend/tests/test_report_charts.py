@@ -0,0 +1,58 @@
+import io
+from datetime import date
+
+import pytest
+from reportlab.graphics.shapes import Drawing
+
+import pdf_generator
+from pdf_generator import CHART_BACKENDS, generate_report_pdf_with_stats, render_report_charts
+
+CHART_KEYS = {'clean_pie', 'breakdown', 'trend'}
+
+TRANSACTIONS = [
+    {'date': date(2024, month, 3), 'vendor': vendor, 'category': category, 'amount': amount * month}
+    for month in range(1, 7)
+    for vendor, category, amount in (
+        ('Acme Cloud', 'Software', 120.0), ('Delta', 'Travel', 310.0),
+        ('Landlord LLC', 'Rent', 2500.0), ('Cafe Uno', 'Dining', 42.5),
+    )
+]
+
+
+@pytest.fixture(autouse=True)
+def fresh_chart_cache(monkeypatch):
+    monkeypatch.setattr(pdf_generator, 'chart_cache', pdf_generator.ChartCache())
+
+
+@pytest.mark.parametrize('backend', CHART_BACKENDS)
+def test_every_chart_is_rendered(backend):
+    charts = render_report_charts(TRANSACTIONS, backend=backend)
+    assert set(charts) == CHART_KEYS
+    for name, chart in charts.items():
+        assert chart is not None, name
+        if backend == 'reportlab':
+            assert isinstance(chart, Drawing)
+            width, height = pdf_generator.CHART_PLACEMENT[name]
+            assert (chart.width, chart.height) == (width * 72, height * 72)
+        else:
+            assert isinstance(chart, io.BytesIO) and chart.getvalue(), name
+
+
+@pytest.mark.parametrize('backend', CHART_BACKENDS)
+def test_report_pdf_builds_with_backend(backend, tmp_path):
+    analysis = {'spend_score': 72, 'total_spending': sum(t['amount'] for t in TRANSACTIONS),
+                'suggestions': [], 'category_breakdown': {}}
+    output = tmp_path / f'{backend}.pdf'
+    generate_report_pdf_with_stats(analysis, TRANSACTIONS, 'DevStudio', output_path=str(output),
+                                   chart_backend=backend)
+    assert output.read_bytes().startswith(b'%PDF')
+
+
+def test_no_charts_without_spending():
+    for backend in CHART_BACKENDS:
+        assert render_report_charts([], backend=backend) == {}
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        render_report_charts(TRANSACTIONS, backend='plotly')
@@ -0,0 +1,101 @@
+import io
+import os
+import threading
+import time
+
+import pytest
+
+import render_service
+import routes
+from app import app
+from render_service import RenderService
+from report_store import report_store
+
+
+@pytest.fixture
+def use_service(monkeypatch, tmp_path):
+    """Point the routes at a fresh inline render service (one per simulated web worker)"""
+    def use(service=None):
+        service = service or RenderService(mode='inline', workers=1, jobs_dir=str(tmp_path / 'jobs'))
+        monkeypatch.setattr(render_service, 'render_service', service)
+        monkeypatch.setattr(routes, 'render_service', service)
+        return service
+    return use
+
+
+@pytest.fixture
+def report_url(auth_headers):
+    """URL of the PDF of a new report, and the headers to fetch it with"""
+    def create(title):
+        headers = auth_headers()
+        response = app.test_client().post('/api/reports', headers=headers, json={
+            'title': title, 'data': {'spend_score': 64, 'total_amount': 9100.0, 'total_transactions': 42,
+                                     'top_categories': ['Software', 'Travel']}})
+        return f"/api/reports/{response.get_json()['report']['id']}/pdf", headers
+    return create
+
+
+def test_pending_render_answers_202_then_the_pdf_then_304(use_service, report_url):
+    service = use_service()
+    release = threading.Event()
+    real_run = service._run_job
+    service._run_job = lambda *args: release.wait(10) and real_run(*args)
+    url, headers = report_url('Pending render')
+    client = app.test_client()
+
+    response = client.get(url, headers=headers)
+    assert response.status_code == 202
+    assert response.headers['Retry-After']
+    status_url = response.headers['Location']
+
+    release.set()
+    for _ in range(100):
+        if client.get(status_url).get_json()['status'] == 'completed':
+            break
+        time.sleep(0.05)
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    assert response.data.startswith(b'%PDF')
+    etag = response.headers['ETag']
+
+    response = client.get(url, headers=dict(headers, **{'If-None-Match': etag}))
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+
+def test_memory_storage_renders_in_the_request_on_any_worker(monkeypatch, use_service, report_url):
+    monkeypatch.setattr(routes, 'PDF_STORAGE', 'memory')
+    first_worker = use_service()
+    url, headers = report_url('Memory render')
+    client = app.test_client()
+
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200 and response.data.startswith(b'%PDF')
+    assert first_worker.buffers.get_stats()['misses'] == 1
+
+    assert client.get(url, headers=headers).data == response.data
+    assert first_worker.buffers.get_stats()['hits'] == 1
+
+    # The next request lands on a worker that has never seen this report: it renders instead of failing
+    second_worker = use_service()
+    again = client.get(url, headers=headers)
+    assert again.status_code == 200 and again.data.startswith(b'%PDF')
+    assert again.headers['ETag'] == response.headers['ETag']
+    assert second_worker.buffers.get_stats()['misses'] == 1
+
+    # No jobs and nothing written to the report store
+    assert first_worker.stats['submitted'] == second_worker.stats['submitted'] == 0
+    assert not os.path.exists(report_store.artifact_path(response.headers['ETag'].strip('"'), 'pdf'))
+
+
+def test_memory_storage_serves_stored_analyses(monkeypatch, use_service):
+    monkeypatch.setattr(routes, 'PDF_STORAGE', 'memory')
+    service = use_service()
+    client = app.test_client()
+    csv = b"Date,Vendor,Category,Amount\n2024-01-05,Acme Cloud,Software,120.00\n2024-02-05,Delta,Travel,310.00\n"
+    upload = client.post('/api/upload', data={'file': (io.BytesIO(csv), 'ledger.csv')},
+                         content_type='multipart/form-data').get_json()
+
+    response = client.get(f"/api/report/{upload['analysis_id']}")
+    assert response.status_code == 200 and response.data.startswith(b'%PDF')
+    assert service.stats['submitted'] == 0
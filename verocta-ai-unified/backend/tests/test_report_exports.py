@@ -0,0 +1,67 @@
+import io
+import os
+import time
+import zipfile
+
+import pytest
+
+import render_service
+import routes
+from app import app
+from render_service import RenderService
+from report_store import ReportStore
+
+
+@pytest.fixture
+def export(monkeypatch, tmp_path, auth_headers):
+    """export(format) -> (response, store) for a bulk export of two new reports, rendered inline"""
+    store = ReportStore(str(tmp_path / 'store'), orphan_grace=0)
+    service = RenderService(mode='inline', workers=1, jobs_dir=str(tmp_path / 'jobs'), store=store)
+    monkeypatch.setattr(render_service, 'render_service', service)
+    monkeypatch.setattr(routes, 'render_service', service)
+    monkeypatch.setattr(routes, 'report_store', store)
+    headers = auth_headers()
+    client = app.test_client()
+    report_ids = [client.post('/api/reports', headers=headers, json={
+        'title': title, 'data': {'spend_score': 70, 'total_amount': 5000.0, 'total_transactions': 12}
+    }).get_json()['report']['id'] for title in ('January', 'February')]
+
+    def run(export_format):
+        response = client.post('/api/reports/export?wait=30', headers=headers,
+                               json={'report_ids': report_ids, 'format': export_format})
+        return response, store
+    return run
+
+
+def test_zip_export_holds_one_pdf_per_report(export):
+    response, _ = export('zip')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/zip'
+    with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+        names = archive.namelist()
+        assert len(names) == 2 and all(name.endswith('.pdf') for name in names)
+        assert all(archive.read(name).startswith(b'%PDF') for name in names)
+
+
+def test_exports_survive_prunes_until_their_download_expires(export):
+    response, store = export('pdf')
+    assert response.status_code == 200 and response.data.startswith(b'%PDF')
+    content_hash = response.headers['ETag'].strip('"')
+    path = store.artifact_path(content_hash, 'pdf')
+
+    store.prune()
+    assert os.path.exists(path)
+
+    expired = time.time() - 1
+    os.utime(os.path.join(store.root, 'pins', content_hash), (expired, expired))
+    store.prune()
+    assert not os.path.exists(path)
+    assert not os.path.exists(os.path.join(store.root, 'pins', content_hash))
+
+
+def test_export_rejects_unknown_reports_and_formats(export, auth_headers):
+    client, headers = app.test_client(), auth_headers()
+    response = client.post('/api/reports/export', headers=headers, json={'report_ids': [10 ** 9], 'format': 'zip'})
+    assert response.status_code == 404
+    response = client.post('/api/reports/export', headers=headers, json={'report_ids': [1], 'format': 'tar'})
+    assert response.status_code == 400
@@ -0,0 +1,83 @@
+import os
+import threading
+import time
+
+from pdf_generator import generate_model_pdf_with_stats
+from report_model import build_report_model
+from report_store import ReportStore, new_analysis_id
+
+ANALYSIS = {'spend_score': 72, 'suggestions': [{'priority': 'High', 'text': 'Review software seats'}]}
+TRANSACTIONS = [{'date': '2024-01-05', 'vendor': 'Acme Cloud', 'category': 'Software', 'amount': 1200.0}]
+
+
+def test_identical_analyses_share_artifacts(tmp_path):
+    store = ReportStore(str(tmp_path))
+    first, second = new_analysis_id(), new_analysis_id()
+    a = store.save_report(first, ANALYSIS, TRANSACTIONS, 'Acme')
+    b = store.save_report(second, ANALYSIS, TRANSACTIONS, 'Acme')
+
+    assert a['content_hash'] == b['content_hash'] and a['artifacts'] == b['artifacts']
+    assert store.load_analysis(first) == ANALYSIS
+    assert store.load_transactions(second) == TRANSACTIONS
+    assert store.get_record()['analysis_id'] == second
+    assert store.stats['renders'] == 2 and store.stats['reused'] == 2
+
+
+def test_concurrent_callers_write_an_artifact_once(tmp_path):
+    store = ReportStore(str(tmp_path))
+    writes, start = [], threading.Barrier(8)
+
+    def write(path):
+        writes.append(path)
+        time.sleep(0.05)
+        with open(path, 'w') as f:
+            f.write('pdf')
+
+    def call():
+        start.wait()
+        store.ensure_artifact('a' * 64, 'pdf', write)
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(writes) == 1
+    assert store.stats == dict(store.stats, renders=1, reused=7)
+
+
+def test_hash_lock_is_shared_while_held_and_released_after(tmp_path):
+    store = ReportStore(str(tmp_path))
+    held = store._hash_lock('b' * 64)
+    assert store._hash_lock('b' * 64) is held
+    del held
+    assert 'b' * 64 not in store._hash_locks
+
+
+def test_prune_drops_expired_analyses_and_unreferenced_artifacts(tmp_path):
+    store = ReportStore(str(tmp_path), retention_days=1, orphan_grace=60)
+    kept, expired = new_analysis_id(), new_analysis_id()
+    kept_record = store.save_report(kept, ANALYSIS, TRANSACTIONS)
+    expired_record = store.save_report(expired, dict(ANALYSIS, spend_score=40), TRANSACTIONS)
+    old = time.time() - 2 * 86400
+    os.utime(os.path.join(str(tmp_path), 'analyses', f'{expired}.json'), (old, old))
+    for relative in filter(None, expired_record['artifacts'].values()):
+        os.utime(os.path.join(str(tmp_path), relative), (old, old))
+
+    assert store.prune() == {'analyses': 1, 'artifacts': 2}
+    assert store.get_record(expired) is None
+    assert store.load_analysis(kept) == ANALYSIS
+    assert all(os.path.exists(os.path.join(str(tmp_path), p)) for p in kept_record['artifacts'].values() if p)
+
+
+def test_model_pdf_without_an_output_path_is_not_a_shared_file():
+    first = build_report_model(ANALYSIS, TRANSACTIONS, 'Acme')
+    second = build_report_model(dict(ANALYSIS, spend_score=40), TRANSACTIONS, 'Beta')
+    first_path, first_stats = generate_model_pdf_with_stats(first)
+    second_path, _ = generate_model_pdf_with_stats(second)
+
+    assert first_path != second_path
+    assert first_stats['pages'] >= 1 and not first_stats['reused']
+    assert generate_model_pdf_with_stats(first) == (first_path, {'reused': True})
+    with open(first_path, 'rb') as f:
+        assert f.read(5) == b'%PDF-'
@@ -0,0 +1,64 @@
+import pytest
+
+import report_theme
+from app import app
+from report_theme import ReportThemeRegistry, validate_theme
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    registry = ReportThemeRegistry(str(tmp_path / 'report_themes.json'))
+    monkeypatch.setattr(report_theme, 'report_themes', registry)
+    import routes
+    monkeypatch.setattr(routes, 'report_themes', registry)
+    return registry
+
+
+@pytest.mark.parametrize('font', [['Helvetica'], {'name': 'Times-Roman'}, 12])
+def test_non_string_font_is_a_value_error(font):
+    with pytest.raises(ValueError, match='font'):
+        validate_theme({'font': font})
+
+
+def test_update_merges_entries_instead_of_replacing_the_table(registry):
+    registry.update({'Acme': {'primary_color': '#112233'}, 'Beta': {'font': 'Times-Roman'}})
+    registry.update({'acme ': {'font': 'Courier'}})
+    assert registry.settings_table() == {'Beta': {'font': 'Times-Roman'}, 'acme': {'font': 'Courier'}}
+    registry.update({'Beta': None})
+    assert registry.settings_table() == {'acme': {'font': 'Courier'}}
+    # Another process's registry sees the merged table
+    assert ReportThemeRegistry(registry.path).settings_table('ACME') == {'acme': {'font': 'Courier'}}
+
+
+def test_users_only_see_and_change_their_own_company_theme(registry, auth_headers):
+    registry.update({'Verocta AI': {'font': 'Times-Roman'}})
+    client = app.test_client()
+    headers = auth_headers()
+
+    response = client.get('/api/reports/themes', headers=headers)
+    assert response.get_json()['themes'] == {}
+
+    response = client.put('/api/reports/themes', headers=headers, json={'themes': {'Verocta AI': {}}})
+    assert response.status_code == 403
+
+    response = client.put('/api/reports/themes', headers=headers,
+                          json={'themes': {'DevStudio': {'primary_color': '#112233'}}})
+    assert response.status_code == 200
+    assert response.get_json()['themes'] == {'DevStudio': {'primary_color': '#112233'}}
+    assert registry.settings_table()['Verocta AI'] == {'font': 'Times-Roman'}
+
+
+def test_admin_can_change_any_company_theme(registry, auth_headers):
+    client = app.test_client()
+    headers = auth_headers('admin@verocta.ai', 'admin123')
+    response = client.put('/api/reports/themes', headers=headers, json={'themes': {'Acme': {'font': 'Times-Roman'}}})
+    assert response.status_code == 200
+    assert client.get('/api/reports/themes', headers=headers).get_json()['themes'] == {'Acme': {'font': 'Times-Roman'}}
+
+
+def test_unhashable_font_is_a_bad_request(registry, auth_headers):
+    client = app.test_client()
+    headers = auth_headers()
+    response = client.put('/api/reports/themes', headers=headers, json={'themes': {'DevStudio': {'font': ['Times-Roman']}}})
+    assert response.status_code == 400
+    assert 'font' in response.get_json()['error']
@@ -0,0 +1,151 @@
+from types import SimpleNamespace
+
+import pytest
+
+from resilient_client import ResilientChatClient, CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f'HTTP {status_code}')
+        self.status_code = status_code
+
+
+class StubTransport:
+    """Stands in for the SDK client: replays queued outcomes and records each call"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        outcome = self.outcomes.pop(0) if self.outcomes else 'ok'
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_client(transport, clock=None, **options):
+    sleeps = []
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock or FakeClock())
+    options = dict({'max_retries': 2, 'backoff_base': 0.5, 'backoff_max': 8}, **options)
+    client = ResilientChatClient(transport, breaker=breaker, sleep=sleeps.append, **options)
+    return client, sleeps
+
+
+def test_retries_retryable_errors_with_bounded_jittered_backoff():
+    transport = StubTransport(StatusError(503), StatusError(429), 'done')
+    client, sleeps = make_client(transport)
+
+    assert client.chat.completions.create(model='m', messages=[]) == 'done'
+    assert len(transport.calls) == 3
+    assert client.metrics['retries'] == 2
+    assert 0 <= sleeps[0] <= 0.5 and 0 <= sleeps[1] <= 1.0
+    assert client.breaker.state == CLOSED
+
+
+def test_gives_up_after_max_retries():
+    transport = StubTransport(*[StatusError(500)] * 5)
+    client, sleeps = make_client(transport)
+
+    with pytest.raises(StatusError):
+        client.chat.completions.create(model='m', messages=[])
+    assert len(transport.calls) == 3
+    assert len(sleeps) == 2
+    assert client.metrics['failures'] == 1
+
+
+def test_client_errors_are_not_retried_and_keep_the_breaker_closed():
+    transport = StubTransport(StatusError(400), StatusError(401))
+    client, _ = make_client(transport)
+
+    for _ in range(2):
+        with pytest.raises(StatusError):
+            client.chat.completions.create(model='m', messages=[])
+    assert len(transport.calls) == 2
+    assert client.breaker.state == CLOSED
+
+
+def test_breaker_opens_half_opens_and_closes():
+    clock = FakeClock()
+    transport = StubTransport(*[ConnectionError('down')] * 6)
+    client, _ = make_client(transport, clock=clock, max_retries=0)
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            client.chat.completions.create(model='m', messages=[])
+    assert client.breaker.state == OPEN
+
+    # Open: rejected without touching the transport
+    calls = len(transport.calls)
+    with pytest.raises(CircuitOpenError):
+        client.chat.completions.create(model='m', messages=[])
+    assert len(transport.calls) == calls
+    assert client.metrics['short_circuited'] == 1
+
+    # After the reset timeout one trial goes through; its failure re-opens the breaker
+    clock.now = 30
+    with pytest.raises(ConnectionError):
+        client.chat.completions.create(model='m', messages=[])
+    assert client.breaker.state == OPEN
+    assert client.breaker.transitions[HALF_OPEN] == 1
+
+    # The next trial succeeds and closes it
+    clock.now = 60
+    transport.outcomes = ['recovered']
+    assert client.chat.completions.create(model='m', messages=[]) == 'recovered'
+    assert client.breaker.state == CLOSED
+    assert client.breaker.transitions == {CLOSED: 1, OPEN: 2, HALF_OPEN: 2}
+
+
+def test_half_open_allows_a_single_trial_call():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+    assert breaker.allow() is True
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is False
+
+
+def broken_stream(*chunks):
+    yield from chunks
+    raise ConnectionError('connection reset mid-stream')
+
+
+def test_mid_stream_failures_count_against_the_breaker():
+    transport = StubTransport(broken_stream('a'), broken_stream('b'))
+    client, _ = make_client(transport)
+
+    for failures in range(2):
+        stream = client.chat.completions.create(model='m', messages=[], stream=True)
+        # Opening the stream is not yet a success
+        assert client.breaker.consecutive_failures == failures and client.metrics['successes'] == 0
+        with pytest.raises(ConnectionError):
+            list(stream)
+    assert client.metrics['failures'] == 2
+    assert client.breaker.state == OPEN
+
+
+def test_completed_or_abandoned_streams_count_as_successes():
+    transport = StubTransport(iter(['a', 'b']), iter(['c', 'd']))
+    client, _ = make_client(transport)
+    client.breaker.consecutive_failures = 1
+
+    assert list(client.chat.completions.create(model='m', messages=[], stream=True)) == ['a', 'b']
+    assert client.breaker.consecutive_failures == 0
+
+    stream = client.chat.completions.create(model='m', messages=[], stream=True)
+    assert next(iter(stream)) == 'c'
+    stream.close()
+    assert client.metrics['successes'] == 2 and client.metrics['failures'] == 0
@@ -0,0 +1,76 @@
+from datetime import date
+from types import SimpleNamespace
+
+import gpt_utils
+from analysis_pipeline import run_analysis_pipeline
+from budgets import Budget, calculate_budget_adherence
+from insight_stream import stream_financial_insights
+from rule_insights import generate_rule_based_insights
+from spend_score_engine import normalize_category, get_enhanced_analysis
+from transaction_aggregates import TransactionAggregates
+
+
+def ledger():
+    """Monthly rent far above everything else, plus one office supply order well above that vendor's usual charge"""
+    rows = []
+    for month in range(1, 7):
+        rows.append({'date': date(2024, month, 1), 'vendor': 'Landlord LLC', 'category': 'Rent', 'amount': 4000.0})
+        rows.append({'date': date(2024, month, 3), 'vendor': 'Payroll Co', 'category': 'Payroll', 'amount': 3000.0})
+        for day in (5, 15, 25):
+            rows.append({'date': date(2024, month, day), 'vendor': 'Office Depot', 'category': 'Supplies', 'amount': 30.0})
+    rows.append({'date': date(2024, 6, 28), 'vendor': 'Office Depot', 'category': 'Supplies', 'amount': 450.0})
+    return rows
+
+
+def test_spikes_use_vendor_baselines_over_all_transactions():
+    aggregates = TransactionAggregates(ledger())
+    spikes = aggregates.spend_spikes(5.0)
+    # The $450 order is not among the five largest rows, and recurring rent is not a spike
+    assert all(t['vendor'] != 'Office Depot' for t in aggregates.largest_transactions())
+    assert [(t['vendor'], t['amount'], basis) for t, _, basis in spikes] == [('Office Depot', 450.0, 'vendor')]
+
+
+def test_rule_insights_report_the_spike_and_not_the_rent():
+    texts = ' '.join(item['text'] for item in generate_rule_based_insights(ledger()))
+    assert '1 one-off spend spike detected; the largest is $450.00 at Office Depot' in texts
+    assert 'at Landlord LLC' not in texts
+
+
+def test_one_off_vendor_is_compared_with_its_category():
+    rows = [{'vendor': f'Cafe {i}', 'category': 'Dining', 'amount': 20.0} for i in range(4)]
+    rows.append({'vendor': 'Gala Venue', 'category': 'Dining', 'amount': 900.0})
+    spikes = TransactionAggregates(rows).spend_spikes(5.0)
+    assert [(t['vendor'], baseline, basis) for t, baseline, basis in spikes] == [('Gala Venue', 20.0, 'category')]
+
+
+def test_public_category_normalizer_matches_scoring():
+    assert normalize_category('Restaurant & Bars') == 'dining'
+    assert normalize_category('') == 'Uncategorized'
+    assert get_enhanced_analysis(ledger())['final_score'] > 0
+
+
+def failing_client():
+    def create(**kwargs):
+        raise ConnectionError('API unavailable')
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def test_budget_overruns_survive_every_rule_fallback(monkeypatch):
+    monkeypatch.setattr(gpt_utils, 'INSIGHT_MODE', 'gpt')
+    budgets = [Budget('Acme', 'Supplies', 50)]
+    budget_report = calculate_budget_adherence(ledger(), budgets)
+    overrun = 'went over budget; the largest was Supplies'
+
+    suggestions, usage = gpt_utils.generate_financial_insights_with_usage(
+        ledger(), failing_client(), cache=False, budget_report=budget_report)
+    assert usage['fallback'] == 'error'
+    assert any(overrun in s['text'] for s in suggestions)
+
+    events = list(stream_financial_insights(ledger(), failing_client(), cache=False, budget_report=budget_report))
+    assert any(overrun in s['text'] for s in events[-1][1]['suggestions'])
+
+    # The pipeline's request starts before budgets are scored, and its rule answer is redone with them
+    monkeypatch.setattr(gpt_utils, 'openai_client', failing_client())
+    result = run_analysis_pipeline(ledger(), budgets, render_charts=False)
+    assert result['prompt_usage']['source'] == 'rules'
+    assert any(overrun in s['text'] for s in result['insights'])
@@ -0,0 +1,56 @@
+import io
+import math
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate
+
+import pdf_generator
+from pdf_generator import LEDGER_ROW_HEIGHT, TransactionLedger, generate_report_pdf_with_stats
+
+MARGIN = 50
+
+
+def transactions(count):
+    return [{'date': '2024-01-05', 'vendor': f'Vendor {i % 37}', 'category': 'Software', 'amount': 10.0 + i}
+            for i in range(count)]
+
+
+def drawn_chunks(monkeypatch):
+    """(start, end) of every ledger chunk drawn, in page order"""
+    chunks = []
+    real_draw = TransactionLedger.draw
+
+    def draw(self):
+        chunks.append((self.start, self.end))
+        real_draw(self)
+    monkeypatch.setattr(TransactionLedger, 'draw', draw)
+    return chunks
+
+
+def test_ledger_splits_into_full_pages_covering_every_row(monkeypatch):
+    chunks = drawn_chunks(monkeypatch)
+    rows = transactions(500)
+    doc = SimpleDocTemplate(io.BytesIO(), pagesize=A4, leftMargin=MARGIN, rightMargin=MARGIN,
+                            topMargin=MARGIN, bottomMargin=MARGIN)
+    doc.build([TransactionLedger(rows)])
+
+    # Each page holds as many rows as fit below its repeated header row (frames have 6pt padding per side)
+    per_page = int((A4[1] - 2 * MARGIN - 12) // LEDGER_ROW_HEIGHT) - 1
+    assert doc.page == math.ceil(len(rows) / per_page) > 1
+    assert [end - start for start, end in chunks[:-1]] == [per_page] * (len(chunks) - 1)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(rows)
+    assert all(previous[1] == current[0] for previous, current in zip(chunks, chunks[1:]))
+
+
+def test_report_appendix_lists_rows_up_to_the_limit(monkeypatch):
+    chunks = drawn_chunks(monkeypatch)
+    monkeypatch.setattr(pdf_generator, 'PDF_APPENDIX_MAX_ROWS', 300)
+    analysis_data = {'spend_score': 72, 'total_transactions': 400, 'suggestions': [], 'filename': 'ledger.csv'}
+    output = io.BytesIO()
+    _, stats = generate_report_pdf_with_stats(analysis_data, transactions(400), 'Ledger Co', output_path=output,
+                                              chart_backend='reportlab', include_appendix=True)
+
+    assert stats['appendix_rows'] == 300
+    assert sum(end - start for start, end in chunks) == 300
+    assert stats['pages'] >= len(chunks) > 1
+    assert output.getvalue().startswith(b'%PDF')
@@ -0,0 +1,90 @@
+import json
+import shutil
+
+import pytest
+
+import vendor_normalizer
+from app import app
+from vendor_normalizer import VendorCanonicalizer, tokenize_vendor, validate_vendor_aliases
+
+ALIASES = {
+    'Amazon': ['amazon', 'amzn mktp', 'amazon.com'],
+    'Amazon Web Services': ['amazon web services', 'aws'],
+    'Uber': ['uber'],
+    'Uber Eats': ['uber eats'],
+}
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('AMZN Mktp US*2K4LX', 'Amazon'),
+    ('amazon.com', 'Amazon'),
+    ('Amazon Web Services Inc.', 'Amazon Web Services'),
+    ('AWS EMEA', 'Amazon Web Services'),
+    ('UBER   EATS 8821', 'Uber Eats'),
+    ('uber trip', 'Uber'),
+    ('SQ *UBER', 'Uber'),
+    ('POS PURCHASE AMAZON', 'Amazon'),
+])
+def test_aliases_resolve_regardless_of_casing_punctuation_and_prefixes(raw, expected):
+    assert VendorCanonicalizer(ALIASES).canonicalize(raw) == expected
+
+
+def test_unknown_vendors_group_by_cleaned_tokens():
+    canonicalizer = VendorCanonicalizer(ALIASES)
+    # Store numbers, reference codes and legal suffixes do not split a vendor
+    first = canonicalizer.canonicalize("Joe's Coffee #1234")
+    assert first == "Joe's Coffee"
+    assert canonicalizer.canonicalize("JOE'S COFFEE 5678 LLC") == first
+    assert canonicalizer.canonicalize('Joes Coffee') != first
+
+
+def test_empty_and_missing_vendors():
+    canonicalizer = VendorCanonicalizer(ALIASES)
+    assert canonicalizer.canonicalize(None) == 'Unknown Vendor'
+    assert canonicalizer.canonicalize('   ') == 'Unknown Vendor'
+    # Only noise tokens: keep them rather than dropping the vendor
+    assert canonicalizer.canonicalize('LLC') == 'LLC'
+    assert tokenize_vendor('PAYPAL') == [('PAYPAL', 'PAYPAL')]
+
+
+def test_short_alias_tokens_must_match_exactly():
+    canonicalizer = VendorCanonicalizer({'Costco': ['costco'], 'BP': ['bp']})
+    assert canonicalizer.canonicalize('BP Fuel 0042') == 'BP'
+    assert canonicalizer.canonicalize('BPX Logistics') == 'BPX Logistics'
+    assert canonicalizer.canonicalize('COSTCO WHSE #0123') == 'Costco'
+
+
+def test_transactions_keep_the_raw_vendor_and_repeats_hit_the_memo():
+    canonicalizer = VendorCanonicalizer(ALIASES)
+    transactions = [{'vendor': 'AMZN Mktp US'}, {'vendor': 'AMZN Mktp US'}]
+    canonicalizer.canonicalize_transactions(transactions)
+    assert transactions[0] == {'vendor': 'Amazon', 'raw_vendor': 'AMZN Mktp US'}
+    assert canonicalizer.cache_info()['hits'] == 1 and canonicalizer.cache_info()['misses'] == 1
+
+
+@pytest.mark.parametrize('aliases', [['amazon'], {'Amazon': []}, {'Amazon': 'amazon'}, {'Amazon': ['***']}, {'': ['x']}])
+def test_invalid_alias_tables_are_rejected(aliases):
+    with pytest.raises(ValueError):
+        validate_vendor_aliases(aliases)
+
+
+def test_alias_updates_apply_to_new_uploads_and_require_an_admin(monkeypatch, tmp_path, auth_headers):
+    path = tmp_path / 'vendor_aliases.json'
+    shutil.copy(vendor_normalizer.VENDOR_ALIASES_PATH, path)
+    monkeypatch.setattr(vendor_normalizer, 'VENDOR_ALIASES_PATH', str(path))
+    monkeypatch.setattr(vendor_normalizer, '_canonicalizer', None)
+    monkeypatch.setattr(vendor_normalizer, '_canonicalizer_mtime', None)
+    client = app.test_client()
+    admin = auth_headers('admin@verocta.ai', 'admin123')
+    aliases = {'Blue Bottle Coffee': ['blue bottle', 'bluebottle']}
+
+    assert client.put('/api/vendors/aliases', headers=auth_headers(), json={'aliases': aliases}).status_code == 403
+    response = client.put('/api/vendors/aliases', headers=admin, json={'aliases': {'Blue Bottle Coffee': []}})
+    assert response.status_code == 400
+
+    response = client.put('/api/vendors/aliases', headers=admin, json={'aliases': aliases})
+    assert response.status_code == 200
+    assert json.loads(path.read_text()) == aliases
+    assert client.get('/api/vendors/aliases', headers=admin).get_json()['aliases'] == aliases
+    transactions = vendor_normalizer.canonicalize_transactions([{'vendor': 'BLUEBOTTLE #12 OAKLAND'}])
+    assert transactions[0]['vendor'] == 'Blue Bottle Coffee'
@@ -0,0 +1,128 @@
+"""
+VeroctaAI Transaction Aggregates
+Single-pass category, vendor and monthly totals shared by the SpendScore engine and the GPT prompt builder
+"""
+
+import heapq
+import math
+from datetime import datetime
+from statistics import mean, median
+from typing import Callable, Dict, List, Any, Tuple
+
+
+def parse_transaction_date(date: Any):
+    """Return a date/datetime for a transaction date value, or None if unparseable"""
+    if not date:
+        return None
+    if isinstance(date, str):
+        for date_format in ('%Y-%m-%d', '%m/%d/%Y'):
+            try:
+                return datetime.strptime(date, date_format)
+            except ValueError:
+                continue
+        return None
+    return date
+
+
+class TransactionAggregates:
+    """Totals computed once per upload so downstream consumers work in O(categories + vendors)"""
+
+    # Largest transactions kept for outlier reporting
+    TOP_TRANSACTIONS = 5
+
+    def __init__(self, transactions: List[Dict[str, Any]]):
+        self.count = len(transactions)
+        self.amounts: List[float] = []
+        self.category_spending: Dict[Any, float] = {}
+        self.category_counts: Dict[Any, int] = {}
+        self.vendor_spending: Dict[Any, float] = {}
+        self.vendor_frequency: Dict[Any, int] = {}
+        self.vendor_amount_squares: Dict[Any, float] = {}
+        self.vendor_first_date: Dict[Any, Any] = {}
+        self.vendor_last_date: Dict[Any, Any] = {}
+        self.monthly_spending: Dict[str, float] = {}
+        self.transaction_dates = []
+        self._largest: List[Tuple[float, int]] = []  # (amount, -row index)
+
+        for index, transaction in enumerate(transactions):
+            amount = float(transaction.get('amount', 0))
+            category = transaction.get('category', 'Uncategorized')
+            vendor = transaction.get('vendor', 'Unknown')
+            self.amounts.append(amount)
+
+            self.category_spending[category] = self.category_spending.get(category, 0.0) + amount
+            self.category_counts[category] = self.category_counts.get(category, 0) + 1
+            self.vendor_spending[vendor] = self.vendor_spending.get(vendor, 0.0) + amount
+            self.vendor_frequency[vendor] = self.vendor_frequency.get(vendor, 0) + 1
+            self.vendor_amount_squares[vendor] = self.vendor_amount_squares.get(vendor, 0.0) + amount * amount
+
+            date = transaction.get('date')
+            if date:
+                month_key = date.strftime('%Y-%m') if hasattr(date, 'strftime') else str(date)[:7]
+                self.monthly_spending[month_key] = self.monthly_spending.get(month_key, 0.0) + amount
+                parsed = parse_transaction_date(date)
+                if parsed is not None:
+                    self.transaction_dates.append(parsed)
+                    day = parsed.date() if isinstance(parsed, datetime) else parsed
+                    if vendor not in self.vendor_first_date or day < self.vendor_first_date[vendor]:
+                        self.vendor_first_date[vendor] = day
+                    if vendor not in self.vendor_last_date or day > self.vendor_last_date[vendor]:
+                        self.vendor_last_date[vendor] = day
+
+            # Bounded min-heap of the largest amounts; on ties the earliest row is kept
+            if len(self._largest) < self.TOP_TRANSACTIONS:
+                heapq.heappush(self._largest, (amount, -index))
+            elif amount > self._largest[0][0]:
+                heapq.heapreplace(self._largest, (amount, -index))
+
+        self.transaction_dates.sort()
+        self.total_amount = sum(self.amounts)
+        self.mean_amount = mean(self.amounts) if self.amounts else 0
+        self.median_amount = median(self.amounts) if self.amounts else 0
+        self._transactions = transactions
+
+    def largest_transactions(self) -> List[Dict[str, Any]]:
+        """Largest transactions by amount, descending"""
+        return [self._transactions[-neg_index] for _, neg_index in sorted(self._largest, reverse=True)]
+
+    def vendor_amount_variation(self, vendor: Any) -> float:
+        """Coefficient of variation of a vendor's charge amounts (0 means identical charges)"""
+        count = self.vendor_frequency.get(vendor, 0)
+        if count < 2:
+            return 0.0
+        average = self.vendor_spending[vendor] / count
+        variance = max(self.vendor_amount_squares[vendor] / count - average * average, 0.0)
+        return math.sqrt(variance) / abs(average) if average else 0.0
+
+    def spend_spikes(self, multiple: float, min_history: int = 2) -> List[Tuple[Dict[str, Any], float, str]]:
+        """
+        Every transaction at least `multiple` times its usual amount, largest first, as (transaction, baseline, basis)
+        The baseline is the mean of the vendor's other charges, or of the category's when the vendor has too few,
+        so a large fixed cost that recurs (rent) matches its own baseline and is not a spike
+        """
+        spikes = []
+        for transaction in self._transactions:
+            amount = float(transaction.get('amount', 0))
+            vendor = transaction.get('vendor', 'Unknown')
+            category = transaction.get('category', 'Uncategorized')
+            if self.vendor_frequency[vendor] - 1 >= min_history:
+                baseline = (self.vendor_spending[vendor] - amount) / (self.vendor_frequency[vendor] - 1)
+                basis = 'vendor'
+            elif self.category_counts[category] - 1 >= min_history:
+                baseline = (self.category_spending[category] - amount) / (self.category_counts[category] - 1)
+                basis = 'category'
+            else:
+                continue
+            if baseline > 0 and amount >= multiple * baseline:
+                spikes.append((transaction, baseline, basis))
+        return sorted(spikes, key=lambda spike: -float(spike[0].get('amount', 0)))
+
+    def regroup_categories(self, normalize: Callable[[Any], str]) -> Tuple[Dict[str, float], Dict[str, int]]:
+        """Spending and counts keyed by normalized category, derived from the per-label totals"""
+        spending: Dict[str, float] = {}
+        counts: Dict[str, int] = {}
+        for category, amount in self.category_spending.items():
+            key = normalize(category)
+            spending[key] = spending.get(key, 0.0) + amount
+            counts[key] = counts.get(key, 0) + self.category_counts[category]
+        return spending, counts
@@ -0,0 +1,231 @@
+"""
+VeroctaAI Vendor Canonicalization
+Collapses raw vendor/description strings into canonical vendor names
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+VENDOR_ALIASES_PATH = os.environ.get(
+    'VENDOR_ALIASES_PATH', os.path.join(basedir, 'data', 'vendor_aliases.json')
+)
+
+# Raw strings resolved per process before the memo is reset
+MEMO_MAX_ENTRIES = 200_000
+
+# Alias tokens shorter than this must match a raw token exactly
+PREFIX_LEN = 3
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9&']+")
+REFERENCE_TOKEN_PATTERN = re.compile(r"^(\d{3,}|[A-Z]*\d{4,}[A-Z0-9]*)$")
+
+# Legal suffixes and web domains that never distinguish two vendors
+NOISE_TOKENS = {
+    'INC', 'LLC', 'LTD', 'LIMITED', 'CORP', 'CORPORATION', 'CO', 'COMPANY',
+    'PLC', 'GMBH', 'LLP', 'COM', 'NET', 'ORG', 'WWW', 'HTTPS', 'HTTP'
+}
+
+# Card processor and bank prefixes stripped from the start of a description
+LEADING_NOISE_TOKENS = {
+    'SQ', 'TST', 'PAYPAL', 'POS', 'CARD', 'PURCHASE', 'DEBIT', 'ACH',
+    'DD', 'SO', 'PMT', 'PAYMENT', 'TO', 'FROM'
+}
+
+
+def tokenize_vendor(raw: str) -> List[Tuple[str, str]]:
+    """Split a vendor string into (upper, original) token pairs with noise removed"""
+    if not raw:
+        return []
+
+    tokens = [(token.upper(), token) for token in TOKEN_PATTERN.findall(raw)]
+
+    # Drop store numbers, reference codes and legal suffixes
+    cleaned = [
+        pair for pair in tokens
+        if pair[0] not in NOISE_TOKENS and not REFERENCE_TOKEN_PATTERN.match(pair[0])
+    ]
+
+    # Strip processor prefixes while something meaningful remains
+    while len(cleaned) > 1 and cleaned[0][0] in LEADING_NOISE_TOKENS:
+        cleaned.pop(0)
+
+    return cleaned or tokens
+
+
+def load_vendor_aliases(path: Optional[str] = None) -> Dict[str, List[str]]:
+    """Load the canonical vendor -> aliases table"""
+    path = path or VENDOR_ALIASES_PATH
+    try:
+        with open(path, 'r') as f:
+            aliases = json.load(f)
+        return {str(name): [str(alias) for alias in values] for name, values in aliases.items()}
+    except FileNotFoundError:
+        logging.warning(f"Vendor alias table not found at {path}, using cleanup only")
+        return {}
+    except (ValueError, AttributeError) as e:
+        logging.error(f"Invalid vendor alias table {path}: {str(e)}")
+        return {}
+
+
+def validate_vendor_aliases(aliases: Any) -> Dict[str, List[str]]:
+    """Check an alias table before it is indexed or saved; raises ValueError"""
+    if not isinstance(aliases, dict):
+        raise ValueError('aliases must map canonical names to lists of alias strings')
+    for canonical, alias_list in aliases.items():
+        if not isinstance(canonical, str) or not tokenize_vendor(canonical):
+            raise ValueError(f'Invalid canonical vendor name: {canonical!r}')
+        if not isinstance(alias_list, list) or not alias_list:
+            raise ValueError(f'Aliases for {canonical} must be a non-empty list of strings')
+        for alias in alias_list:
+            if not isinstance(alias, str) or not tokenize_vendor(alias):
+                raise ValueError(f'Invalid alias for {canonical}: {alias!r}')
+    return aliases
+
+
+def save_vendor_aliases(aliases: Dict[str, List[str]], path: Optional[str] = None) -> None:
+    """Persist the alias table atomically"""
+    path = path or VENDOR_ALIASES_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(aliases, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+class VendorCanonicalizer:
+    """Resolves raw vendor strings through an alias prefix index and a memo cache"""
+
+    def __init__(self, aliases: Optional[Dict[str, List[str]]] = None):
+        self.aliases = aliases or {}
+        self._prefix_index: Dict[str, List[Tuple[Tuple[str, ...], str]]] = {}
+        self._memo: Dict[str, str] = {}
+        self._display_names: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self._build_index()
+
+    def _build_index(self):
+        """Index every alias by the leading characters of its first token"""
+        for canonical, alias_list in self.aliases.items():
+            for alias in [canonical] + list(alias_list):
+                alias_tokens = tuple(upper for upper, _ in tokenize_vendor(alias))
+                if not alias_tokens:
+                    continue
+                key = alias_tokens[0][:PREFIX_LEN]
+                self._prefix_index.setdefault(key, []).append((alias_tokens, canonical))
+
+        # Most specific alias wins: more tokens first, then longer text
+        for entries in self._prefix_index.values():
+            entries.sort(key=lambda entry: (-len(entry[0]), -sum(len(t) for t in entry[0])))
+
+    @staticmethod
+    def _token_matches(raw_token: str, alias_token: str) -> bool:
+        if len(alias_token) < PREFIX_LEN:
+            return raw_token == alias_token
+        return raw_token.startswith(alias_token)
+
+    def _match_alias(self, tokens: List[str]) -> Optional[str]:
+        """Return the canonical name of the earliest, most specific alias match"""
+        for start, token in enumerate(tokens):
+            candidates = self._prefix_index.get(token[:PREFIX_LEN])
+            if not candidates:
+                continue
+            for alias_tokens, canonical in candidates:
+                end = start + len(alias_tokens)
+                if end > len(tokens):
+                    continue
+                if all(self._token_matches(tokens[start + i], alias_token)
+                       for i, alias_token in enumerate(alias_tokens)):
+                    return canonical
+        return None
+
+    def canonicalize(self, raw: Any) -> str:
+        """Resolve a single raw vendor string to its canonical name"""
+        if raw is None:
+            return 'Unknown Vendor'
+        raw = str(raw)
+
+        cached = self._memo.get(raw)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        pairs = tokenize_vendor(raw)
+        if not pairs:
+            canonical = raw.strip() or 'Unknown Vendor'
+        else:
+            upper_tokens = [upper for upper, _ in pairs]
+            canonical = self._match_alias(upper_tokens)
+            if canonical is None:
+                # Unknown vendor: group by cleaned tokens, display the first spelling seen
+                key = ' '.join(upper_tokens)
+                canonical = self._display_names.setdefault(key, ' '.join(original for _, original in pairs))
+
+        if len(self._memo) >= MEMO_MAX_ENTRIES:
+            self._memo.clear()
+            self._display_names.clear()
+        self._memo[raw] = canonical
+        return canonical
+
+    def canonicalize_transactions(self, transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Rewrite transaction vendors in place, keeping the raw string as raw_vendor"""
+        for transaction in transactions:
+            raw_vendor = transaction.get('vendor', 'Unknown Vendor')
+            transaction['raw_vendor'] = raw_vendor
+            transaction['vendor'] = self.canonicalize(raw_vendor)
+        return transactions
+
+    def cache_info(self) -> Dict[str, int]:
+        """Memo cache counters"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._memo),
+            'aliases': sum(len(entries) for entries in self._prefix_index.values())
+        }
+
+
+_canonicalizer: Optional[VendorCanonicalizer] = None
+_canonicalizer_mtime: Optional[float] = None
+_canonicalizer_lock = threading.Lock()
+
+
+def get_vendor_canonicalizer() -> VendorCanonicalizer:
+    """Get the process-wide canonicalizer, rebuilt when the alias file changes"""
+    global _canonicalizer, _canonicalizer_mtime
+    try:
+        mtime = os.path.getmtime(VENDOR_ALIASES_PATH)
+    except OSError:
+        mtime = None
+
+    with _canonicalizer_lock:
+        if _canonicalizer is None or mtime != _canonicalizer_mtime:
+            _canonicalizer = VendorCanonicalizer(load_vendor_aliases())
+            _canonicalizer_mtime = mtime
+            logging.info(f"Vendor canonicalizer loaded: {_canonicalizer.cache_info()['aliases']} aliases")
+        return _canonicalizer
+
+
+def canonicalize_transactions(transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Main function to canonicalize vendor names between parsing and scoring"""
+    return get_vendor_canonicalizer().canonicalize_transactions(transactions)
+
+
+def update_vendor_aliases(aliases: Dict[str, List[str]]) -> VendorCanonicalizer:
+    """Replace the alias table and rebuild the index; a table that fails validation is never saved"""
+    global _canonicalizer, _canonicalizer_mtime
+    canonicalizer = VendorCanonicalizer(validate_vendor_aliases(aliases))
+    with _canonicalizer_lock:
+        save_vendor_aliases(aliases)
+        _canonicalizer = canonicalizer
+        try:
+            _canonicalizer_mtime = os.path.getmtime(VENDOR_ALIASES_PATH)
+        except OSError:
+            _canonicalizer_mtime = None
+    return _canonicalizer
@@ -97,14 +97,22 @@ const ReportsManager: React.FC = () => {
 
   const downloadReportPDF = async (reportId: number) => {
     try {
-      const response = await fetch(`/api/reports/${reportId}/pdf`, {
+      const request = () => fetch(`/api/reports/${reportId}/pdf`, {
         method: 'GET',
         headers: {
           'Accept': 'application/pdf'
         }
       })
       
-      if (response.ok) {
+      // 202 means the PDF is still rendering; ask again after Retry-After
+      let response = await request()
+      for (let attempt = 0; response.status === 202 && attempt < 30; attempt++) {
+        const retryAfter = Number(response.headers.get('Retry-After')) || 2
+        await new Promise(resolve => setTimeout(resolve, retryAfter * 1000))
+        response = await request()
+      }
+      
+      if (response.ok && response.status !== 202) {
         const blob = await response.blob()
         const url = window.URL.createObjectURL(blob)
         const a = document.createElement('a')
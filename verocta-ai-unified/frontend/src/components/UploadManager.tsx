@@ -82,8 +82,11 @@ const UploadManager: React.FC = () => {
       formData.append('company_name', 'VeroctaAI Demo Company')
 
       // Real API call to backend
+      // Signed-in uploads are scored against the company's budgets and peer benchmarks
+      const authToken = localStorage.getItem('auth_token')
       const response = await fetch('/api/upload', {
         method: 'POST',
+        headers: authToken ? { Authorization: `Bearer ${authToken}` } : undefined,
         body: formData
       })
 